@@ -0,0 +1,44 @@
+"""listing indexes for keyset pagination and filters
+
+Revision ID: 3b7e2c9d4a10
+Revises: 6f0d8b1a18af
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e2c9d4a10'
+down_revision = '6f0d8b1a18af'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('idx_propiedades_created', 'propiedades', ['created_at', 'id']),
+    ('idx_propiedades_estado_created', 'propiedades', ['estado_actual', 'created_at', 'id']),
+    ('idx_propiedades_comuna_created', 'propiedades', ['comuna', 'created_at', 'id']),
+    ('idx_propiedades_tipo_created', 'propiedades', ['tipo', 'created_at', 'id']),
+    ('idx_personas_created', 'personas', ['created_at', 'id']),
+    ('idx_personas_tipo_created', 'personas', ['tipo', 'created_at', 'id']),
+    ('idx_contratos_created', 'contratos_arriendo', ['created_at', 'id']),
+    ('idx_contratos_estado_created', 'contratos_arriendo', ['estado', 'created_at', 'id']),
+    ('idx_contratos_propiedad_created', 'contratos_arriendo', ['propiedad_id', 'created_at', 'id']),
+    ('idx_contratos_estado_fecha_fin', 'contratos_arriendo', ['estado', 'fecha_fin']),
+    ('idx_cobranzas_created', 'cobranzas', ['created_at', 'id']),
+    ('idx_cobranzas_estado_created', 'cobranzas', ['estado', 'created_at', 'id']),
+    ('idx_cobranzas_contrato_created', 'cobranzas', ['contrato_id', 'created_at', 'id']),
+    ('idx_cobranzas_fecha_vencimiento', 'cobranzas', ['fecha_vencimiento']),
+    ('idx_cobranzas_periodo', 'cobranzas', ['periodo']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
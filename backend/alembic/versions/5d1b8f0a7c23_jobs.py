@@ -0,0 +1,43 @@
+"""background jobs table
+
+Revision ID: 5d1b8f0a7c23
+Revises: c2a9e7f14d58
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from app.core.types import GUID
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1b8f0a7c23'
+down_revision = 'c2a9e7f14d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('trabajos',
+    sa.Column('id', GUID(), nullable=False),
+    sa.Column('tipo', sa.String(length=80), nullable=False),
+    sa.Column('estado', sa.Enum('PENDIENTE', 'EN_PROCESO', 'COMPLETADO', 'FALLIDO', name='estado_trabajo'), nullable=False),
+    sa.Column('payload_json', sa.Text(), nullable=False),
+    sa.Column('result_json', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('intentos', sa.Integer(), nullable=False),
+    sa.Column('max_intentos', sa.Integer(), nullable=False),
+    sa.Column('run_after', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_by', GUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_trabajos_estado_run_after', 'trabajos', ['estado', 'run_after'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_trabajos_estado_run_after', table_name='trabajos')
+    op.drop_table('trabajos')
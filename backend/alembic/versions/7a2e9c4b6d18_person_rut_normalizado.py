@@ -0,0 +1,45 @@
+"""normalized RUT column for indexed person lookups
+
+Revision ID: 7a2e9c4b6d18
+Revises: e4a7c3b91f02
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.rut import normalize_rut
+from app.core.types import GUID
+
+
+# revision identifiers, used by Alembic.
+revision = '7a2e9c4b6d18'
+down_revision = 'e4a7c3b91f02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('personas', sa.Column('rut_normalizado', sa.String(length=12), nullable=True))
+
+    personas = sa.table(
+        'personas',
+        sa.column('id', GUID()),
+        sa.column('rut', sa.String()),
+        sa.column('rut_normalizado', sa.String()),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(personas.c.id, personas.c.rut).where(personas.c.rut.is_not(None))).fetchall()
+    for person_id, rut in rows:
+        normalized = normalize_rut(rut)
+        if normalized and len(normalized) > 12:
+            # Unvalidated legacy text, not a RUT: would overflow the column.
+            normalized = None
+        bind.execute(personas.update().where(personas.c.id == person_id).values(rut_normalizado=normalized))
+
+    op.create_index('idx_personas_rut_normalizado', 'personas', ['rut_normalizado'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_personas_rut_normalizado', table_name='personas')
+    op.drop_column('personas', 'rut_normalizado')
@@ -0,0 +1,31 @@
+"""rebuild idx_propiedades_latlon as a GIST index
+
+Revision ID: 8c4f1d2e6b35
+Revises: 3b7e2c9d4a10
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4f1d2e6b35'
+down_revision = '3b7e2c9d4a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The init revision created a btree index, which PostGIS cannot use for
+    # ST_Intersects/&& lookups. SQLite stores latlon as text and keeps the btree.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('idx_propiedades_latlon', table_name='propiedades')
+    op.create_index('idx_propiedades_latlon', 'propiedades', ['latlon'], unique=False, postgresql_using='gist')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('idx_propiedades_latlon', table_name='propiedades')
+    op.create_index('idx_propiedades_latlon', 'propiedades', ['latlon'], unique=False)
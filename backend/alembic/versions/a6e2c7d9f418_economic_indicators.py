@@ -0,0 +1,31 @@
+"""UF/IPC series for rent readjustment
+
+Revision ID: a6e2c7d9f418
+Revises: f3c8a5d2e1b7
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6e2c7d9f418'
+down_revision = 'f3c8a5d2e1b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('indicadores_economicos',
+    sa.Column('tipo', sa.Enum('UF', 'IPC', name='tipo_indicador'), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('valor', sa.Numeric(precision=14, scale=4), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('tipo', 'fecha')
+    )
+
+
+def downgrade():
+    op.drop_table('indicadores_economicos')
@@ -0,0 +1,38 @@
+"""commit-ordered map version counter
+
+Revision ID: a9d4e2c7f135
+Revises: e2a7c4f9b813
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e2c7f135'
+down_revision = 'e2a7c4f9b813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('mapa_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Existing log ids become versions, so clients keep their ?since= position.
+    op.add_column('mapa_cambios', sa.Column('version', sa.BigInteger(), nullable=True))
+    op.execute("UPDATE mapa_cambios SET version = id")
+    op.execute("INSERT INTO mapa_version (id, version) SELECT 1, COALESCE(MAX(id), 0) FROM mapa_cambios")
+    with op.batch_alter_table('mapa_cambios') as batch_op:
+        batch_op.alter_column('version', existing_type=sa.BigInteger(), nullable=False)
+    op.create_index(op.f('ix_mapa_cambios_version'), 'mapa_cambios', ['version'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_mapa_cambios_version'), table_name='mapa_cambios')
+    with op.batch_alter_table('mapa_cambios') as batch_op:
+        batch_op.drop_column('version')
+    op.drop_table('mapa_version')
@@ -0,0 +1,61 @@
+"""unique normalized RUT
+
+Revision ID: b5e8d2a4c716
+Revises: a9d4e2c7f135
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.rut import normalize_rut
+from app.core.types import GUID
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e8d2a4c716'
+down_revision = 'a9d4e2c7f135'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def upgrade():
+    personas = sa.table(
+        'personas',
+        sa.column('id', GUID()),
+        sa.column('rut', sa.String()),
+        sa.column('rut_normalizado', sa.String()),
+        sa.column('created_at', sa.DateTime(timezone=True)),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(personas.c.id, personas.c.rut, personas.c.rut_normalizado)
+        .where(personas.c.rut.is_not(None))
+        .order_by(personas.c.created_at, personas.c.id)
+    ).fetchall()
+    # The oldest person keeps a duplicated RUT in the lookup column (as lookups already resolved it);
+    # later duplicates keep their ``rut`` text but drop out of the unique index.
+    seen: set[str] = set()
+    for person_id, rut, current in rows:
+        normalized = normalize_rut(rut)
+        if normalized and len(normalized) > 12:
+            normalized = None
+        if normalized in seen:
+            logger.warning("personas %s: RUT %s duplicated, left out of rut_normalizado", person_id, normalized)
+            normalized = None
+        elif normalized:
+            seen.add(normalized)
+        if normalized != current:
+            bind.execute(personas.update().where(personas.c.id == person_id).values(rut_normalizado=normalized))
+
+    op.drop_index('idx_personas_rut_normalizado', table_name='personas')
+    op.create_index('idx_personas_rut_normalizado', 'personas', ['rut_normalizado'], unique=True)
+
+
+def downgrade():
+    op.drop_index('idx_personas_rut_normalizado', table_name='personas')
+    op.create_index('idx_personas_rut_normalizado', 'personas', ['rut_normalizado'], unique=False)
@@ -0,0 +1,39 @@
+"""extraction cache for PDF text and AI results
+
+Revision ID: b9d4e1f3a276
+Revises: 7a2e9c4b6d18
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d4e1f3a276'
+down_revision = '7a2e9c4b6d18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cache_extracciones',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('tipo', sa.String(length=40), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('variant', sa.String(length=200), nullable=False),
+    sa.Column('value_json', sa.Text(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('idx_cache_extracciones_expires', 'cache_extracciones', ['expires_at'], unique=False)
+    op.create_index('idx_cache_extracciones_last_used', 'cache_extracciones', ['last_used_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_cache_extracciones_last_used', table_name='cache_extracciones')
+    op.drop_index('idx_cache_extracciones_expires', table_name='cache_extracciones')
+    op.drop_table('cache_extracciones')
@@ -0,0 +1,33 @@
+"""map change log for versioned GeoJSON feed
+
+Revision ID: c2a9e7f14d58
+Revises: 8c4f1d2e6b35
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from app.core.types import GUID
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2a9e7f14d58'
+down_revision = '8c4f1d2e6b35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('mapa_cambios',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+    sa.Column('propiedad_id', GUID(), nullable=True),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_mapa_cambios_propiedad_id'), 'mapa_cambios', ['propiedad_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_mapa_cambios_propiedad_id'), table_name='mapa_cambios')
+    op.drop_table('mapa_cambios')
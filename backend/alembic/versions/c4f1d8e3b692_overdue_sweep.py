@@ -0,0 +1,56 @@
+"""overdue sweep runs and charge transitions
+
+Revision ID: c4f1d8e3b692
+Revises: a6e2c7d9f418
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.types import GUID
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f1d8e3b692'
+down_revision = 'a6e2c7d9f418'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('barridos_mora',
+    sa.Column('id', GUID(), nullable=False),
+    sa.Column('fecha_corte', sa.Date(), nullable=False),
+    sa.Column('dias_gracia', sa.Integer(), nullable=False),
+    sa.Column('tasa_mensual_pct', sa.Numeric(precision=6, scale=3), nullable=False),
+    sa.Column('marcadas', sa.Integer(), nullable=False),
+    sa.Column('actualizadas', sa.Integer(), nullable=False),
+    sa.Column('mora_total', sa.Numeric(precision=16, scale=2), nullable=True),
+    sa.Column('job_id', GUID(), nullable=True),
+    sa.Column('created_by', GUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_barridos_mora_fecha_corte', 'barridos_mora', ['fecha_corte'], unique=False)
+    op.create_table('mora_historial',
+    sa.Column('id', GUID(), nullable=False),
+    sa.Column('barrido_id', GUID(), nullable=False),
+    sa.Column('cobranza_id', GUID(), nullable=False),
+    sa.Column('estado_anterior', sa.String(length=20), nullable=False),
+    sa.Column('estado_nuevo', sa.String(length=20), nullable=False),
+    sa.Column('mora_anterior', sa.Numeric(precision=14, scale=2), nullable=True),
+    sa.Column('mora_nueva', sa.Numeric(precision=14, scale=2), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['barrido_id'], ['barridos_mora.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['cobranza_id'], ['cobranzas.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_mora_historial_cobranza', 'mora_historial', ['cobranza_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_mora_historial_cobranza', table_name='mora_historial')
+    op.drop_table('mora_historial')
+    op.drop_index('idx_barridos_mora_fecha_corte', table_name='barridos_mora')
+    op.drop_table('barridos_mora')
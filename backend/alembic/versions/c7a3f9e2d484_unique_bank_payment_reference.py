@@ -0,0 +1,64 @@
+"""unique bank statement payment references
+
+Revision ID: c7a3f9e2d484
+Revises: b5e8d2a4c716
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.types import GUID
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a3f9e2d484'
+down_revision = 'b5e8d2a4c716'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+BANK_REFERENCE = "referencia LIKE 'banco:%'"
+
+
+def upgrade():
+    pagos = sa.table(
+        'pagos_detalle',
+        sa.column('id', GUID()),
+        sa.column('referencia', sa.String()),
+        sa.column('created_at', sa.DateTime(timezone=True)),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(pagos.c.id, pagos.c.referencia)
+        .where(pagos.c.referencia.like('banco:%'))
+        .order_by(pagos.c.created_at, pagos.c.id)
+    ).fetchall()
+    # Lines posted twice by concurrent uploads: the first payment keeps the reference, later ones are
+    # renamed (and logged) so they can be reviewed and reversed by hand.
+    seen: dict[str, int] = {}
+    for payment_id, referencia in rows:
+        count = seen[referencia] = seen.get(referencia, 0) + 1
+        if count == 1:
+            continue
+        renamed = f"{referencia[:190]} dup{count}"
+        logger.warning(
+            "pagos_detalle %s: reference %s posted more than once, renamed to %s", payment_id, referencia, renamed
+        )
+        bind.execute(pagos.update().where(pagos.c.id == payment_id).values(referencia=renamed))
+
+    op.create_index(
+        'uq_pagos_detalle_referencia_banco',
+        'pagos_detalle',
+        ['referencia'],
+        unique=True,
+        postgresql_where=sa.text(BANK_REFERENCE),
+        sqlite_where=sa.text(BANK_REFERENCE),
+    )
+
+
+def downgrade():
+    op.drop_index('uq_pagos_detalle_referencia_banco', table_name='pagos_detalle')
@@ -0,0 +1,28 @@
+"""map change versions stamped at commit
+
+Revision ID: d4b9e1f7a528
+Revises: c7a3f9e2d484
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b9e1f7a528'
+down_revision = 'c7a3f9e2d484'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows are written without a version and stamped right before their transaction commits.
+    with op.batch_alter_table('mapa_cambios') as batch_op:
+        batch_op.alter_column('version', existing_type=sa.BigInteger(), nullable=True)
+
+
+def downgrade():
+    op.execute("DELETE FROM mapa_cambios WHERE version IS NULL")
+    with op.batch_alter_table('mapa_cambios') as batch_op:
+        batch_op.alter_column('version', existing_type=sa.BigInteger(), nullable=False)
@@ -0,0 +1,29 @@
+"""materialized paid total on charges
+
+Revision ID: d8b3f6a1c945
+Revises: c4f1d8e3b692
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8b3f6a1c945'
+down_revision = 'c4f1d8e3b692'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('cobranzas', sa.Column('monto_pagado_total', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE cobranzas SET monto_pagado_total = ("
+        "SELECT COALESCE(SUM(pagos_detalle.monto_pagado), 0) FROM pagos_detalle "
+        "WHERE pagos_detalle.cobranza_id = cobranzas.id)"
+    )
+
+
+def downgrade():
+    op.drop_column('cobranzas', 'monto_pagado_total')
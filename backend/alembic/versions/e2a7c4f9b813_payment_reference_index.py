@@ -0,0 +1,23 @@
+"""index payments by reference for bank reconciliation
+
+Revision ID: e2a7c4f9b813
+Revises: d8b3f6a1c945
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7c4f9b813'
+down_revision = 'd8b3f6a1c945'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_pagos_detalle_referencia', 'pagos_detalle', ['referencia'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_pagos_detalle_referencia', table_name='pagos_detalle')
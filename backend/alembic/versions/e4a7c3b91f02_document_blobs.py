@@ -0,0 +1,31 @@
+"""content-addressed document blobs
+
+Revision ID: e4a7c3b91f02
+Revises: 5d1b8f0a7c23
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7c3b91f02'
+down_revision = '5d1b8f0a7c23'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('documento_blobs',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('storage_path', sa.String(length=500), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('hash')
+    )
+
+
+def downgrade():
+    op.drop_table('documento_blobs')
@@ -0,0 +1,47 @@
+"""scheduled tasks and one charge per contract and period
+
+Revision ID: f3c8a5d2e1b7
+Revises: b9d4e1f3a276
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.types import GUID
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8a5d2e1b7'
+down_revision = 'b9d4e1f3a276'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tareas_programadas',
+    sa.Column('nombre', sa.String(length=80), nullable=False),
+    sa.Column('next_run_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_run_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_job_id', GUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('nombre')
+    )
+
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text(
+        'SELECT COUNT(*) FROM (SELECT contrato_id, periodo FROM cobranzas '
+        'GROUP BY contrato_id, periodo HAVING COUNT(*) > 1) AS d'
+    )).scalar()
+    if duplicates:
+        # Merging charges would also mean merging their payments: leave that to a person.
+        raise RuntimeError(
+            f'{duplicates} (contrato_id, periodo) pairs have more than one charge in cobranzas; '
+            'merge them before applying this migration'
+        )
+    op.create_index('uq_cobranzas_contrato_periodo', 'cobranzas', ['contrato_id', 'periodo'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_cobranzas_contrato_periodo', table_name='cobranzas')
+    op.drop_table('tareas_programadas')
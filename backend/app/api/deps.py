@@ -1,26 +1,44 @@
+from typing import AsyncIterator
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from app.core.security import decode_token
 from app.db.session import get_session
 from app.models.user import User, UserRole
+from app.services.principals import load_principal
+from app.services.replica import read_sessionmaker, tag_session
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_session)) -> User:
-    payload = decode_token(token)
+    return await authenticate_token(token, session)
+
+
+async def authenticate_token(token: str | None, session: AsyncSession) -> User:
+    """Resolve a bearer token to an active user (also used by SSE/WebSocket, which pass it as ?token=).
+
+    The user is a cached snapshot detached from ``session``; load it again to modify it.
+    """
+    payload = decode_token(token) if token else None
     if not payload or not payload.sub:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = await session.get(User, payload.sub)
+    user = await load_principal(session, payload.sub)
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive or not found")
+    tag_session(session, user.id)
     return user
 
 
+async def get_read_session(current_user: User = Depends(get_current_user)) -> AsyncIterator[AsyncSession]:
+    """Session for read-only routes: the replica, or the primary right after this user wrote."""
+    async with read_sessionmaker(current_user.id)() as session:
+        yield session
+
+
 def require_roles(*roles: UserRole):
     async def checker(current_user: User = Depends(get_current_user)) -> User:
         if roles and current_user.role not in roles:
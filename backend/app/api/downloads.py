@@ -0,0 +1,104 @@
+"""File download responses on top of a storage driver.
+
+Supports conditional requests (``If-None-Match`` / ``If-Modified-Since`` ->
+304), single byte ranges (``Range`` / ``If-Range`` -> 206, 416 when
+unsatisfiable) and, when enabled and supported by the driver, a redirect to a
+presigned URL so the bytes never go through the API worker. Bodies are
+streamed from the driver in chunks.
+"""
+
+import mimetypes
+import re
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+
+from app.core.config import settings
+from app.services.storage_drivers import BlobStat, content_disposition
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _not_modified(request: Request, etag: str, stat: BlobStat) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(stat.last_modified.timestamp()) <= int(since.timestamp())
+    return False
+
+
+def _byte_range(request: Request, etag: str, last_modified: str, size: int) -> tuple[int, int] | None:
+    """Requested (start, end) inclusive, or None to send the whole file."""
+    raw = request.headers.get("range")
+    if not raw or size == 0:
+        return None
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() not in (etag, last_modified):
+        return None
+    match = _RANGE_RE.match(raw.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        # Multiple or malformed ranges: serve the full body.
+        return None
+    first, last = match.groups()
+    if first == "":
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+async def blob_response(request: Request, driver, key: str, filename: str, etag: str | None = None) -> Response:
+    """Serve ``key`` from ``driver``; ``etag`` overrides the driver's (e.g. the content hash)."""
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    if settings.storage_presigned_downloads:
+        url = await driver.presigned_url(key, filename, media_type)
+        if url:
+            return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    stat = await driver.stat(key)
+    if stat is None:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="File missing; reemplace o cargue nuevamente")
+
+    quoted_etag = f'"{etag or stat.etag}"'
+    last_modified = formatdate(stat.last_modified.timestamp(), usegmt=True)
+    headers = {
+        "ETag": quoted_etag,
+        "Last-Modified": last_modified,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": content_disposition(filename),
+    }
+    if _not_modified(request, quoted_etag, stat):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if stat.size == 0:
+        return Response(content=b"", media_type=media_type, headers=headers)
+
+    byte_range = _byte_range(request, quoted_etag, last_modified, stat.size)
+    if byte_range is None:
+        start, end, status_code = 0, stat.size - 1, status.HTTP_200_OK
+    else:
+        (start, end), status_code = byte_range, status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        driver.iter_range(key, start, end), status_code=status_code, media_type=media_type, headers=headers
+    )
@@ -0,0 +1,76 @@
+"""Keyset (cursor) pagination on ``(created_at, id)`` for list endpoints.
+
+List endpoints keep returning a plain JSON array; the cursor for the next page
+travels in the ``X-Next-Cursor`` response header (absent on the last page).
+The legacy unbounded listing is only available with ``?all=true``.
+"""
+
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_raw, id_raw = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(created_raw), UUID(id_raw)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+@dataclass
+class PageParams:
+    cursor: str | None
+    limit: int
+    unpaginated: bool
+
+
+def page_params(
+    cursor: str | None = Query(default=None, description="Valor de X-Next-Cursor de la pagina anterior"),
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    unpaginated: bool = Query(default=False, alias="all", description="Devuelve todas las filas sin paginar"),
+) -> PageParams:
+    return PageParams(cursor=cursor, limit=limit, unpaginated=unpaginated)
+
+
+async def fetch_page(
+    session: AsyncSession,
+    stmt: Select,
+    model: Any,
+    params: PageParams,
+    response: Response,
+) -> list:
+    """Run ``stmt`` newest-first, one keyset page at a time (or unbounded if opted in)."""
+    stmt = stmt.order_by(model.created_at.desc(), model.id.desc())
+    if params.unpaginated:
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+    if params.cursor:
+        created_at, row_id = decode_cursor(params.cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) < (created_at, row_id))
+
+    result = await session.execute(stmt.limit(params.limit + 1))
+    rows = list(result.scalars().all())
+    if len(rows) > params.limit:
+        rows = rows[: params.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return rows
@@ -1,6 +1,20 @@
 from fastapi import APIRouter
 
-from app.api.routes import auth, charges, contracts, persons, properties, documents
+from app.api.routes import (
+    auth,
+    charges,
+    contracts,
+    dashboard,
+    documents,
+    exports,
+    imports,
+    indicators,
+    jobs,
+    mapa,
+    persons,
+    properties,
+    reconciliation,
+)
 
 api_router = APIRouter()
 api_router.include_router(auth.router)
@@ -9,3 +23,10 @@ api_router.include_router(persons.router)
 api_router.include_router(contracts.router)
 api_router.include_router(charges.router)
 api_router.include_router(documents.router)
+api_router.include_router(dashboard.router)
+api_router.include_router(mapa.router)
+api_router.include_router(jobs.router)
+api_router.include_router(imports.router)
+api_router.include_router(exports.router)
+api_router.include_router(indicators.router)
+api_router.include_router(reconciliation.router)
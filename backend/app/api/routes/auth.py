@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from google.auth.transport import requests as grequests
 from google.oauth2 import id_token as google_id_token
 
+from app.core.executors import run_cpu, run_io
 from app.core.security import create_access_token, verify_password, get_password_hash
 from app.db.session import get_session
 from app.models.user import User, UserRole
@@ -32,7 +33,7 @@ async def signup(payload: UserCreate, session: AsyncSession = Depends(get_sessio
         email=payload.email,
         full_name=payload.full_name,
         role=payload.role,
-        hashed_password=get_password_hash(payload.password),
+        hashed_password=await run_cpu(get_password_hash, payload.password),
     )
     session.add(user)
     await session.commit()
@@ -45,7 +46,7 @@ async def login(
     form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_session)
 ) -> Token:
     user = await _get_user_by_email(session, form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await run_cpu(verify_password, form_data.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
@@ -60,7 +61,9 @@ async def login_google(payload: GoogleLoginRequest, session: AsyncSession = Depe
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Google auth no configurado")
 
     try:
-        id_info = google_id_token.verify_oauth2_token(
+        # Fetches Google's certs over HTTP (cached by google-auth): keep it off the loop.
+        id_info = await run_io(
+            google_id_token.verify_oauth2_token,
             payload.id_token,
             grequests.Request(),
             settings.google_client_id,
@@ -82,7 +85,7 @@ async def login_google(payload: GoogleLoginRequest, session: AsyncSession = Depe
             email=email,
             full_name=full_name,
             role=UserRole.CORREDOR,
-            hashed_password=get_password_hash(str(uuid.uuid4())),
+            hashed_password=await run_cpu(get_password_hash, str(uuid.uuid4())),
             is_active=True,
         )
         session.add(user)
@@ -1,19 +1,39 @@
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from typing import Sequence
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.db.session import get_session
 from app.models.charge import Charge, ChargeState, PaymentDetail
 from app.models.contract import LeaseContract
-from app.schemas.charge import ChargeCreate, ChargeRead, PaymentCreate, PaymentRead
-from app.api.deps import get_current_user, require_roles
+from app.schemas.charge import (
+    ChargeCreate,
+    ChargeGenerationRequest,
+    ChargeGenerationResult,
+    ChargeRead,
+    OverdueSweepRead,
+    ChargeBalance,
+    PaymentBulkCreate,
+    PaymentBulkResult,
+    PaymentCreate,
+    PaymentRead,
+)
+from app.schemas.indicator import ReadjustmentRequest, ReadjustmentResult
+from app.api.deps import get_current_user, get_read_session, require_roles
+from app.api.pagination import PageParams, fetch_page, page_params
 from app.models.user import User, UserRole
-from app.services.ai_extract import extract_payment_from_image
+from app.services.broker import publish
+from app.services.charge_generation import generate_charges, month_range
+from app.services.document_processing import extract_receipt
+from app.services.overdue import sweep_overdue
+from app.services.payments import PaymentError, PaymentInput, apply_payment, apply_payments, charge_target
+from app.services.readjustment import recompute_adjustments
 
 router = APIRouter(prefix="/charges", tags=["charges"])
 
@@ -34,15 +54,31 @@ async def _get_charge_or_404(charge_id: UUID, session: AsyncSession) -> Charge:
 
 @router.get("", response_model=list[ChargeRead])
 async def list_charges(
+    response: Response,
     contract_id: UUID | None = Query(default=None),
-    session: AsyncSession = Depends(get_session),
+    estado: ChargeState | None = Query(default=None),
+    due_from: date | None = Query(default=None),
+    due_to: date | None = Query(default=None),
+    periodo_from: date | None = Query(default=None),
+    periodo_to: date | None = Query(default=None),
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
 ) -> list[ChargeRead]:
-    stmt = select(Charge).order_by(Charge.fecha_vencimiento.desc())
+    stmt = select(Charge)
     if contract_id:
         stmt = stmt.where(Charge.contrato_id == contract_id)
-    result = await session.execute(stmt)
-    rows: Sequence[Charge] = result.scalars().all()
+    if estado:
+        stmt = stmt.where(Charge.estado == estado)
+    if due_from:
+        stmt = stmt.where(Charge.fecha_vencimiento >= due_from)
+    if due_to:
+        stmt = stmt.where(Charge.fecha_vencimiento <= due_to)
+    if periodo_from:
+        stmt = stmt.where(Charge.periodo >= periodo_from)
+    if periodo_to:
+        stmt = stmt.where(Charge.periodo <= periodo_to)
+    rows: Sequence[Charge] = await fetch_page(session, stmt, Charge, page, response)
     return list(rows)
 
 
@@ -53,53 +89,92 @@ async def create_charge(
     current_user: User = Depends(require_roles(UserRole.ADMIN, UserRole.FINANZAS)),
 ) -> ChargeRead:
     await _get_contract_or_404(payload.contrato_id, session)
+    duplicate = await session.execute(
+        select(Charge.id).where(Charge.contrato_id == payload.contrato_id, Charge.periodo == payload.periodo)
+    )
+    if duplicate.first():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ya existe una cobranza para ese periodo")
     charge = Charge(**payload.model_dump())
     session.add(charge)
     await session.commit()
     await session.refresh(charge)
+    await publish("charge.created", id=charge.id, contrato_id=charge.contrato_id, estado=charge.estado)
     return charge
 
 
-@router.post("/{charge_id}/pay", response_model=PaymentRead, status_code=status.HTTP_201_CREATED)
-async def pay_charge(
-    charge_id: UUID,
-    payload: PaymentCreate,
+@router.post("/generate", response_model=ChargeGenerationResult)
+async def generate_monthly_charges(
+    payload: ChargeGenerationRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(require_roles(UserRole.ADMIN)),
+) -> ChargeGenerationResult:
+    """Create the missing monthly charges of VIGENTE contracts for a range of months (idempotent)."""
+    if payload.periodo_hasta < payload.periodo_desde:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="periodo_hasta anterior a periodo_desde")
+    if len(month_range(payload.periodo_desde, payload.periodo_hasta)) > settings.charges_generation_max_months:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Rango de periodos demasiado amplio")
+    created = await generate_charges(session, payload.periodo_desde, payload.periodo_hasta, payload.contrato_ids)
+    await session.commit()
+    if created:
+        await publish(
+            "charges.generated", periodo_desde=payload.periodo_desde, periodo_hasta=payload.periodo_hasta, creadas=created
+        )
+    return ChargeGenerationResult(periodo_desde=payload.periodo_desde, periodo_hasta=payload.periodo_hasta, creadas=created)
+
+
+@router.post("/overdue-sweep", response_model=OverdueSweepRead)
+async def run_overdue_sweep(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_roles(UserRole.ADMIN, UserRole.FINANZAS)),
-) -> PaymentRead:
-    charge = await _get_charge_or_404(charge_id, session)
+) -> OverdueSweepRead:
+    """Mark overdue charges and refresh their late fees now (the sweep also runs daily)."""
+    run = await sweep_overdue(session, created_by=current_user.id)
+    await session.commit()
+    if run.actualizadas:
+        await publish("charges.overdue_swept", barrido_id=run.id, marcadas=run.marcadas, actualizadas=run.actualizadas)
+    return run
 
-    payment = PaymentDetail(
-        cobranza_id=charge.id,
-        monto_pagado=payload.monto_pagado,
-        fecha_pago=payload.fecha_pago or charge.fecha_vencimiento,
-        medio_pago=payload.medio_pago,
-        referencia=payload.referencia,
-    )
-    session.add(payment)
-    await session.flush()
 
-    total_pagado_result = await session.execute(
-        select(func.coalesce(func.sum(PaymentDetail.monto_pagado), 0)).where(
-            PaymentDetail.cobranza_id == charge.id
-        )
-    )
-    total_pagado: Decimal = total_pagado_result.scalar() or Decimal("0")
-    monto_objetivo = charge.monto_ajustado or charge.monto_original
+@router.post("/readjust", response_model=ReadjustmentResult)
+async def readjust_charges(
+    payload: ReadjustmentRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(require_roles(UserRole.ADMIN, UserRole.FINANZAS)),
+) -> ReadjustmentResult:
+    """Recompute ``monto_ajustado`` of open charges from the contract terms and the loaded UF/IPC values."""
+    outcome = await recompute_adjustments(session, contract_ids=payload.contrato_ids, since=payload.desde)
+    await session.commit()
+    if outcome.actualizadas:
+        await publish("charges.readjusted", desde=payload.desde, actualizadas=outcome.actualizadas)
+    return outcome
 
-    if total_pagado >= monto_objetivo:
-        charge.estado = ChargeState.PAGADO
-        charge.fecha_pago = payment.fecha_pago
-    elif total_pagado > 0:
-        charge.estado = ChargeState.PARCIAL
-    else:
-        charge.estado = ChargeState.PENDIENTE
 
+async def _commit_payment(session: AsyncSession, charge: Charge, payment: PaymentDetail) -> PaymentDetail:
     await session.commit()
     await session.refresh(payment)
+    await publish(
+        "payment.created",
+        id=payment.id,
+        cobranza_id=charge.id,
+        contrato_id=charge.contrato_id,
+        monto_pagado=payment.monto_pagado,
+        estado_cobranza=charge.estado,
+    )
     return payment
 
 
+@router.post("/{charge_id}/pay", response_model=PaymentRead, status_code=status.HTTP_201_CREATED)
+async def pay_charge(
+    charge_id: UUID,
+    payload: PaymentCreate,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(require_roles(UserRole.ADMIN, UserRole.FINANZAS)),
+) -> PaymentRead:
+    await _get_charge_or_404(charge_id, session)
+    charge, payment = await apply_payment(session, PaymentInput(cobranza_id=charge_id, **payload.model_dump()))
+    return await _commit_payment(session, charge, payment)
+
+
 @router.post("/{charge_id}/pay/ai", response_model=PaymentRead, status_code=status.HTTP_201_CREATED)
 async def pay_charge_from_receipt(
     charge_id: UUID,
@@ -110,7 +185,7 @@ async def pay_charge_from_receipt(
     charge = await _get_charge_or_404(charge_id, session)
 
     raw = await file.read()
-    parsed = extract_payment_from_image(raw, file.content_type)
+    parsed = await extract_receipt(raw, file.content_type)
     if not parsed:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No se pudo leer el comprobante")
 
@@ -127,32 +202,53 @@ async def pay_charge_from_receipt(
         except Exception:
             pay_date = charge.fecha_vencimiento
 
-    payment = PaymentDetail(
-        cobranza_id=charge.id,
-        monto_pagado=monto,
-        fecha_pago=pay_date,
-        medio_pago=parsed.get("medio_pago"),
-        referencia=parsed.get("referencia"),
+    charge, payment = await apply_payment(
+        session,
+        PaymentInput(
+            cobranza_id=charge.id,
+            monto_pagado=monto,
+            fecha_pago=pay_date,
+            medio_pago=parsed.get("medio_pago"),
+            referencia=parsed.get("referencia"),
+        ),
     )
-    session.add(payment)
-    await session.flush()
+    return await _commit_payment(session, charge, payment)
 
-    total_pagado_result = await session.execute(
-        select(func.coalesce(func.sum(PaymentDetail.monto_pagado), 0)).where(
-            PaymentDetail.cobranza_id == charge.id
-        )
-    )
-    total_pagado: Decimal = total_pagado_result.scalar() or Decimal("0")
-    monto_objetivo = charge.monto_ajustado or charge.monto_original
 
-    if total_pagado >= monto_objetivo:
-        charge.estado = ChargeState.PAGADO
-        charge.fecha_pago = payment.fecha_pago
-    elif total_pagado > 0:
-        charge.estado = ChargeState.PARCIAL
-    else:
-        charge.estado = ChargeState.PENDIENTE
+@router.post("/payments/bulk", response_model=PaymentBulkResult, status_code=status.HTTP_201_CREATED)
+async def apply_payments_bulk(
+    payload: PaymentBulkCreate,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(require_roles(UserRole.ADMIN, UserRole.FINANZAS)),
+) -> PaymentBulkResult:
+    """Post many payments in one transaction (all or nothing); each charge is locked and updated once."""
+    if not payload.pagos:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Sin pagos")
+    if len(payload.pagos) > settings.payments_bulk_max:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Demasiados pagos en una solicitud")
+    try:
+        posted = await apply_payments(session, [PaymentInput(**item.model_dump()) for item in payload.pagos])
+        await session.commit()
+    except PaymentError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    except IntegrityError as exc:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Referencia de pago bancaria ya registrada"
+        ) from exc
+    charges = {charge.id: charge for charge, _ in posted}
+    # One summary event: a NOTIFY per payment would flood the map streams.
+    await publish("payments.applied", aplicados=len(posted), cobranzas=len(charges))
+    return PaymentBulkResult(
+        aplicados=len(posted),
+        cobranzas=[
+            ChargeBalance(
+                id=charge.id,
+                estado=charge.estado,
+                monto_pagado_total=charge.monto_pagado_total,
+                saldo=charge_target(charge) - charge.monto_pagado_total,
+            )
+            for charge in charges.values()
+        ],
+    )
 
-    await session.commit()
-    await session.refresh(payment)
-    return payment
@@ -1,20 +1,27 @@
+from datetime import date, datetime
 from typing import Sequence
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_session
-from app.models.contract import LeaseContract
+from app.models.contract import ContractStatus, LeaseContract
 from app.models.property import Property
 from app.models.person import Person
 from app.schemas.contract import LeaseContractCreate, LeaseContractRead, LeaseContractUpdate
-from app.api.deps import get_current_user, require_roles
+from app.api.deps import get_current_user, get_read_session, require_roles
+from app.api.pagination import PageParams, fetch_page, page_params
 from app.models.user import User, UserRole
+from app.services.broker import publish
+from app.services.readjustment import recompute_adjustments
 
 router = APIRouter(prefix="/contracts", tags=["contracts"])
 
+# Terms that change the adjusted amount of the contract's open charges.
+READJUSTMENT_FIELDS = {"fecha_inicio", "moneda", "reajuste_tipo", "reajuste_periodo_meses", "reajuste_factor_inicial"}
+
 
 async def _assert_exists(session: AsyncSession, model, entity_id: UUID, not_found_msg: str) -> None:
     obj = await session.get(model, entity_id)
@@ -24,10 +31,31 @@ async def _assert_exists(session: AsyncSession, model, entity_id: UUID, not_foun
 
 @router.get("", response_model=list[LeaseContractRead])
 async def list_contracts(
-    session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)
+    response: Response,
+    estado: ContractStatus | None = Query(default=None),
+    property_id: UUID | None = Query(default=None),
+    ends_from: date | None = Query(default=None),
+    ends_to: date | None = Query(default=None),
+    created_from: datetime | None = Query(default=None),
+    created_to: datetime | None = Query(default=None),
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user),
 ) -> list[LeaseContractRead]:
-    result = await session.execute(select(LeaseContract).order_by(LeaseContract.created_at.desc()))
-    rows: Sequence[LeaseContract] = result.scalars().all()
+    stmt = select(LeaseContract)
+    if estado:
+        stmt = stmt.where(LeaseContract.estado == estado)
+    if property_id:
+        stmt = stmt.where(LeaseContract.propiedad_id == property_id)
+    if ends_from:
+        stmt = stmt.where(LeaseContract.fecha_fin >= ends_from)
+    if ends_to:
+        stmt = stmt.where(LeaseContract.fecha_fin <= ends_to)
+    if created_from:
+        stmt = stmt.where(LeaseContract.created_at >= created_from)
+    if created_to:
+        stmt = stmt.where(LeaseContract.created_at < created_to)
+    rows: Sequence[LeaseContract] = await fetch_page(session, stmt, LeaseContract, page, response)
     return list(rows)
 
 
@@ -45,6 +73,7 @@ async def create_contract(
     session.add(contract)
     await session.commit()
     await session.refresh(contract)
+    await publish("contract.created", id=contract.id, propiedad_id=contract.propiedad_id, estado=contract.estado)
     return contract
 
 
@@ -58,7 +87,7 @@ async def _get_contract_or_404(contract_id: UUID, session: AsyncSession) -> Leas
 @router.get("/{contract_id}", response_model=LeaseContractRead)
 async def get_contract(
     contract_id: UUID,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
 ) -> LeaseContractRead:
     contract = await _get_contract_or_404(contract_id, session)
@@ -86,6 +115,10 @@ async def update_contract(
     for field, value in data.items():
         setattr(contract, field, value)
 
+    if READJUSTMENT_FIELDS & data.keys():
+        await session.flush()
+        await recompute_adjustments(session, contract_ids=[contract.id])
     await session.commit()
     await session.refresh(contract)
+    await publish("contract.updated", id=contract.id, propiedad_id=contract.propiedad_id, estado=contract.estado)
     return contract
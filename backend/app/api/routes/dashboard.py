@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user
+from app.db.session import get_session
+from app.models.user import User
+from app.services.dashboard import get_summary
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+
+@router.get("/summary")
+async def dashboard_summary(
+    dias_vencimiento: int = Query(default=30, ge=1, le=365),
+    meses: int = Query(default=12, ge=1, le=60),
+    # Primary, not the replica: the summary is cached until the next write, and a commit clears the
+    # cache before the replica has it, so a replica refill would be stale for the whole TTL.
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+) -> dict:
+    """Ocupacion, mora, contratos por vencer y recaudado vs esperado por mes."""
+    return await get_summary(session, expiring_days=dias_vencimiento, months=meses)
@@ -0,0 +1,52 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import require_roles
+from app.core.clock import local_today
+from app.models.user import User, UserRole
+from app.services.export_formats import WRITERS, ExportFormatError
+from app.services.exports import DATASETS, ExportFilters, stream_export
+from app.services.replica import read_sessionmaker
+from app.services.storage_drivers import content_disposition
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = Query(default="csv", description="csv | ndjson | xlsx | parquet"),
+    periodo_from: date | None = Query(default=None),
+    periodo_to: date | None = Query(default=None),
+    comuna: str | None = Query(default=None),
+    estado: str | None = Query(default=None),
+    current_user: User = Depends(require_roles(UserRole.ADMIN, UserRole.CORREDOR, UserRole.FINANZAS)),
+) -> StreamingResponse:
+    """Stream `propiedades`, `contratos`, `cobranzas` or `pagos` as a file download.
+
+    Rows are read with a server-side cursor and encoded batch by batch, so the
+    response size is not limited by memory.
+    """
+    spec = DATASETS.get(dataset)
+    if spec is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dataset desconocido")
+    writer_cls = WRITERS.get(format)
+    if writer_cls is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Formato no soportado")
+    if estado and (spec.states is None or estado not in {s.value for s in spec.states}):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Estado invalido")
+    try:
+        # Fail before the response starts if an optional dependency is missing.
+        writer_cls(spec.header)
+    except ExportFormatError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    filters = ExportFilters(periodo_from=periodo_from, periodo_to=periodo_to, comuna=comuna, estado=estado)
+    filename = f"{dataset}-{local_today():%Y%m%d}.{writer_cls.extension}"
+    return StreamingResponse(
+        stream_export(dataset, format, filters, read_sessionmaker(current_user.id)),
+        media_type=writer_cls.media_type,
+        headers={"Content-Disposition": content_disposition(filename)},
+    )
@@ -0,0 +1,70 @@
+import uuid
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user
+from app.db.session import get_session
+from app.models.document import Document, DocumentCategory
+from app.models.user import User, UserRole
+from app.schemas.imports import ImportAccepted
+from app.services.bulk_import import COBRANZAS, ENTITIES, IMPORT_JOB
+from app.services.jobs import enqueue
+from app.services.storage import store_upload
+
+router = APIRouter(prefix="/imports", tags=["imports"])
+
+IMPORT_SUFFIXES = {".csv", ".txt", ".xlsx", ".xlsm"}
+# Same roles as the single-row create endpoints of each entity.
+IMPORT_ROLES = {COBRANZAS: {UserRole.ADMIN, UserRole.FINANZAS}}
+DEFAULT_IMPORT_ROLES = {UserRole.ADMIN, UserRole.CORREDOR}
+
+
+@router.post("/{entidad}", response_model=ImportAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def import_spreadsheet(
+    entidad: str,
+    file: UploadFile = File(...),
+    dry_run: bool = Form(False),
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+) -> ImportAccepted:
+    """Queue a CSV/XLSX import; the per-row report is the job result (``/jobs/{job_id}``)."""
+    if entidad not in ENTITIES:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Entidad desconocida")
+    if current_user.role not in IMPORT_ROLES.get(entidad, DEFAULT_IMPORT_ROLES):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role")
+    filename = file.filename or f"{entidad}.csv"
+    if Path(filename).suffix.lower() not in IMPORT_SUFFIXES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Formato no soportado; use .csv o .xlsx")
+
+    # The source file is kept as a legacy spreadsheet document, which is its own entity.
+    blob = await store_upload(session, file)
+    doc_id = uuid.uuid4()
+    session.add(
+        Document(
+            id=doc_id,
+            entidad_tipo="importacion",
+            entidad_id=doc_id,
+            categoria=DocumentCategory.EXCEL_HISTORICO.value,
+            filename=filename,
+            storage_path=blob.key,
+            version=1,
+            hash=blob.hash,
+            created_by=current_user.id,
+        )
+    )
+    job = enqueue(
+        session,
+        IMPORT_JOB,
+        {
+            "document_id": doc_id,
+            "storage_key": blob.key,
+            "filename": filename,
+            "entidad": entidad,
+            "dry_run": dry_run,
+        },
+        created_by=current_user.id,
+    )
+    await session.commit()
+    return ImportAccepted(job_id=job.id, document_id=doc_id, entidad=entidad, dry_run=dry_run)
@@ -0,0 +1,66 @@
+from datetime import date
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user, get_read_session, require_roles
+from app.core.clock import add_months, local_today, month_start
+from app.core.executors import run_io
+from app.db.session import get_session
+from app.models.indicator import EconomicIndicator, IndicatorType
+from app.models.user import User, UserRole
+from app.schemas.indicator import IndicatorImportReport, IndicatorRead
+from app.services.bulk_import import ImportFormatError
+from app.services.indicators import load_indicator_file
+from app.services.jobs import enqueue
+from app.services.readjustment import READJUSTMENT_JOB
+from app.services.storage import spool_to_temp
+
+router = APIRouter(prefix="/indicators", tags=["indicators"])
+
+INDICATOR_SUFFIXES = {".csv", ".txt", ".xlsx", ".xlsm"}
+
+
+@router.get("/{tipo}", response_model=list[IndicatorRead])
+async def list_indicators(
+    tipo: IndicatorType,
+    desde: date | None = Query(default=None),
+    hasta: date | None = Query(default=None),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user),
+) -> list[IndicatorRead]:
+    """Values between ``desde`` (default: twelve months ago) and ``hasta``."""
+    desde = desde or add_months(month_start(local_today()), -12)
+    stmt = select(EconomicIndicator).where(EconomicIndicator.tipo == tipo, EconomicIndicator.fecha >= desde)
+    if hasta:
+        stmt = stmt.where(EconomicIndicator.fecha <= hasta)
+    result = await session.execute(stmt.order_by(EconomicIndicator.fecha))
+    return result.scalars().all()
+
+
+@router.post("/{tipo}/import", response_model=IndicatorImportReport)
+async def import_indicators(
+    tipo: IndicatorType,
+    file: UploadFile = File(...),
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(require_roles(UserRole.ADMIN, UserRole.FINANZAS)),
+) -> IndicatorImportReport:
+    """Load a UF/IPC file (columns ``fecha``, ``valor``) and queue the readjustment of the affected charges."""
+    filename = file.filename or f"{tipo.value}.csv"
+    if Path(filename).suffix.lower() not in INDICATOR_SUFFIXES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Formato no soportado; use .csv o .xlsx")
+    path = await spool_to_temp(file)
+    try:
+        report = await load_indicator_file(session, tipo, path, filename)
+    except ImportFormatError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    finally:
+        await run_io(path.unlink, missing_ok=True)
+
+    if report.cambios_desde:
+        job = enqueue(session, READJUSTMENT_JOB, {"desde": report.cambios_desde}, created_by=current_user.id)
+        await session.commit()
+        report.job_id = job.id
+    return report
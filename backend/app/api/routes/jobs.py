@@ -0,0 +1,26 @@
+import json
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_session
+from app.models.job import Job
+from app.schemas.job import JobRead
+from app.api.deps import get_current_user
+from app.models.user import User, UserRole
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}", response_model=JobRead)
+async def get_job(
+    job_id: UUID,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+) -> JobRead:
+    job = await session.get(Job, job_id)
+    if not job or (job.created_by != current_user.id and current_user.role != UserRole.ADMIN):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    result = json.loads(job.result_json) if job.result_json else None
+    return JobRead.model_validate(job).model_copy(update={"result": result})
@@ -0,0 +1,72 @@
+import asyncio
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import authenticate_token
+from app.db.session import AsyncSessionLocal, get_session
+from app.services.broker import Event, Subscription, broker
+
+router = APIRouter(prefix="/mapa", tags=["mapa"])
+
+optional_oauth2 = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
+
+HEARTBEAT_SECONDS = 15.0
+WS_SEND_TIMEOUT_SECONDS = 10.0
+
+
+def _sse(event: Event) -> bytes:
+    return f"id: {event.id}\nevent: {event.type}\ndata: {event.to_json()}\n\n".encode()
+
+
+async def _sse_stream(request: Request, sub: Subscription) -> AsyncIterator[bytes]:
+    try:
+        yield b"retry: 5000\n\n"
+        while not await request.is_disconnected():
+            event = await sub.get(timeout=HEARTBEAT_SECONDS)
+            yield _sse(event) if event else b": ping\n\n"
+    finally:
+        broker.unsubscribe(sub)
+
+
+@router.get("/stream")
+async def map_stream(
+    request: Request,
+    token: str | None = Query(default=None, description="JWT; EventSource no permite headers"),
+    header_token: str | None = Depends(optional_oauth2),
+    session: AsyncSession = Depends(get_session),
+) -> StreamingResponse:
+    """Server-Sent Events con cambios de propiedades, contratos y pagos."""
+    await authenticate_token(header_token or token, session)
+    sub = broker.subscribe()
+    return StreamingResponse(
+        _sse_stream(request, sub),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def map_ws(websocket: WebSocket, token: str | None = Query(default=None)) -> None:
+    async with AsyncSessionLocal() as session:
+        try:
+            await authenticate_token(token, session)
+        except HTTPException:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+    await websocket.accept()
+    sub = broker.subscribe()
+    try:
+        while True:
+            event = await sub.get(timeout=HEARTBEAT_SECONDS)
+            message = event.to_json() if event else '{"type": "ping"}'
+            # A client that cannot drain its socket is disconnected rather than buffered.
+            await asyncio.wait_for(websocket.send_text(message), WS_SEND_TIMEOUT_SECONDS)
+    except (WebSocketDisconnect, asyncio.TimeoutError):
+        pass
+    finally:
+        broker.unsubscribe(sub)
@@ -1,25 +1,45 @@
+from datetime import datetime
 from typing import Sequence
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.rut import normalize_rut
 from app.db.session import get_session
-from app.models.person import Person
+from app.models.person import Person, PersonType
 from app.schemas.person import PersonCreate, PersonRead, PersonUpdate
-from app.api.deps import get_current_user, require_roles
+from app.api.deps import get_current_user, get_read_session, require_roles
+from app.api.pagination import PageParams, fetch_page, page_params
 from app.models.user import User, UserRole
+from app.services.persons import find_person_by_rut
 
 router = APIRouter(prefix="/persons", tags=["persons"])
 
 
 @router.get("", response_model=list[PersonRead])
 async def list_persons(
-    session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)
+    response: Response,
+    tipo: PersonType | None = Query(default=None),
+    rut: str | None = Query(default=None, description="Cualquier formato (con o sin puntos/guion)"),
+    created_from: datetime | None = Query(default=None),
+    created_to: datetime | None = Query(default=None),
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user),
 ) -> list[PersonRead]:
-    result = await session.execute(select(Person).order_by(Person.created_at.desc()))
-    rows: Sequence[Person] = result.scalars().all()
+    stmt = select(Person)
+    if tipo:
+        stmt = stmt.where(Person.tipo == tipo)
+    if rut:
+        stmt = stmt.where(Person.rut_normalizado == normalize_rut(rut))
+    if created_from:
+        stmt = stmt.where(Person.created_at >= created_from)
+    if created_to:
+        stmt = stmt.where(Person.created_at < created_to)
+    rows: Sequence[Person] = await fetch_page(session, stmt, Person, page, response)
     return list(rows)
 
 
@@ -29,13 +49,29 @@ async def create_person(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(require_roles(UserRole.ADMIN, UserRole.CORREDOR)),
 ) -> PersonRead:
+    await _ensure_rut_available(session, payload.rut)
     person = Person(**payload.model_dump())
     session.add(person)
-    await session.commit()
+    await _commit_person(session)
     await session.refresh(person)
     return person
 
 
+async def _ensure_rut_available(session: AsyncSession, rut: str | None, person_id: UUID | None = None) -> None:
+    existing = await find_person_by_rut(session, rut)
+    if existing and existing.id != person_id:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="RUT ya registrado")
+
+
+async def _commit_person(session: AsyncSession) -> None:
+    """Commit, mapping a concurrent insert of the same RUT (unique index) to 409."""
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="RUT ya registrado")
+
+
 async def _get_person_or_404(person_id: UUID, session: AsyncSession) -> Person:
     person = await session.get(Person, person_id)
     if not person:
@@ -46,7 +82,7 @@ async def _get_person_or_404(person_id: UUID, session: AsyncSession) -> Person:
 @router.get("/{person_id}", response_model=PersonRead)
 async def get_person(
     person_id: UUID,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
 ) -> PersonRead:
     person = await _get_person_or_404(person_id, session)
@@ -62,8 +98,10 @@ async def update_person(
 ) -> PersonRead:
     person = await _get_person_or_404(person_id, session)
     data = payload.model_dump(exclude_unset=True)
+    if data.get("rut"):
+        await _ensure_rut_available(session, data["rut"], person.id)
     for field, value in data.items():
         setattr(person, field, value)
-    await session.commit()
+    await _commit_person(session)
     await session.refresh(person)
     return person
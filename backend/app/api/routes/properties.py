@@ -1,32 +1,56 @@
-from datetime import date
-from typing import Sequence
+from datetime import datetime
+from typing import AsyncIterator, Sequence
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.core.clock import local_today
+from app.core.config import settings
+from app.core.responses import ORJSONResponse, dumps
 from app.db.session import get_session
-from app.models.contract import ContractStatus, LeaseContract
-from app.models.document import Document
-from app.models.person import Person
-from app.models.property import Property
-from app.models.property_state import PropertyStateHistory
-from app.models.charge import Charge, PaymentDetail
-from app.schemas.property import PropertyCreate, PropertyRead, PropertyUpdate
-from app.api.deps import get_current_user, require_roles
+from app.models.property import Property, PropertyState, PropertyType
+from app.schemas.property import PropertyCreate, PropertyFullQuery, PropertyRead, PropertyUpdate
+from app.api.deps import get_current_user, get_read_session, require_roles
+from app.api.pagination import PageParams, fetch_page, page_params
 from app.models.user import User, UserRole
+from app.services.broker import publish
+from app.services.map_clusters import bbox_filter, clustered_features, parse_bbox
+from app.services.map_features import load_features
+from app.services.map_snapshot import map_snapshot
+from app.services.map_version import MapDelta, changes_since, current_version
+from app.services.property_full import load_full_payloads
+from app.services.replica import read_sessionmaker
 
 router = APIRouter(prefix="/properties", tags=["properties"])
 
 
 @router.get("", response_model=list[PropertyRead])
 async def list_properties(
-    session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)
+    response: Response,
+    estado: PropertyState | None = Query(default=None),
+    comuna: str | None = Query(default=None),
+    tipo: PropertyType | None = Query(default=None),
+    created_from: datetime | None = Query(default=None),
+    created_to: datetime | None = Query(default=None),
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user),
 ) -> list[PropertyRead]:
-    result = await session.execute(select(Property).order_by(Property.created_at.desc()))
-    rows: Sequence[Property] = result.scalars().all()
+    stmt = select(Property)
+    if estado:
+        stmt = stmt.where(Property.estado_actual == estado)
+    if comuna:
+        stmt = stmt.where(Property.comuna == comuna)
+    if tipo:
+        stmt = stmt.where(Property.tipo == tipo)
+    if created_from:
+        stmt = stmt.where(Property.created_at >= created_from)
+    if created_to:
+        stmt = stmt.where(Property.created_at < created_to)
+    rows: Sequence[Property] = await fetch_page(session, stmt, Property, page, response)
     return list(rows)
 
 
@@ -53,93 +77,177 @@ async def create_property(
     session.add(prop)
     await session.commit()
     await session.refresh(prop)
+    await publish("property.created", id=prop.id, codigo=prop.codigo, estado=prop.estado_actual)
     return prop
 
 
+def _map_etag(version: int, *parts: str | None) -> str:
+    # Features carry date-dependent fields (proxima_cobranza): a new day is a new representation.
+    suffix = "-".join(p for p in (local_today().isoformat(), *parts) if p)
+    return f'W/"map-{version}-{suffix}"'
+
+
 @router.get("/geojson")
 async def properties_geojson(
-    session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)
-) -> dict:
-    props_result = await session.execute(
-        select(Property).where(Property.lat.is_not(None), Property.lon.is_not(None))
-    )
+    request: Request,
+    bbox: str | None = Query(default=None, description="min_lon,min_lat,max_lon,max_lat"),
+    since: int | None = Query(default=None, ge=0, description="Version previa: devuelve solo los cambios"),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user),
+) -> Response:
+    if bbox and since is not None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since no se combina con bbox")
+
+    version = await current_version(session)
+    etag = _map_etag(version, bbox, f"since{since}" if since is not None else None)
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
+    if since is not None:
+        delta = await changes_since(session, since, version)
+        if not delta.reset:
+            return ORJSONResponse(await _geojson_delta(session, delta, since, version), headers=cache_headers)
+
+    if settings.map_snapshot_enabled:
+        body = await map_snapshot.collection(
+            session, version, reset=since is not None, bbox=parse_bbox(bbox) if bbox else None
+        )
+        return Response(body, media_type="application/json", headers=cache_headers)
+
+    stmt = select(Property).where(Property.lat.is_not(None), Property.lon.is_not(None))
+    if bbox:
+        stmt = stmt.where(bbox_filter(session, parse_bbox(bbox)))
+    props_result = await session.execute(stmt)
     props: list[Property] = list(props_result.scalars().all())
 
-    if not props:
-        return {"type": "FeatureCollection", "features": []}
-
-    prop_ids = [p.id for p in props]
-    arr_alias = aliased(Person)
-    contracts_result = await session.execute(
-        select(LeaseContract, arr_alias)
-        .join(arr_alias, LeaseContract.arrendatario_id == arr_alias.id)
-        .where(
-            LeaseContract.propiedad_id.in_(prop_ids),
-            LeaseContract.estado == ContractStatus.VIGENTE,
+    collection: dict = {"type": "FeatureCollection", "version": version, "features": []}
+    if since is not None:
+        collection["reset"] = True
+    if props:
+        collection["features"] = await load_features(session, props)
+    return ORJSONResponse(collection, headers=cache_headers)
+
+
+async def _geojson_delta(session: AsyncSession, delta: MapDelta, since: int, version: int) -> dict:
+    props: list[Property] = []
+    if delta.upserted:
+        props_result = await session.execute(
+            select(Property).where(
+                Property.id.in_(delta.upserted), Property.lat.is_not(None), Property.lon.is_not(None)
+            )
         )
+        props = list(props_result.scalars().all())
+
+    added: list[dict] = []
+    changed: list[dict] = []
+    for feature in await load_features(session, props):
+        prop_id = UUID(feature["properties"]["id"])
+        (added if prop_id in delta.inserted else changed).append(feature)
+
+    present = {p.id for p in props}
+    # Deleted, or updated to drop its coordinates: gone from the map either way.
+    removed = delta.deleted | {pid for pid in delta.upserted - delta.inserted if pid not in present}
+    return {
+        "type": "FeatureCollectionDelta",
+        "since": since,
+        "version": version,
+        "added": added,
+        "changed": changed,
+        "removed": [str(pid) for pid in removed],
+    }
+
+
+@router.get("/geojson/clusters")
+async def properties_geojson_clusters(
+    bbox: str = Query(..., description="min_lon,min_lat,max_lon,max_lat"),
+    zoom: int = Query(..., ge=0, le=22),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user),
+) -> ORJSONResponse:
+    """Viewport feed: grid clusters for the visible bbox, single properties when zoomed in."""
+    features = await clustered_features(session, parse_bbox(bbox), zoom)
+    return ORJSONResponse({"type": "FeatureCollection", "features": features})
+
+
+FULL_BATCH_SIZE = 500
+
+
+async def _stream_full_payloads(
+    ids: list[UUID] | None,
+    estado: PropertyState | None,
+    comuna: str | None,
+    tipo: PropertyType | None,
+    session_factory: async_sessionmaker[AsyncSession],
+) -> AsyncIterator[bytes]:
+    # The request-scoped session is closed before a StreamingResponse body is sent,
+    # so the generator owns its own session.
+    async with session_factory() as session:
+        stmt = select(Property.created_at, Property.id)
+        if estado:
+            stmt = stmt.where(Property.estado_actual == estado)
+        if comuna:
+            stmt = stmt.where(Property.comuna == comuna)
+        if tipo:
+            stmt = stmt.where(Property.tipo == tipo)
+        if ids is None:
+            stmt = stmt.order_by(Property.created_at.desc(), Property.id.desc())
+            ordered_ids: list[UUID] = list((await session.execute(stmt)).scalars(1).all())
+        else:
+            # An explicit list (possibly empty) is a filter; resolved in chunks to keep IN lists bounded.
+            unique_ids = list(dict.fromkeys(ids))
+            rows = []
+            for offset in range(0, len(unique_ids), FULL_BATCH_SIZE):
+                chunk = unique_ids[offset : offset + FULL_BATCH_SIZE]
+                rows += (await session.execute(stmt.where(Property.id.in_(chunk)))).all()
+            rows.sort(key=lambda row: (row.created_at, row.id), reverse=True)
+            ordered_ids = [prop_id for _, prop_id in rows]
+
+        yield b"["
+        for offset in range(0, len(ordered_ids), FULL_BATCH_SIZE):
+            batch_ids = ordered_ids[offset : offset + FULL_BATCH_SIZE]
+            props_result = await session.execute(select(Property).where(Property.id.in_(batch_ids)))
+            by_id = {p.id: p for p in props_result.scalars().all()}
+            batch = [by_id[pid] for pid in batch_ids if pid in by_id]
+            for index, payload in enumerate(await load_full_payloads(session, batch)):
+                chunk = dumps(payload)
+                yield chunk if offset == 0 and index == 0 else b"," + chunk
+            # Drop the batch from the identity map so memory stays flat.
+            session.expunge_all()
+        yield b"]"
+
+
+@router.get("/full")
+async def list_properties_full(
+    ids: list[UUID] | None = Query(default=None),
+    estado: PropertyState | None = Query(default=None),
+    comuna: str | None = Query(default=None),
+    tipo: PropertyType | None = Query(default=None),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """Same payload as `/properties/{id}/full` for many properties, streamed as a JSON array.
+
+    Properties are loaded in batches of `FULL_BATCH_SIZE`; each batch costs a fixed
+    number of queries instead of one round trip per property.
+    """
+    return StreamingResponse(
+        _stream_full_payloads(ids, estado, comuna, tipo, read_sessionmaker(current_user.id)),
+        media_type="application/json",
     )
 
-    latest_contract_by_prop: dict[UUID, tuple[LeaseContract, Person]] = {}
-    for contract, arrendatario in contracts_result:
-        prev = latest_contract_by_prop.get(contract.propiedad_id)
-        if prev is None or contract.fecha_inicio > prev[0].fecha_inicio:
-            latest_contract_by_prop[contract.propiedad_id] = (contract, arrendatario)
-
-    def next_payment_day(dia_pago: int | None) -> date | None:
-        if not dia_pago:
-            return None
-        today = date.today()
-        try:
-            candidate = date(today.year, today.month, dia_pago)
-        except ValueError:
-            return None
-        if candidate < today:
-            month = today.month + 1
-            year = today.year + (1 if month > 12 else 0)
-            month = 1 if month > 12 else month
-            try:
-                candidate = date(year, month, dia_pago)
-            except ValueError:
-                return None
-        return candidate
-
-    features: list[dict] = []
-    for prop in props:
-        contract_info = latest_contract_by_prop.get(prop.id)
-        arr_name = None
-        next_cobranza = None
-        fecha_fin = None
-        if contract_info:
-            contract, arr = contract_info
-            arr_name = " ".join(filter(None, [arr.nombres, arr.apellidos]))
-            fecha_fin = contract.fecha_fin
-            next_cobranza = next_payment_day(contract.dia_pago)
-
-        features.append(
-            {
-                "type": "Feature",
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [float(prop.lon), float(prop.lat)],
-                },
-                "properties": {
-                    "id": str(prop.id),
-                    "codigo": prop.codigo,
-                    "direccion": prop.direccion_linea1,
-                    "estado": prop.estado_actual,
-                    "tipo": prop.tipo,
-                    "comuna": prop.comuna,
-                    "region": prop.region,
-                    "valor_arriendo": float(prop.valor_arriendo) if prop.valor_arriendo else None,
-                    "valor_venta": float(prop.valor_venta) if prop.valor_venta else None,
-                    "arrendatario": arr_name,
-                    "fecha_fin_contrato": fecha_fin,
-                    "proxima_cobranza": next_cobranza,
-                },
-            }
-        )
 
-    return {"type": "FeatureCollection", "features": features}
+@router.post("/full")
+async def list_properties_full_by_ids(
+    payload: PropertyFullQuery,
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """Body-based variant of `GET /properties/full` for id lists too long for a query string."""
+    return StreamingResponse(
+        _stream_full_payloads(
+            payload.ids, payload.estado, payload.comuna, payload.tipo, read_sessionmaker(current_user.id)
+        ),
+        media_type="application/json",
+    )
 
 
 async def _get_property_or_404(property_id: UUID, session: AsyncSession) -> Property:
@@ -152,7 +260,7 @@ async def _get_property_or_404(property_id: UUID, session: AsyncSession) -> Prop
 @router.get("/{property_id}", response_model=PropertyRead)
 async def get_property(
     property_id: UUID,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
 ) -> PropertyRead:
     prop = await _get_property_or_404(property_id, session)
@@ -162,158 +270,12 @@ async def get_property(
 @router.get("/{property_id}/full")
 async def get_property_full(
     property_id: UUID,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user),
-) -> dict:
+) -> ORJSONResponse:
     prop = await _get_property_or_404(property_id, session)
-
-    history_result = await session.execute(
-        select(PropertyStateHistory)
-        .where(PropertyStateHistory.propiedad_id == property_id)
-        .order_by(PropertyStateHistory.fecha_inicio.desc())
-    )
-    history = [
-        {
-            "estado": h.estado,
-            "motivo": h.motivo,
-            "fecha_inicio": h.fecha_inicio,
-            "fecha_fin": h.fecha_fin,
-            "actor_id": h.actor_id,
-        }
-        for h in history_result.scalars().all()
-    ]
-
-    arr_alias = aliased(Person)
-    owner_alias = aliased(Person)
-    contracts_result = await session.execute(
-        select(LeaseContract, arr_alias, owner_alias)
-        .join(arr_alias, LeaseContract.arrendatario_id == arr_alias.id)
-        .join(owner_alias, LeaseContract.propietario_id == owner_alias.id)
-        .where(LeaseContract.propiedad_id == property_id)
-        .order_by(LeaseContract.fecha_inicio.desc())
-    )
-
-    contracts: list[dict] = []
-    current_contract: dict | None = None
-    contract_ids: list[UUID] = []
-    for contract, arr, owner in contracts_result:
-        contract_ids.append(contract.id)
-        payload = {
-            "id": contract.id,
-            "estado": contract.estado,
-            "fecha_inicio": contract.fecha_inicio,
-            "fecha_fin": contract.fecha_fin,
-            "renta_mensual": float(contract.renta_mensual),
-            "moneda": contract.moneda,
-            "dia_pago": contract.dia_pago,
-            "reajuste_tipo": contract.reajuste_tipo,
-            "reajuste_periodo_meses": contract.reajuste_periodo_meses,
-            "arrendatario": {
-                "id": arr.id,
-                "nombre": " ".join(filter(None, [arr.nombres, arr.apellidos])),
-                "rut": arr.rut,
-                "email": arr.email,
-                "telefono": arr.telefono,
-            },
-            "propietario": {
-                "id": owner.id,
-                "nombre": " ".join(filter(None, [owner.nombres, owner.apellidos])),
-                "rut": owner.rut,
-                "email": owner.email,
-                "telefono": owner.telefono,
-            },
-            "notas": contract.notas,
-            "created_at": contract.created_at,
-        }
-        contracts.append(payload)
-        if contract.estado == ContractStatus.VIGENTE and current_contract is None:
-            current_contract = payload
-
-    docs_result = await session.execute(
-        select(Document)
-        .where(
-            Document.entidad_tipo == "propiedad",
-            Document.entidad_id == property_id,
-            Document.activo.is_(True),
-        )
-        .order_by(Document.created_at.desc())
-    )
-    documents = [
-        {
-            "id": d.id,
-            "categoria": d.categoria,
-            "filename": d.filename,
-            "version": d.version,
-            "created_at": d.created_at,
-            "activo": d.activo,
-        }
-        for d in docs_result.scalars().all()
-    ]
-
-    charges: list[dict] = []
-    if contract_ids:
-        charges_result = await session.execute(
-            select(Charge).where(Charge.contrato_id.in_(contract_ids)).order_by(Charge.fecha_vencimiento.desc())
-        )
-        charge_ids: list[UUID] = []
-        charges_raw = list(charges_result.scalars().all())
-        charge_ids = [c.id for c in charges_raw]
-
-        payments_map: dict[UUID, list[dict]] = {}
-        if charge_ids:
-            payments_result = await session.execute(
-                select(PaymentDetail).where(PaymentDetail.cobranza_id.in_(charge_ids))
-            )
-            for pay in payments_result.scalars().all():
-                payments_map.setdefault(pay.cobranza_id, []).append(
-                    {
-                        "id": pay.id,
-                        "monto_pagado": float(pay.monto_pagado),
-                        "fecha_pago": pay.fecha_pago,
-                        "medio_pago": pay.medio_pago,
-                        "referencia": pay.referencia,
-                    }
-                )
-
-        for charge in charges_raw:
-            charges.append(
-                {
-                    "id": charge.id,
-                    "periodo": charge.periodo,
-                    "monto_original": float(charge.monto_original),
-                    "monto_ajustado": float(charge.monto_ajustado) if charge.monto_ajustado else None,
-                    "fecha_vencimiento": charge.fecha_vencimiento,
-                    "estado": charge.estado,
-                    "fecha_pago": charge.fecha_pago,
-                    "pagos": payments_map.get(charge.id, []),
-                }
-            )
-
-    property_payload = {
-        "id": prop.id,
-        "codigo": prop.codigo,
-        "direccion_linea1": prop.direccion_linea1,
-        "comuna": prop.comuna,
-        "region": prop.region,
-        "tipo": prop.tipo,
-        "estado_actual": prop.estado_actual,
-        "valor_arriendo": float(prop.valor_arriendo) if prop.valor_arriendo else None,
-        "valor_venta": float(prop.valor_venta) if prop.valor_venta else None,
-        "lat": float(prop.lat) if prop.lat else None,
-        "lon": float(prop.lon) if prop.lon else None,
-        "fecha_publicacion": prop.fecha_publicacion,
-        "created_at": prop.created_at,
-        "updated_at": prop.updated_at,
-    }
-
-    return {
-        "property": property_payload,
-        "current_contract": current_contract,
-        "state_history": history,
-        "contracts": contracts,
-        "documents": documents,
-        "charges": charges,
-    }
+    payloads = await load_full_payloads(session, [prop])
+    return ORJSONResponse(payloads[0])
 
 
 @router.patch("/{property_id}", response_model=PropertyRead)
@@ -336,6 +298,7 @@ async def update_property(
 
     await session.commit()
     await session.refresh(prop)
+    await publish("property.updated", id=prop.id, codigo=prop.codigo, estado=prop.estado_actual)
     return prop
 
 
@@ -348,4 +311,5 @@ async def delete_property(
     prop = await _get_property_or_404(property_id, session)
     await session.delete(prop)
     await session.commit()
+    await publish("property.deleted", id=property_id)
     return None
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import require_roles
+from app.core.executors import run_io
+from app.db.session import get_session
+from app.models.user import User, UserRole
+from app.schemas.reconciliation import ReconciliationReport
+from app.services.bank_statements import STATEMENT_SUFFIXES, read_statement
+from app.services.broker import publish
+from app.services.bulk_import import ImportFormatError
+from app.services.reconciliation import reconcile
+from app.services.storage import spool_to_temp
+
+router = APIRouter(prefix="/reconciliation", tags=["reconciliation"])
+
+
+@router.post("/statements", response_model=ReconciliationReport)
+async def reconcile_statement(
+    file: UploadFile = File(...),
+    dry_run: bool = Form(False),
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(require_roles(UserRole.ADMIN, UserRole.FINANZAS)),
+) -> ReconciliationReport:
+    """Match a bank statement (CSV/XLSX cartola or OFX) to open charges; sure matches are paid, the rest suggested."""
+    filename = file.filename or "cartola.csv"
+    if Path(filename).suffix.lower() not in STATEMENT_SUFFIXES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Formato no soportado; use .csv, .xlsx u .ofx")
+    path = await spool_to_temp(file)
+    try:
+        statement = await run_io(read_statement, path, filename)
+    except ImportFormatError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    finally:
+        await run_io(path.unlink, missing_ok=True)
+
+    try:
+        report = await reconcile(session, statement, dry_run=dry_run)
+        if dry_run:
+            return report
+        await session.commit()
+    except IntegrityError as exc:
+        # Unique bank references: the same statement is being applied by another request.
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="La cartola se esta aplicando en paralelo; reintente"
+        ) from exc
+    if report.aplicadas:
+        await publish("payments.applied", aplicados=report.aplicadas, origen="cartola")
+    return report
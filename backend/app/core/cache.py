@@ -0,0 +1,64 @@
+"""Small in-process caches shared by services."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[V]):
+    """Bounded LRU cache whose entries expire after ``ttl`` seconds.
+
+    Thread-safe so it can be shared between the event loop and executor threads.
+
+    :attr:`generation` changes on every :meth:`clear`. A loader reads it before
+    querying and passes it to :meth:`set`, so a value read before an
+    invalidation is not cached after it.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 60.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, key: Hashable, default: V | None = None) -> V | None:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry  # type: ignore[misc]
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: V, generation: int | None = None) -> None:
+        """Store ``value``; skipped if ``generation`` is given and the cache was cleared since."""
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,28 @@
+"""Business-calendar "now": scheduled runs, due dates and overdue checks use ``APP_TIMEZONE``."""
+
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+
+
+def local_tz() -> ZoneInfo:
+    return ZoneInfo(settings.app_timezone)
+
+
+def local_now() -> datetime:
+    return datetime.now(local_tz())
+
+
+def local_today() -> date:
+    return local_now().date()
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    """First day of the month ``months`` after ``day``'s month."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
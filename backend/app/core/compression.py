@@ -0,0 +1,182 @@
+"""Response compression negotiated from ``Accept-Encoding``.
+
+Brotli (``br``) when the optional ``brotli`` package is installed and the
+client accepts it, gzip otherwise. Only text-like bodies (JSON, GeoJSON,
+NDJSON, CSV, HTML) of at least ``COMPRESSION_MIN_BYTES`` are compressed:
+server-sent events, ranged downloads and already compressed files (PDF, XLSX,
+Parquet) pass through untouched. Streamed bodies are compressed chunk by
+chunk, flushing after each one so clients still receive them incrementally.
+"""
+
+import gzip
+import zlib
+from typing import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/geo+json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/html",
+    "text/plain",
+)
+
+
+class _Encoder:
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def finish(self) -> bytes:
+        raise NotImplementedError
+
+
+class _GzipEncoder(_Encoder):
+    def __init__(self, level: int) -> None:
+        # wbits 16+: gzip container, as produced by the gzip module.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder(_Encoder):
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Preferred encoding among the ones the client accepts (``q=0`` excluded)."""
+    accepted: set[str] = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 0.0
+        if quality > 0:
+            accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress_body(encoding: str, body: bytes, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self, encoding, send).run(self.app, scope, receive)
+
+    def encoder(self, encoding: str) -> _Encoder:
+        if encoding == "br":
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
+
+
+def _compressible(headers: Headers, status: int) -> bool:
+    if status in (204, 206, 304) or "content-encoding" in headers or "content-range" in headers:
+        return False
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return content_type in COMPRESSIBLE_TYPES
+
+
+class _CompressedResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Message | None = None
+        self.forward: Callable | None = None
+        self.encoder: _Encoder | None = None
+
+    async def run(self, app: ASGIApp, scope: Scope, receive: Receive) -> None:
+        await app(scope, receive, self.intercept)
+
+    async def intercept(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        if self.forward is None:
+            await self._first_body(message)
+        else:
+            await self.forward(message)
+
+    async def _first_body(self, message: Message) -> None:
+        start = self.start
+        headers = MutableHeaders(raw=start["headers"])
+        body: bytes = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        too_small = not more_body and len(body) < self.middleware.minimum_size
+        if too_small or not _compressible(headers, start["status"]):
+            self.forward = self.send
+            await self.send(start)
+            await self.send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if not more_body:
+            compressed = compress_body(
+                self.encoding, body, self.middleware.gzip_level, self.middleware.brotli_quality
+            )
+            headers["Content-Length"] = str(len(compressed))
+            self.forward = self.send
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        # Streamed body: length unknown up front.
+        del headers["Content-Length"]
+        self.encoder = self.middleware.encoder(self.encoding)
+        self.forward = self._stream
+        await self.send(start)
+        await self._stream(message)
+
+    async def _stream(self, message: Message) -> None:
+        body = self.encoder.compress(message.get("body", b""))
+        more_body = message.get("more_body", False)
+        if not more_body:
+            body += self.encoder.finish()
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
@@ -1,5 +1,6 @@
+from decimal import Decimal
 from functools import lru_cache
-from typing import Iterable
+from typing import Iterable, Literal
 import json
 
 from pydantic import computed_field
@@ -14,9 +15,94 @@ class Settings(BaseSettings):
     secret_key: str = "change-this"
     access_token_expire_minutes: int = 60
     storage_dir: str = "storage"
+    # "local" (STORAGE_DIR) | "s3" (S3-compatible; S3_ENDPOINT_URL for MinIO/moto)
+    storage_backend: str = "local"
+    storage_presigned_downloads: bool = False
+    storage_presign_seconds: int = 300
+    s3_bucket: str | None = None
+    s3_prefix: str = ""
+    s3_endpoint_url: str | None = None
+    s3_region: str | None = None
+    s3_access_key_id: str | None = None
+    s3_secret_access_key: str | None = None
+    s3_multipart_chunk_bytes: int = 8 * 1024 * 1024
     google_client_id: str | None = None
     gemini_api_key: str | None = None
     gemini_model: str = "gemini-2.5-flash"
+    # Cache of PDF text and Gemini extractions by file hash; ttl 0 disables it.
+    extraction_cache_ttl_days: int = 90
+    extraction_cache_max_mb: int = 256
+    dashboard_cache_ttl_seconds: int = 60
+    # Database pool. DB_POOL_MODE: "pgbouncer" (transaction-mode pooler such as PgBouncer or the Neon/Supabase
+    # pooled endpoints; prepared statements off) | "direct" (Postgres itself; keeps prepared-statement caching).
+    db_pool_mode: Literal["direct", "pgbouncer"] = "pgbouncer"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100
+    # Client-side limit per statement (asyncpg command_timeout); 0 = none.
+    db_command_timeout_seconds: float = 0
+    # Optional read replica for read-only routes (same pool settings). A user's reads stay on the primary
+    # for READ_AFTER_WRITE_SECONDS after they commit a write, to cover replication lag.
+    read_database_url: str | None = None
+    read_after_write_seconds: float = 5.0
+    # Authenticated-user snapshots; invalidated on writes to users (all workers with EVENTS_BACKEND=postgres).
+    auth_cache_ttl_seconds: int = 60
+    auth_cache_size: int = 10000
+    map_version_ttl_seconds: float = 2.0
+    # Daily pruning of mapa_cambios; clients older than the retained range get a full reload.
+    map_changes_retention_days: int = 30
+    map_changes_prune_hour: int = 4
+    # Per-worker snapshot of serialized map features, patched from mapa_cambios and rolled over daily.
+    map_snapshot_enabled: bool = True
+    # "memory" (single process) | "postgres" (LISTEN/NOTIFY across workers)
+    events_backend: str = "memory"
+    events_queue_size: int = 256
+    # Direct (non-pooler) URL for the LISTEN connection; defaults to DATABASE_URL. Reconnects back off
+    # from EVENTS_RECONNECT_MIN_SECONDS to EVENTS_RECONNECT_MAX_SECONDS.
+    events_database_url: str | None = None
+    events_reconnect_min_seconds: float = 1.0
+    events_reconnect_max_seconds: float = 30.0
+    events_healthcheck_seconds: float = 30.0
+    # Background jobs (PDF parsing, IA). jobs_workers=0 disables the in-app worker pool.
+    jobs_workers: int = 2
+    jobs_poll_seconds: float = 5.0
+    jobs_lease_seconds: int = 300
+    jobs_max_attempts: int = 5
+    jobs_backoff_seconds: float = 10.0
+    jobs_backoff_max_seconds: float = 900.0
+    # Periodic jobs (charge generation, overdue sweep) are enqueued by the scheduler in local time.
+    scheduler_enabled: bool = True
+    scheduler_poll_seconds: float = 60.0
+    app_timezone: str = "America/Santiago"
+    # Monthly charges: generated daily at this hour for the current month plus CHARGES_MONTHS_AHEAD.
+    charges_generation_hour: int = 2
+    charges_months_ahead: int = 1
+    charges_default_pay_day: int = 5
+    charges_generation_max_months: int = 36
+    # Overdue sweep (daily at MORA_SWEEP_HOUR): open charges due more than MORA_GRACE_DAYS ago become
+    # ATRASADO and accrue simple interest on the unpaid balance (monthly % / 30 per day late; 0 = no fee).
+    mora_sweep_hour: int = 3
+    mora_grace_days: int = 0
+    mora_monthly_rate_pct: Decimal = Decimal("0")
+    # Largest batch accepted by POST /charges/payments/bulk (one transaction).
+    payments_bulk_max: int = 5000
+    # Bank reconciliation: a credit matched by amount alone must fall this close to the due date.
+    reconciliation_date_window_days: int = 45
+    # Response compression (br with the optional brotli package, else gzip) for text bodies of at least this size.
+    compression_min_bytes: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    # Off-loop executors: threads for blocking SDK calls, processes for bcrypt/PDF parsing (0 = use threads).
+    executor_io_threads: int = 16
+    executor_cpu_processes: int = 2
+    # Bulk CSV/XLSX import: rows per upsert batch (and transaction), and per-row errors kept in the report.
+    import_batch_size: int = 1000
+    import_max_errors: int = 1000
+    # Streaming exports: rows fetched per server-side cursor round trip (and per Parquet row group).
+    export_batch_size: int = 5000
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -0,0 +1,133 @@
+"""Shared executors for work that must not run on the event loop.
+
+- ``run_io``: blocking SDK/network/file calls (Gemini, Google token
+  verification, disk reads) on a bounded thread pool.
+- ``run_cpu``: CPU-bound work (bcrypt, PyPDF2 text extraction, contract regex
+  parsing) on a process pool, so it is not serialized behind the GIL. Functions
+  and arguments must be picklable (module-level functions, plain data), and the
+  functions should live in modules with few imports (``app.services.pdf_text``,
+  ``app.services.contract_extractor``): spawned children import that module,
+  not the DB engine or job machinery behind the caller.
+  ``EXECUTOR_CPU_PROCESSES=0`` runs CPU work on the thread pool instead.
+
+Pools are created lazily and shut down with the app. ``executor_stats`` reports
+in-flight and queued tasks per pool for ``/health/executors``.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+@dataclass
+class PoolStats:
+    max_workers: int
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return self.submitted - self.completed - self.failed
+
+    @property
+    def queued(self) -> int:
+        return max(self.in_flight - self.max_workers, 0)
+
+    def as_dict(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+        }
+
+
+class _Pool:
+    def __init__(self, name: str, factory: Callable[[], Executor], max_workers: int) -> None:
+        self.name = name
+        self.stats = PoolStats(max_workers=max_workers)
+        self._factory = factory
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+    def executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._factory()
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        self.stats.submitted += 1
+        started = time.monotonic()
+        try:
+            result = await loop.run_in_executor(self.executor(), partial(func, *args, **kwargs))
+        except BaseException:
+            self.stats.failed += 1
+            raise
+        finally:
+            self.stats.busy_seconds += time.monotonic() - started
+        self.stats.completed += 1
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_io = _Pool(
+    "io",
+    lambda: ThreadPoolExecutor(max_workers=settings.executor_io_threads, thread_name_prefix="sigap-io"),
+    settings.executor_io_threads,
+)
+
+if settings.executor_cpu_processes > 0:
+    # "spawn": forking a process that already runs an event loop and DB pools is unsafe.
+    _cpu = _Pool(
+        "cpu",
+        lambda: ProcessPoolExecutor(
+            max_workers=settings.executor_cpu_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        ),
+        settings.executor_cpu_processes,
+    )
+else:
+    _cpu = _io
+
+
+async def run_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking I/O call on the shared thread pool."""
+    return await _io.run(func, *args, **kwargs)
+
+
+async def run_cpu(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a CPU-bound, picklable call on the process pool."""
+    return await _cpu.run(func, *args, **kwargs)
+
+
+def executor_stats() -> dict:
+    pools = {_io.name: _io}
+    pools[_cpu.name] = _cpu
+    return {name: pool.stats.as_dict() for name, pool in pools.items()}
+
+
+def shutdown_executors() -> None:
+    _cpu.shutdown()
+    _io.shutdown()
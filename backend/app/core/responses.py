@@ -0,0 +1,44 @@
+"""Fast JSON responses.
+
+:class:`ORJSONResponse` is the app's default response class. orjson encodes
+``date``/``datetime``, ``UUID``, enums and dataclasses natively; everything
+else goes through :func:`_default` with the same output as FastAPI's
+``jsonable_encoder``, so the wire format does not change.
+
+FastAPI still runs ``jsonable_encoder`` over plain ``dict`` return values
+before rendering. Routes with large dict payloads (map feeds, property sheets)
+return ``ORJSONResponse(payload)`` themselves to skip that walk. Routes with a
+``response_model`` are serialized by Pydantic first (amounts as strings) and
+only rendered here.
+"""
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        # Same as jsonable_encoder: integral amounts as int, the rest as float.
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, bytes):
+        return value.decode()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
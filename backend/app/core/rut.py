@@ -0,0 +1,40 @@
+"""Chilean RUT normalization and check-digit validation."""
+
+import re
+
+_NON_RUT = re.compile(r"[^0-9kK]")
+
+
+def normalize_rut(value: str | None) -> str | None:
+    """Digits plus check digit, without dots or dash (``12.345.678-k`` -> ``12345678K``)."""
+    if not value:
+        return None
+    cleaned = _NON_RUT.sub("", value)
+    if not cleaned:
+        return None
+    if cleaned[-1] in {"k", "K"}:
+        return cleaned[:-1] + "K"
+    return cleaned
+
+
+def check_digit(body: str) -> str:
+    """Modulo-11 check digit for the numeric part of a RUT."""
+    total = 0
+    factor = 2
+    for digit in reversed(body):
+        total += int(digit) * factor
+        factor = 2 if factor == 7 else factor + 1
+    remainder = 11 - total % 11
+    if remainder == 11:
+        return "0"
+    if remainder == 10:
+        return "K"
+    return str(remainder)
+
+
+def is_valid_rut(value: str | None) -> bool:
+    normalized = normalize_rut(value)
+    if not normalized or len(normalized) < 2:
+        return False
+    body, dv = normalized[:-1], normalized[-1]
+    return body.isdigit() and len(body) <= 9 and check_digit(body) == dv
@@ -6,5 +6,11 @@ from app.models.person import Person  # noqa: F401
 from app.models.contract import LeaseContract  # noqa: F401
 from app.models.charge import Charge, PaymentDetail  # noqa: F401
 from app.models.property_state import PropertyStateHistory  # noqa: F401
-from app.models.document import Document  # noqa: F401
+from app.models.document import Document, DocumentBlob  # noqa: F401
 from app.models.user import User  # noqa: F401
+from app.models.map_change import MapChange, MapVersion  # noqa: F401
+from app.models.job import Job  # noqa: F401
+from app.models.extraction_cache import ExtractionCacheEntry  # noqa: F401
+from app.models.scheduled_task import ScheduledTask  # noqa: F401
+from app.models.indicator import EconomicIndicator  # noqa: F401
+from app.models.overdue import OverdueSweep, OverdueTransition  # noqa: F401
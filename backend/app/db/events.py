@@ -0,0 +1,83 @@
+"""Commit-time change notifications.
+
+Services that keep derived state in memory (caches, feeds) register a listener
+with :func:`on_commit_changes` and receive the set of table names written by
+each committed transaction. ORM flushes and ORM-enabled bulk ``insert``/
+``update``/``delete`` statements are both tracked. Listeners that need the
+session itself (e.g. to read ``session.info``) use :func:`on_session_commit`.
+"""
+
+import logging
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+logger = logging.getLogger(__name__)
+
+ChangeListener = Callable[[set[str]], None]
+SessionChangeListener = Callable[[Session, set[str]], None]
+
+_PENDING_KEY = "sigap_changed_tables"
+_listeners: list[ChangeListener] = []
+_session_listeners: list[SessionChangeListener] = []
+
+
+def on_commit_changes(listener: ChangeListener) -> ChangeListener:
+    """Register ``listener`` to be called with the tables touched by each commit."""
+    _listeners.append(listener)
+    return listener
+
+
+def on_session_commit(listener: SessionChangeListener) -> SessionChangeListener:
+    """Like :func:`on_commit_changes`, also passing the committed session."""
+    _session_listeners.append(listener)
+    return listener
+
+
+def _mark(session: Session, tables: set[str]) -> None:
+    if tables:
+        session.info.setdefault(_PENDING_KEY, set()).update(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flush(session: Session, flush_context) -> None:
+    # new/dirty/deleted still describe the pre-flush state here.
+    tables = {
+        obj.__table__.name
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if hasattr(obj, "__table__")
+    }
+    _mark(session, tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(state: ORMExecuteState) -> None:
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table = getattr(state.statement, "table", None)
+    name = getattr(table, "name", None)
+    if name:
+        _mark(state.session, {name})
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch(session: Session) -> None:
+    tables: set[str] = session.info.pop(_PENDING_KEY, set())
+    if not tables:
+        return
+    for listener in list(_listeners):
+        try:
+            listener(tables)
+        except Exception:
+            logger.exception("Change listener %r failed", listener)
+    for session_listener in list(_session_listeners):
+        try:
+            session_listener(session, tables)
+        except Exception:
+            logger.exception("Change listener %r failed", session_listener)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -1,16 +1,25 @@
+from dataclasses import dataclass
 from typing import AsyncIterator
 
 import logging
 import ssl
+import time
+from sqlalchemy import exc
 from sqlalchemy.engine import URL, make_url
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.core.config import settings
 
 
 logger = logging.getLogger(__name__)
 
+# DB_POOL_MODE values: "direct" talks to Postgres itself; "pgbouncer" goes through a
+# transaction-mode pooler, where prepared statements cannot be reused across transactions.
+POOL_MODE_DIRECT = "direct"
+POOL_MODE_PGBOUNCER = "pgbouncer"
+
 
 class Base(DeclarativeBase):
     """Declarative base for ORM models."""
@@ -57,37 +66,137 @@ def _sanitize_database_url(raw_url: str) -> tuple[URL, dict]:
             ctx.verify_mode = ssl.CERT_NONE
             connect_args["ssl"] = ctx
 
-    # PgBouncer/Poolers: avoid prepared statements to prevent DuplicatePreparedStatementError.
-    # Force caches to zero and force simple-query mode via prepare_threshold=0.
-    query = dict(url.query)
-    connect_args["statement_cache_size"] = 0
-    connect_args.setdefault("server_settings", {})["prepare_threshold"] = "0"
-    query["prepared_statement_cache_size"] = "0"
-    url = url.set(query=query)
+    if url.get_backend_name() == "postgresql":
+        query = dict(url.query)
+        if settings.db_pool_mode == POOL_MODE_PGBOUNCER:
+            # PgBouncer/Poolers: avoid prepared statements to prevent DuplicatePreparedStatementError.
+            # Force caches to zero and force simple-query mode via prepare_threshold=0.
+            connect_args["statement_cache_size"] = 0
+            connect_args.setdefault("server_settings", {})["prepare_threshold"] = "0"
+            query["prepared_statement_cache_size"] = "0"
+        else:
+            # Direct connections keep both asyncpg's and SQLAlchemy's prepared-statement caches.
+            connect_args["statement_cache_size"] = settings.db_statement_cache_size
+            query["prepared_statement_cache_size"] = str(settings.db_statement_cache_size)
+        if settings.db_command_timeout_seconds > 0:
+            connect_args["command_timeout"] = settings.db_command_timeout_seconds
+        url = url.set(query=query)
 
     logger.info(
-        "DB URL (masked): driver=%s host=%s db=%s user=%s sslmode=%s channel_binding=%s",
+        "DB URL (masked): driver=%s host=%s db=%s user=%s sslmode=%s channel_binding=%s pool_mode=%s",
         url.drivername,
         url.host,
         url.database,
         url.username,
         sslmode,
         channel_binding,
+        settings.db_pool_mode,
     )
     return url, connect_args
 
 
+@dataclass
+class PoolMetrics:
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+    def record(self, waited: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 3),
+            "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 4) if self.checkouts else 0.0,
+            "wait_seconds_max": round(self.wait_seconds_max, 3),
+        }
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits (including opening a new connection)."""
+
+    metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.monotonic()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.record(time.monotonic() - started)
+
+
+class ReplicaQueuePool(MeteredQueuePool):
+    metrics = PoolMetrics()
+
+
+def _engine_options(url: URL, poolclass: type[MeteredQueuePool]) -> dict:
+    if url.get_backend_name() != "postgresql":
+        # SQLite keeps SQLAlchemy's default pool for its driver.
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def _create_engine(url: URL, connect_args: dict, poolclass: type[MeteredQueuePool]) -> AsyncEngine:
+    return create_async_engine(
+        url.render_as_string(hide_password=False),
+        future=True,
+        echo=False,
+        connect_args=connect_args,
+        **_engine_options(url, poolclass),
+    )
+
+
 _url, _connect_args = _sanitize_database_url(settings.database_url)
 
-engine: AsyncEngine = create_async_engine(
-    _url.render_as_string(hide_password=False),
-    future=True,
-    echo=False,
-    connect_args=_connect_args,
-)
+engine: AsyncEngine = _create_engine(_url, _connect_args, MeteredQueuePool)
 AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
 
+# Optional streaming replica (READ_DATABASE_URL) for read-only routes; without it reads use the primary.
+read_engine: AsyncEngine | None = None
+if settings.read_database_url:
+    read_engine = _create_engine(*_sanitize_database_url(settings.read_database_url), ReplicaQueuePool)
+ReadSessionLocal = async_sessionmaker(bind=read_engine or engine, expire_on_commit=False, class_=AsyncSession)
+
 
 async def get_session() -> AsyncIterator[AsyncSession]:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+def _engine_stats(target: AsyncEngine) -> dict:
+    pool = target.sync_engine.pool
+    stats: dict = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            max_overflow=settings.db_max_overflow,
+            in_use=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, MeteredQueuePool):
+        stats.update(pool.metrics.as_dict())
+    return stats
+
+
+def pool_stats() -> dict:
+    """Pool occupancy and checkout waits of this process, for ``/health/db``."""
+    stats = {"mode": settings.db_pool_mode, **_engine_stats(engine)}
+    if read_engine is not None:
+        stats["replica"] = _engine_stats(read_engine)
+    return stats
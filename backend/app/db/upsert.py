@@ -0,0 +1,28 @@
+"""Dialect-aware ``INSERT`` helpers supporting ``ON CONFLICT`` (PostgreSQL and SQLite)."""
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# uuid4 text in SQLite, where the GUID type stores 36-character strings.
+_SQLITE_UUID = (
+    "lower(hex(randomblob(4))) || '-' || lower(hex(randomblob(2))) || '-4' || "
+    "substr(lower(hex(randomblob(2))), 2) || '-' || substr('89ab', 1 + (abs(random()) % 4), 1) || "
+    "substr(lower(hex(randomblob(2))), 2) || '-' || lower(hex(randomblob(6)))"
+)
+
+
+def _dialect(session: AsyncSession) -> str:
+    return session.bind.dialect.name if session.bind is not None else ""
+
+
+def insert_for(session: AsyncSession, model):
+    return (postgresql if _dialect(session) == "postgresql" else sqlite).insert(model)
+
+
+def new_uuid(session: AsyncSession):
+    """SQL expression for a fresh primary key, for ``INSERT ... SELECT``."""
+    if _dialect(session) == "postgresql":
+        # Built in since PostgreSQL 13.
+        return func.gen_random_uuid()
+    return literal_column(_SQLITE_UUID)
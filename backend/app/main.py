@@ -1,10 +1,37 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.pagination import NEXT_CURSOR_HEADER
 from app.api.routes import api_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.executors import executor_stats, shutdown_executors
+from app.core.responses import ORJSONResponse
+from app.db.session import pool_stats
+from app.services.broker import broker
+from app.services.jobs import worker as job_worker
+from app.services.scheduler import scheduler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await broker.start()
+    if settings.jobs_workers > 0:
+        await job_worker.start()
+    if settings.scheduler_enabled:
+        await scheduler.start()
+    try:
+        yield
+    finally:
+        await scheduler.stop()
+        await job_worker.stop()
+        await broker.stop()
+        shutdown_executors()
 
-app = FastAPI(title="SIGAP API", version="0.1.0")
+
+app = FastAPI(title="SIGAP API", version="0.1.0", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # CORS abierto para desarrollo; ajustar en produccion
 cors_origins = settings.cors_origins_list
@@ -18,6 +45,13 @@ app.add_middleware(
     allow_credentials=allow_credentials,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
+)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_bytes,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
 )
 
 
@@ -27,4 +61,16 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/health/executors", tags=["health"])
+def health_executors() -> dict:
+    """Carga de los pools de threads/procesos (tareas en curso y en cola)."""
+    return executor_stats()
+
+
+@app.get("/health/db", tags=["health"])
+def health_db() -> dict:
+    """Pool de conexiones: tamano, conexiones en uso y espera al obtener una conexion."""
+    return pool_stats()
+
+
 app.include_router(api_router)
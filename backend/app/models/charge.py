@@ -2,7 +2,7 @@ import uuid
 from decimal import Decimal
 from enum import Enum
 
-from sqlalchemy import Column, Date, DateTime, Enum as SAEnum, ForeignKey, Numeric, String, func
+from sqlalchemy import Column, Date, DateTime, Enum as SAEnum, ForeignKey, Index, Numeric, String, func, text
 from sqlalchemy.orm import relationship
 
 from app.core.types import GUID
@@ -19,6 +19,15 @@ class ChargeState(str, Enum):
 
 class Charge(Base):
     __tablename__ = "cobranzas"
+    __table_args__ = (
+        Index("idx_cobranzas_created", "created_at", "id"),
+        Index("idx_cobranzas_estado_created", "estado", "created_at", "id"),
+        Index("idx_cobranzas_contrato_created", "contrato_id", "created_at", "id"),
+        Index("idx_cobranzas_fecha_vencimiento", "fecha_vencimiento"),
+        Index("idx_cobranzas_periodo", "periodo"),
+        # One charge per contract and month; lets charge generation and imports upsert.
+        Index("uq_cobranzas_contrato_periodo", "contrato_id", "periodo", unique=True),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     contrato_id = Column(GUID(), ForeignKey("contratos_arriendo.id", ondelete="CASCADE"), nullable=False)
@@ -28,6 +37,8 @@ class Charge(Base):
     fecha_vencimiento = Column(Date, nullable=False)
     estado = Column(SAEnum(ChargeState, name="estado_cobranza"), nullable=False, default=ChargeState.PENDIENTE)
     mora_monto = Column(Numeric(14, 2), nullable=True)
+    # Sum of ``pagos_detalle.monto_pagado``; maintained by app.services.payments.
+    monto_pagado_total = Column(Numeric(14, 2), nullable=False, default=Decimal("0"), server_default="0")
     fecha_pago = Column(Date, nullable=True)
     medio_pago = Column(String(100), nullable=True)
     notas = Column(String(500), nullable=True)
@@ -39,6 +50,18 @@ class Charge(Base):
 
 class PaymentDetail(Base):
     __tablename__ = "pagos_detalle"
+    __table_args__ = (
+        # Bank reconciliation looks up already-posted statement lines by reference.
+        Index("idx_pagos_detalle_referencia", "referencia"),
+        # A statement line (``banco:<hash>`` reference) is posted at most once, even by concurrent uploads.
+        Index(
+            "uq_pagos_detalle_referencia_banco",
+            "referencia",
+            unique=True,
+            postgresql_where=text("referencia LIKE 'banco:%'"),
+            sqlite_where=text("referencia LIKE 'banco:%'"),
+        ),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     cobranza_id = Column(GUID(), ForeignKey("cobranzas.id", ondelete="CASCADE"), nullable=False)
@@ -1,7 +1,7 @@
 import uuid
 from enum import Enum
 
-from sqlalchemy import Column, Date, DateTime, Enum as SAEnum, ForeignKey, Integer, Numeric, String
+from sqlalchemy import Column, Date, DateTime, Enum as SAEnum, ForeignKey, Index, Integer, Numeric, String
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -31,6 +31,12 @@ class ContractStatus(str, Enum):
 
 class LeaseContract(Base):
     __tablename__ = "contratos_arriendo"
+    __table_args__ = (
+        Index("idx_contratos_created", "created_at", "id"),
+        Index("idx_contratos_estado_created", "estado", "created_at", "id"),
+        Index("idx_contratos_propiedad_created", "propiedad_id", "created_at", "id"),
+        Index("idx_contratos_estado_fecha_fin", "estado", "fecha_fin"),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     propiedad_id = Column(GUID(), ForeignKey("propiedades.id", ondelete="CASCADE"), nullable=False)
@@ -1,7 +1,7 @@
 import uuid
 from enum import Enum
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Integer, String
 from sqlalchemy.sql import func
 
 from app.core.types import GUID
@@ -42,3 +42,15 @@ class Document(Base):
     created_by = Column(GUID(), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     activo = Column(Boolean, nullable=False, default=True)
+
+
+class DocumentBlob(Base):
+    """Content-addressed file shared by every document with the same SHA-256."""
+
+    __tablename__ = "documento_blobs"
+
+    hash = Column(String(64), primary_key=True)
+    storage_path = Column(String(500), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from sqlalchemy.sql import func
+
+from app.db.session import Base
+
+
+class ExtractionCacheEntry(Base):
+    """Cached PDF text / AI extraction for a file, keyed by content hash and extractor variant."""
+
+    __tablename__ = "cache_extracciones"
+    __table_args__ = (
+        Index("idx_cache_extracciones_expires", "expires_at"),
+        Index("idx_cache_extracciones_last_used", "last_used_at"),
+    )
+
+    key = Column(String(64), primary_key=True)
+    tipo = Column(String(40), nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    variant = Column(String(200), nullable=False)
+    value_json = Column(Text, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
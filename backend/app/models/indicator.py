@@ -0,0 +1,23 @@
+from enum import Enum
+
+from sqlalchemy import Column, Date, DateTime, Enum as SAEnum, Numeric
+from sqlalchemy.sql import func
+
+from app.db.session import Base
+
+
+class IndicatorType(str, Enum):
+    UF = "uf"
+    IPC = "ipc"
+
+
+class EconomicIndicator(Base):
+    """Local copy of the UF (CLP per UF, daily) and IPC (% monthly change, on day 1) series."""
+
+    __tablename__ = "indicadores_economicos"
+
+    tipo = Column(SAEnum(IndicatorType, name="tipo_indicador"), primary_key=True)
+    fecha = Column(Date, primary_key=True)
+    valor = Column(Numeric(14, 4), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
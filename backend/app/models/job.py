@@ -0,0 +1,35 @@
+import uuid
+from enum import Enum
+
+from sqlalchemy import Column, DateTime, Enum as SAEnum, Index, Integer, String, Text
+from sqlalchemy.sql import func
+
+from app.core.types import GUID
+from app.db.session import Base
+
+
+class JobState(str, Enum):
+    PENDIENTE = "pendiente"
+    EN_PROCESO = "en_proceso"
+    COMPLETADO = "completado"
+    FALLIDO = "fallido"
+
+
+class Job(Base):
+    __tablename__ = "trabajos"
+    __table_args__ = (Index("idx_trabajos_estado_run_after", "estado", "run_after"),)
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    tipo = Column(String(80), nullable=False)
+    estado = Column(SAEnum(JobState, name="estado_trabajo"), nullable=False, default=JobState.PENDIENTE)
+    payload_json = Column(Text, nullable=False, default="{}")
+    result_json = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    intentos = Column(Integer, nullable=False, default=0)
+    max_intentos = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    created_by = Column(GUID(), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,28 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from app.core.types import GUID
+from app.db.session import Base
+
+
+class MapChange(Base):
+    """Append-only log of map-relevant writes, tagged at commit with the version of the writing transaction."""
+
+    __tablename__ = "mapa_cambios"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    # NULL only until the writing transaction commits.
+    version = Column(BigInteger, nullable=True, index=True)
+    # NULL means "unknown set of properties" (bulk statement): clients must reload.
+    propiedad_id = Column(GUID(), nullable=True, index=True)
+    op = Column(String(10), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class MapVersion(Base):
+    """Single-row counter (id 1) bumped at commit by every transaction that writes map data."""
+
+    __tablename__ = "mapa_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,41 @@
+import uuid
+
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Index, Integer, Numeric, String
+from sqlalchemy.sql import func
+
+from app.core.types import GUID
+from app.db.session import Base
+
+
+class OverdueSweep(Base):
+    """One run of the overdue sweeper with the parameters it applied."""
+
+    __tablename__ = "barridos_mora"
+    __table_args__ = (Index("idx_barridos_mora_fecha_corte", "fecha_corte"),)
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    fecha_corte = Column(Date, nullable=False)
+    dias_gracia = Column(Integer, nullable=False)
+    tasa_mensual_pct = Column(Numeric(6, 3), nullable=False)
+    marcadas = Column(Integer, nullable=False, default=0)
+    actualizadas = Column(Integer, nullable=False, default=0)
+    mora_total = Column(Numeric(16, 2), nullable=True)
+    job_id = Column(GUID(), nullable=True)
+    created_by = Column(GUID(), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class OverdueTransition(Base):
+    """A charge moved to ATRASADO by a sweep; states are stored as ``ChargeState`` names."""
+
+    __tablename__ = "mora_historial"
+    __table_args__ = (Index("idx_mora_historial_cobranza", "cobranza_id", "created_at"),)
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    barrido_id = Column(GUID(), ForeignKey("barridos_mora.id", ondelete="CASCADE"), nullable=False)
+    cobranza_id = Column(GUID(), ForeignKey("cobranzas.id", ondelete="CASCADE"), nullable=False)
+    estado_anterior = Column(String(20), nullable=False)
+    estado_nuevo = Column(String(20), nullable=False)
+    mora_anterior = Column(Numeric(14, 2), nullable=True)
+    mora_nueva = Column(Numeric(14, 2), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
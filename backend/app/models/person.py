@@ -1,13 +1,18 @@
 import uuid
 from enum import Enum
 
-from sqlalchemy import Column, DateTime, Enum as SAEnum, String, Text
+from sqlalchemy import Column, DateTime, Enum as SAEnum, Index, String, Text
+from sqlalchemy.orm import validates
 from sqlalchemy.sql import func
 
+from app.core.rut import normalize_rut
 from app.core.types import GUID
 from app.db.session import Base
 
 
+RUT_NORMALIZADO_LENGTH = 12
+
+
 class PersonType(str, Enum):
     PROPIETARIO = "propietario"
     ARRENDATARIO = "arrendatario"
@@ -17,12 +22,19 @@ class PersonType(str, Enum):
 
 class Person(Base):
     __tablename__ = "personas"
+    __table_args__ = (
+        Index("idx_personas_created", "created_at", "id"),
+        Index("idx_personas_tipo_created", "tipo", "created_at", "id"),
+        Index("idx_personas_rut_normalizado", "rut_normalizado", unique=True),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     tipo = Column(SAEnum(PersonType, name="tipo_persona"), nullable=False)
     nombres = Column(String(120), nullable=False)
     apellidos = Column(String(120), nullable=True)
     rut = Column(String(20), unique=True, nullable=True)
+    # Derived from ``rut`` on assignment; unique, used for lookups regardless of formatting.
+    rut_normalizado = Column(String(RUT_NORMALIZADO_LENGTH), nullable=True)
     email = Column(String(200), nullable=True)
     telefono = Column(String(50), nullable=True)
     razon_social = Column(String(200), nullable=True)
@@ -30,3 +42,10 @@ class Person(Base):
     direccion_contacto = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    @validates("rut")
+    def _sync_rut_normalizado(self, key: str, value: str | None) -> str | None:
+        normalized = normalize_rut(value)
+        # Legacy free-text values too long to be a RUT are left out of the lookup column.
+        self.rut_normalizado = normalized if normalized and len(normalized) <= RUT_NORMALIZADO_LENGTH else None
+        return value
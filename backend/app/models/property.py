@@ -2,7 +2,7 @@ import uuid
 from enum import Enum
 
 from geoalchemy2 import WKTElement
-from sqlalchemy import Column, Date, DateTime, Enum as SAEnum, Numeric, String, Text
+from sqlalchemy import Column, Date, DateTime, Enum as SAEnum, Index, Numeric, String, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -31,6 +31,12 @@ class PropertyType(str, Enum):
 
 class Property(Base):
     __tablename__ = "propiedades"
+    __table_args__ = (
+        Index("idx_propiedades_created", "created_at", "id"),
+        Index("idx_propiedades_estado_created", "estado_actual", "created_at", "id"),
+        Index("idx_propiedades_comuna_created", "comuna", "created_at", "id"),
+        Index("idx_propiedades_tipo_created", "tipo", "created_at", "id"),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     codigo = Column(String(50), unique=True, nullable=False)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, String
+from sqlalchemy.sql import func
+
+from app.core.types import GUID
+from app.db.session import Base
+
+
+class ScheduledTask(Base):
+    """Next due time of a periodic job; the worker that advances ``next_run_at`` enqueues the run."""
+
+    __tablename__ = "tareas_programadas"
+
+    nombre = Column(String(80), primary_key=True)
+    next_run_at = Column(DateTime(timezone=True), nullable=False)
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+    last_job_id = Column(GUID(), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
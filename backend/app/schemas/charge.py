@@ -27,6 +27,7 @@ class ChargeCreate(ChargeBase):
 
 class ChargeRead(ChargeBase):
     id: UUID
+    monto_pagado_total: Decimal = Decimal("0")
     created_at: datetime
     updated_at: datetime
 
@@ -40,9 +41,54 @@ class PaymentCreate(BaseModel):
     referencia: Optional[str] = None
 
 
+class PaymentBulkItem(PaymentCreate):
+    cobranza_id: UUID
+
+
+class PaymentBulkCreate(BaseModel):
+    pagos: list[PaymentBulkItem]
+
+
+class ChargeBalance(BaseModel):
+    id: UUID
+    estado: ChargeState
+    monto_pagado_total: Decimal
+    saldo: Decimal
+
+
+class PaymentBulkResult(BaseModel):
+    aplicados: int
+    cobranzas: list[ChargeBalance]
+
+
 class PaymentRead(PaymentCreate):
     id: UUID
     cobranza_id: UUID
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ChargeGenerationRequest(BaseModel):
+    periodo_desde: date
+    periodo_hasta: date
+    contrato_ids: Optional[list[UUID]] = None
+
+
+class ChargeGenerationResult(BaseModel):
+    periodo_desde: date
+    periodo_hasta: date
+    creadas: int
+
+
+class OverdueSweepRead(BaseModel):
+    id: UUID
+    fecha_corte: date
+    dias_gracia: int
+    tasa_mensual_pct: Decimal
+    marcadas: int
+    actualizadas: int
+    mora_total: Optional[Decimal] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
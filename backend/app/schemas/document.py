@@ -18,5 +18,7 @@ class DocumentRead(DocumentCreate):
     created_by: UUID | None
     created_at: datetime
     activo: bool
+    # Set on upload when contract/receipt processing was queued; poll /jobs/{job_id}.
+    job_id: UUID | None = None
 
     model_config = {"from_attributes": True}
@@ -0,0 +1,166 @@
+import re
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from app.models.charge import ChargeState
+from app.models.contract import AdjustmentType, ContractStatus, Currency
+from app.models.person import PersonType
+from app.models.property import PropertyState, PropertyType
+from app.schemas.person import _check_rut
+
+# "350.000" / "1.250.000,50": Chilean thousands separators.
+_CLP_AMOUNT = re.compile(r"^-?\d{1,3}(?:\.\d{3})+(?:,\d+)?$")
+_DMY_DATE = re.compile(r"^(\d{1,2})[/-](\d{1,2})[/-](\d{4})$")
+
+
+def _parse_amount(value: Any) -> Any:
+    if isinstance(value, str):
+        raw = value.strip().lstrip("$").strip()
+        if _CLP_AMOUNT.match(raw):
+            return raw.replace(".", "").replace(",", ".")
+        return raw.replace(",", ".") if raw.count(",") == 1 and "." not in raw else raw
+    return value
+
+
+def _parse_date(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        match = _DMY_DATE.match(value.strip())
+        if match:
+            day, month, year = map(int, match.groups())
+            return date(year, month, day)
+    return value
+
+
+def _lower(value: Any) -> Any:
+    return value.strip().lower() if isinstance(value, str) else value
+
+
+def _upper(value: Any) -> Any:
+    return value.strip().upper() if isinstance(value, str) else value
+
+
+def _require_rut(value: Any) -> str:
+    checked = _check_rut(None if value is None else str(value))
+    if checked is None:
+        raise ValueError("RUT requerido")
+    return checked
+
+
+class PropertyImportRow(BaseModel):
+    codigo: str = Field(..., max_length=50)
+    direccion_linea1: str
+    comuna: str = Field(..., max_length=80)
+    region: str = Field(..., max_length=80)
+    tipo: PropertyType
+    estado_actual: PropertyState
+    valor_arriendo: Optional[Decimal] = None
+    valor_venta: Optional[Decimal] = None
+    fecha_publicacion: Optional[date] = None
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lon: Optional[float] = Field(None, ge=-180, le=180)
+
+    parse_amounts = field_validator("valor_arriendo", "valor_venta", mode="before")(_parse_amount)
+    parse_dates = field_validator("fecha_publicacion", mode="before")(_parse_date)
+    parse_enums = field_validator("tipo", "estado_actual", mode="before")(_lower)
+
+
+class PersonImportRow(BaseModel):
+    rut: str = Field(..., max_length=20)
+    tipo: PersonType
+    nombres: str = Field(..., max_length=120)
+    apellidos: Optional[str] = Field(None, max_length=120)
+    email: Optional[str] = Field(None, max_length=200)
+    telefono: Optional[str] = Field(None, max_length=50)
+    razon_social: Optional[str] = Field(None, max_length=200)
+    giro: Optional[str] = Field(None, max_length=200)
+    direccion_contacto: Optional[str] = None
+
+    validate_rut = field_validator("rut", mode="before")(_require_rut)
+    parse_enums = field_validator("tipo", mode="before")(_lower)
+
+
+class ContractImportRow(BaseModel):
+    propiedad_codigo: str = Field(..., max_length=50)
+    arrendatario_rut: str
+    propietario_rut: str
+    fecha_inicio: date
+    fecha_fin: date
+    renta_mensual: Decimal
+    moneda: Currency = Currency.CLP
+    reajuste_tipo: AdjustmentType = AdjustmentType.NONE
+    reajuste_periodo_meses: Optional[int] = None
+    reajuste_factor_inicial: Optional[Decimal] = None
+    dia_pago: Optional[int] = Field(None, ge=1, le=31)
+    garantia_meses: Optional[int] = None
+    comision_pct: Optional[Decimal] = None
+    estado: ContractStatus = ContractStatus.BORRADOR
+    notas: Optional[str] = Field(None, max_length=500)
+
+    validate_ruts = field_validator("arrendatario_rut", "propietario_rut", mode="before")(_require_rut)
+    parse_amounts = field_validator(
+        "renta_mensual", "reajuste_factor_inicial", "comision_pct", mode="before"
+    )(_parse_amount)
+    parse_dates = field_validator("fecha_inicio", "fecha_fin", mode="before")(_parse_date)
+    parse_enums = field_validator("reajuste_tipo", "estado", mode="before")(_lower)
+    parse_currency = field_validator("moneda", mode="before")(_upper)
+
+    @model_validator(mode="after")
+    def check_dates(self) -> "ContractImportRow":
+        if self.fecha_fin < self.fecha_inicio:
+            raise ValueError("fecha_fin anterior a fecha_inicio")
+        return self
+
+
+class ChargeImportRow(BaseModel):
+    """A charge is attached to the property's contract in force on ``periodo``."""
+
+    propiedad_codigo: str = Field(..., max_length=50)
+    periodo: date
+    monto_original: Decimal
+    monto_ajustado: Optional[Decimal] = None
+    fecha_vencimiento: date
+    estado: ChargeState = ChargeState.PENDIENTE
+    mora_monto: Optional[Decimal] = None
+    fecha_pago: Optional[date] = None
+    medio_pago: Optional[str] = Field(None, max_length=100)
+    notas: Optional[str] = Field(None, max_length=500)
+
+    parse_amounts = field_validator("monto_original", "monto_ajustado", "mora_monto", mode="before")(_parse_amount)
+    parse_dates = field_validator("periodo", "fecha_vencimiento", "fecha_pago", mode="before")(_parse_date)
+    parse_enums = field_validator("estado", mode="before")(_lower)
+
+    @field_validator("periodo")
+    @classmethod
+    def first_of_month(cls, value: date) -> date:
+        # Charges are keyed by (contrato_id, first day of the month).
+        return value.replace(day=1)
+
+
+class ImportRowError(BaseModel):
+    fila: int
+    errores: list[str]
+
+
+class ImportReport(BaseModel):
+    entidad: str
+    filas: int = 0
+    insertadas: int = 0
+    actualizadas: int = 0
+    con_error: int = 0
+    dry_run: bool = False
+    errores: list[ImportRowError] = []
+    # Errors beyond IMPORT_MAX_ERRORS are counted but not listed.
+    errores_omitidos: int = 0
+
+
+class ImportAccepted(BaseModel):
+    job_id: UUID
+    document_id: UUID
+    entidad: str
+    dry_run: bool
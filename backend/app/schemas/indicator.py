@@ -0,0 +1,60 @@
+import re
+from datetime import date
+from decimal import Decimal
+from typing import Any, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, field_validator
+
+from app.models.indicator import IndicatorType
+from app.schemas.imports import ImportReport, _parse_amount, _parse_date
+
+# "2024-03" / "03/2024": IPC files usually carry the month only.
+_YEAR_MONTH = re.compile(r"^(\d{4})-(\d{1,2})$")
+_MONTH_YEAR = re.compile(r"^(\d{1,2})[/-](\d{4})$")
+
+
+def _parse_day_or_month(value: Any) -> Any:
+    if isinstance(value, str):
+        raw = value.strip()
+        match = _YEAR_MONTH.match(raw)
+        if match:
+            return date(int(match.group(1)), int(match.group(2)), 1)
+        match = _MONTH_YEAR.match(raw)
+        if match:
+            return date(int(match.group(2)), int(match.group(1)), 1)
+    return _parse_date(value)
+
+
+class IndicatorImportRow(BaseModel):
+    fecha: date
+    valor: Decimal
+
+    parse_amounts = field_validator("valor", mode="before")(_parse_amount)
+    parse_dates = field_validator("fecha", mode="before")(_parse_day_or_month)
+
+
+class IndicatorRead(BaseModel):
+    tipo: IndicatorType
+    fecha: date
+    valor: Decimal
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class IndicatorImportReport(ImportReport):
+    # Earliest date whose value was added or changed; charges due from then on are readjusted.
+    cambios_desde: Optional[date] = None
+    job_id: Optional[UUID] = None
+
+
+class ReadjustmentRequest(BaseModel):
+    desde: Optional[date] = None
+    contrato_ids: Optional[list[UUID]] = None
+
+
+class ReadjustmentResult(BaseModel):
+    revisadas: int = 0
+    actualizadas: int = 0
+    # Charges whose UF/IPC values are not loaded yet; left as they were.
+    sin_indicador: int = 0
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+from app.models.job import JobState
+
+
+class JobRead(BaseModel):
+    id: UUID
+    tipo: str
+    estado: JobState
+    intentos: int
+    max_intentos: int
+    error: str | None = None
+    result: Any = None
+    run_after: datetime
+    finished_at: datetime | None = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
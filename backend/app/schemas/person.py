@@ -2,8 +2,9 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
+from app.core.rut import is_valid_rut
 from app.models.person import PersonType
 
 
@@ -19,8 +20,16 @@ class PersonBase(BaseModel):
     direccion_contacto: Optional[str] = None
 
 
+def _check_rut(value: str | None) -> str | None:
+    if value is None or not value.strip():
+        return None
+    if not is_valid_rut(value):
+        raise ValueError("RUT invalido (digito verificador no coincide)")
+    return value.strip()
+
+
 class PersonCreate(PersonBase):
-    pass
+    validate_rut = field_validator("rut")(_check_rut)
 
 
 class PersonUpdate(BaseModel):
@@ -34,6 +43,8 @@ class PersonUpdate(BaseModel):
     giro: Optional[str] = Field(None, max_length=200)
     direccion_contacto: Optional[str] = None
 
+    validate_rut = field_validator("rut")(_check_rut)
+
 
 class PersonRead(PersonBase):
     id: UUID
@@ -46,3 +46,10 @@ class PropertyRead(PropertyBase):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class PropertyFullQuery(BaseModel):
+    ids: Optional[list[UUID]] = None
+    estado: Optional[PropertyState] = None
+    comuna: Optional[str] = None
+    tipo: Optional[PropertyType] = None
@@ -0,0 +1,46 @@
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.schemas.imports import ImportRowError
+
+
+class StatementTransactionRead(BaseModel):
+    fila: int
+    fecha: date
+    monto: Decimal
+    descripcion: str
+    referencia: Optional[str] = None
+    rut: Optional[str] = None
+
+
+class ReconciliationMatch(BaseModel):
+    transaccion: StatementTransactionRead
+    # alta (applied), media (single suggestion), ambigua, sin_match, ya_aplicada.
+    confianza: str
+    cobranza_id: Optional[UUID] = None
+    candidatos: list[UUID] = []
+    motivos: list[str] = []
+    # Reference to post with when confirming through /charges/payments/bulk; keeps re-runs idempotent.
+    referencia_pago: str
+
+
+class ReconciliationReport(BaseModel):
+    filas: int = 0
+    abonos: int = 0
+    cargos: int = 0
+    aplicadas: int = 0
+    monto_aplicado: Decimal = Decimal("0")
+    ya_aplicadas: int = 0
+    sugeridas: int = 0
+    ambiguas: int = 0
+    sin_match: int = 0
+    dry_run: bool = False
+    conciliadas: list[ReconciliationMatch] = []
+    pendientes: list[ReconciliationMatch] = []
+    # Matches beyond IMPORT_MAX_ERRORS per list are counted but not listed.
+    omitidas: int = 0
+    errores: list[ImportRowError] = []
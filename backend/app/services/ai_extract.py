@@ -22,6 +22,25 @@ _NAME_PREFIXES = [
 ]
 
 
+CONTRACT_PROMPT = (
+    "Eres un extractor de contratos de arriendo en Chile. Devuelve SOLO un JSON plano con estas claves exactas: "
+    "arrendatario_nombre, arrendatario_rut, propietario_nombre, propietario_rut, fecha_inicio (YYYY-MM-DD), "
+    "fecha_fin (YYYY-MM-DD), dia_pago (1-31), renta_mensual (numero en CLP), moneda (CLP o UF), direccion. "
+    "Reglas: 1) No inventes; si falta, usa null. 2) Fechas en ISO; si hay rango, usa inicio mas temprano y fin mas tardio del contrato. "
+    "3) Dia de pago: si dice 'primeros dias habiles', usa 5. 4) Renta: monto principal de arriendo (el mayor si hay varios), en CLP, sin simbolos ni puntos. "
+    "5) RUT: usa el que aparezca (formato 9.999.999-9), no generes uno. 6) Direccion: texto breve del inmueble. "
+    "7) Nombres: elimina conectores ('entre', 'con', 'y'), articulos ('el', 'la'), titulos ('don', 'doña', 'sr', 'sra'). Devuelve solo el nombre completo o razon social tal como aparece, sin palabras extra. "
+    "Ejemplo de salida: {\"arrendatario_nombre\": \"Intendencia Regional de Atacama\", \"arrendatario_rut\": \"60.511.030-4\", \"propietario_nombre\": \"Hector Patricio Olave Fara\", \"propietario_rut\": \"9.647.123-8\", \"fecha_inicio\": \"2003-04-01\", \"fecha_fin\": \"2003-12-31\", \"dia_pago\": 5, \"renta_mensual\": 350000, \"moneda\": \"CLP\", \"direccion\": \"Colipi 611, Copiapo, Atacama\"}. "
+    "Devuelve solo JSON, sin texto extra ni backticks."
+)
+
+RECEIPT_PROMPT = (
+    "Eres un lector de comprobantes de pago en Chile. Devuelve SOLO un JSON plano con estas claves exactas: "
+    "monto_pagado (numero, CLP, sin puntos), fecha_pago (YYYY-MM-DD), medio_pago (texto corto como 'transferencia' o banco), "
+    "referencia (codigo de transaccion u observacion). Si falta un dato usa null. No inventes montos."
+)
+
+
 def _clean_name(name: str | None) -> str | None:
     if not name:
         return None
@@ -60,22 +79,10 @@ def extract_contract_fields(text: str) -> Dict[str, Any]:
     if not client or not text.strip():
         return {}
 
-    prompt = (
-        "Eres un extractor de contratos de arriendo en Chile. Devuelve SOLO un JSON plano con estas claves exactas: "
-        "arrendatario_nombre, arrendatario_rut, propietario_nombre, propietario_rut, fecha_inicio (YYYY-MM-DD), "
-        "fecha_fin (YYYY-MM-DD), dia_pago (1-31), renta_mensual (numero en CLP), moneda (CLP o UF), direccion. "
-        "Reglas: 1) No inventes; si falta, usa null. 2) Fechas en ISO; si hay rango, usa inicio mas temprano y fin mas tardio del contrato. "
-        "3) Dia de pago: si dice 'primeros dias habiles', usa 5. 4) Renta: monto principal de arriendo (el mayor si hay varios), en CLP, sin simbolos ni puntos. "
-        "5) RUT: usa el que aparezca (formato 9.999.999-9), no generes uno. 6) Direccion: texto breve del inmueble. "
-        "7) Nombres: elimina conectores ('entre', 'con', 'y'), articulos ('el', 'la'), titulos ('don', 'doña', 'sr', 'sra'). Devuelve solo el nombre completo o razon social tal como aparece, sin palabras extra. "
-        "Ejemplo de salida: {\"arrendatario_nombre\": \"Intendencia Regional de Atacama\", \"arrendatario_rut\": \"60.511.030-4\", \"propietario_nombre\": \"Hector Patricio Olave Fara\", \"propietario_rut\": \"9.647.123-8\", \"fecha_inicio\": \"2003-04-01\", \"fecha_fin\": \"2003-12-31\", \"dia_pago\": 5, \"renta_mensual\": 350000, \"moneda\": \"CLP\", \"direccion\": \"Colipi 611, Copiapo, Atacama\"}. "
-        "Devuelve solo JSON, sin texto extra ni backticks."
-    )
-
     try:
         resp = client.models.generate_content(
             model=settings.gemini_model,
-            contents=[prompt, f"Texto del contrato:\n{text[:12000]}"]
+            contents=[CONTRACT_PROMPT, f"Texto del contrato:\n{text[:12000]}"]
         )
         content = (resp.text or "").strip()
         if not content:
@@ -104,11 +111,6 @@ def extract_payment_from_image(raw: bytes, mime_type: str | None = None) -> Dict
         return {}
 
     mime = mime_type or "image/jpeg"
-    prompt = (
-        "Eres un lector de comprobantes de pago en Chile. Devuelve SOLO un JSON plano con estas claves exactas: "
-        "monto_pagado (numero, CLP, sin puntos), fecha_pago (YYYY-MM-DD), medio_pago (texto corto como 'transferencia' o banco), "
-        "referencia (codigo de transaccion u observacion). Si falta un dato usa null. No inventes montos."
-    )
 
     def _first_text(resp: Any) -> str:
         try:
@@ -146,7 +148,7 @@ def extract_payment_from_image(raw: bytes, mime_type: str | None = None) -> Dict
         # Try sending raw bytes first.
         resp = client.models.generate_content(
             model=settings.gemini_model,
-            contents=[{"role": "user", "parts": [prompt, {"inline_data": {"mime_type": mime, "data": raw}}]}],
+            contents=[{"role": "user", "parts": [RECEIPT_PROMPT, {"inline_data": {"mime_type": mime, "data": raw}}]}],
         )
         data = _parse_response(resp)
         if data:
@@ -154,7 +156,7 @@ def extract_payment_from_image(raw: bytes, mime_type: str | None = None) -> Dict
         # Fallback: if empty, retry once (some clients require bytes-like again).
         resp2 = client.models.generate_content(
             model=settings.gemini_model,
-            contents=[{"role": "user", "parts": [prompt, {"inline_data": {"mime_type": mime, "data": raw}}]}],
+            contents=[{"role": "user", "parts": [RECEIPT_PROMPT, {"inline_data": {"mime_type": mime, "data": raw}}]}],
         )
         return _parse_response(resp2)
     except Exception:
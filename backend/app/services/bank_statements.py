@@ -0,0 +1,188 @@
+"""Bank statement readers for reconciliation.
+
+Supported inputs:
+
+- CSV/XLSX exports and Chilean bank "cartolas" (Fecha, Descripción/Glosa,
+  N° Documento, Cargos, Abonos, Saldo) read with the bulk import readers;
+  column names are matched through :data:`COLUMN_ALIASES`. A single ``monto``
+  column works too (negative = debit).
+- OFX 1.x (SGML) and 2.x (XML): one transaction per ``<STMTTRN>`` block.
+
+Only credits are returned; debits are counted and dropped. Amounts accept the
+Chilean format (``350.000``). When there is no RUT column, a valid RUT
+written in the description (``TRANSF DE 12.345.678-5``) is used.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any
+
+from app.core.rut import is_valid_rut, normalize_rut
+from app.schemas.imports import _parse_amount, _parse_date
+from app.services.bulk_import import ImportFormatError, open_rows
+
+STATEMENT_SUFFIXES = {".csv", ".txt", ".xlsx", ".xlsm", ".ofx", ".qfx"}
+
+COLUMN_ALIASES: dict[str, tuple[str, ...]] = {
+    "fecha": ("fecha", "fecha_operacion", "fecha_movimiento", "fecha_contable", "fecha_transaccion"),
+    "descripcion": ("descripcion", "glosa", "detalle", "concepto", "descripcion_movimiento", "nombre"),
+    "referencia": (
+        "referencia",
+        "n_documento",
+        "no_documento",
+        "nro_documento",
+        "numero_documento",
+        "n_operacion",
+        "no_operacion",
+        "nro_operacion",
+        "documento",
+    ),
+    "abono": ("abono", "abonos", "depositos_y_abonos", "depositos", "creditos", "haber"),
+    "cargo": ("cargo", "cargos", "cheques_y_otros_cargos", "giros_y_cargos", "debitos", "debe"),
+    "monto": ("monto", "importe", "valor"),
+    "rut": ("rut", "rut_origen", "rut_ordenante", "rut_emisor"),
+}
+
+_RUT_IN_TEXT = re.compile(r"\b(\d{1,2}\.?\d{3}\.?\d{3}-?[\dkK])\b")
+_OFX_BLOCK = re.compile(r"<STMTTRN>(.*?)(?:</STMTTRN>|(?=<STMTTRN>)|(?=</BANKTRANLIST>))", re.S | re.I)
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+
+@dataclass(frozen=True)
+class BankTransaction:
+    fila: int
+    fecha: date
+    monto: Decimal
+    descripcion: str
+    referencia: str | None
+    # Normalized RUT of the payer, when known.
+    rut: str | None
+
+
+@dataclass
+class Statement:
+    transactions: list[BankTransaction]
+    # Rows that are debits or zero.
+    cargos: int
+    # (row number, message) for rows that could not be read.
+    errors: list[tuple[int, str]]
+
+
+def rut_from_text(text: str | None) -> str | None:
+    for candidate in _RUT_IN_TEXT.findall(text or ""):
+        if is_valid_rut(candidate):
+            return normalize_rut(candidate)
+    return None
+
+
+def _amount(value: Any) -> Decimal | None:
+    if value is None or value == "":
+        return None
+    try:
+        return Decimal(str(_parse_amount(value)))
+    except InvalidOperation as exc:
+        raise ValueError(f"monto invalido: {value}") from exc
+
+
+def _date(value: Any) -> date:
+    parsed = _parse_date(value)
+    if isinstance(parsed, date):
+        return parsed
+    try:
+        return date.fromisoformat(str(parsed))
+    except ValueError as exc:
+        raise ValueError(f"fecha invalida: {value}") from exc
+
+
+def _resolve_columns(header: list[str]) -> dict[str, str]:
+    present = set(header)
+    columns = {}
+    for field_name, aliases in COLUMN_ALIASES.items():
+        found = next((alias for alias in aliases if alias in present), None)
+        if found:
+            columns[field_name] = found
+    if "fecha" not in columns or not ({"abono", "monto"} & columns.keys()):
+        raise ImportFormatError("La cartola necesita columnas de fecha y abono (o monto)")
+    return columns
+
+
+def _read_table(path: Path, filename: str) -> Statement:
+    source = open_rows(path, filename)
+    statement = Statement(transactions=[], cargos=0, errors=[])
+    try:
+        columns = _resolve_columns(source.header)
+        for fila, row in source:
+            values = {name: row.get(column) for name, column in columns.items()}
+            try:
+                credit = _amount(values.get("abono"))
+                if credit is None and values.get("monto") is not None:
+                    credit = _amount(values["monto"])
+                if credit is None or credit <= 0:
+                    statement.cargos += 1
+                    continue
+                description = str(values.get("descripcion") or "")
+                reference = values.get("referencia")
+                statement.transactions.append(
+                    BankTransaction(
+                        fila=fila,
+                        fecha=_date(values["fecha"]),
+                        monto=credit,
+                        descripcion=description,
+                        referencia=str(reference) if reference is not None else None,
+                        rut=normalize_rut(str(values["rut"])) if values.get("rut") else rut_from_text(description),
+                    )
+                )
+            except ValueError as exc:
+                statement.errors.append((fila, str(exc)))
+    finally:
+        source.close()
+    return statement
+
+
+def _ofx_date(value: str) -> date:
+    # YYYYMMDD[HHMMSS[.XXX]][[-3:CLT]]
+    return datetime.strptime(value.strip()[:8], "%Y%m%d").date()
+
+
+def _read_ofx(path: Path) -> Statement:
+    raw = path.read_bytes()
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        text = raw.decode("latin-1")
+    blocks = _OFX_BLOCK.findall(text)
+    if not blocks and "<OFX>" not in text.upper():
+        raise ImportFormatError("El archivo no es OFX")
+    statement = Statement(transactions=[], cargos=0, errors=[])
+    for index, block in enumerate(blocks, start=1):
+        fields = {name.upper(): value.strip() for name, value in _OFX_FIELD.findall(block)}
+        try:
+            amount = Decimal(fields.get("TRNAMT", "").replace(",", "."))
+            if amount <= 0:
+                statement.cargos += 1
+                continue
+            description = " ".join(filter(None, (fields.get("NAME"), fields.get("MEMO"))))
+            statement.transactions.append(
+                BankTransaction(
+                    fila=index,
+                    fecha=_ofx_date(fields.get("DTPOSTED", "")),
+                    monto=amount,
+                    descripcion=description,
+                    referencia=fields.get("FITID") or fields.get("CHECKNUM") or fields.get("REFNUM"),
+                    rut=rut_from_text(description),
+                )
+            )
+        except (InvalidOperation, ValueError):
+            statement.errors.append((index, "transaccion OFX sin fecha o monto validos"))
+    return statement
+
+
+def read_statement(path: Path, filename: str) -> Statement:
+    """Parse a statement file (blocking; run on the I/O pool)."""
+    suffix = Path(filename).suffix.lower()
+    if suffix in (".ofx", ".qfx"):
+        return _read_ofx(path)
+    return _read_table(path, filename)
@@ -0,0 +1,287 @@
+"""Pub/sub broker for real-time map changes (``/mapa/stream``).
+
+Write paths publish small events (property state, contracts, payments) after
+their transaction commits. Each stream connection owns a bounded queue: when a
+slow client falls behind, the oldest events are dropped and the client gets a
+``resync`` event telling it to refetch (``/properties/geojson?since=``).
+
+Backends:
+- ``memory`` (default): fan-out inside one process.
+- ``postgres``: ``NOTIFY``/``LISTEN`` on a dedicated asyncpg connection so that
+  every uvicorn worker receives every event. The connection uses
+  ``EVENTS_DATABASE_URL`` (a direct, non-pooled URL) when set and is reopened
+  with backoff when it drops.
+
+Event types starting with ``_`` are internal (e.g. cache invalidation between
+workers): they go to the handlers registered with :meth:`MemoryBroker.on_internal`
+and never to stream clients.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PG_CHANNEL = "sigap_mapa"
+INTERNAL_PREFIX = "_"
+# Delivered locally after the postgres listener reconnects: notifications may have been missed.
+RECONNECTED = "_broker.reconnected"
+
+InternalHandler = Callable[[dict], None]
+
+
+@dataclass
+class Event:
+    type: str
+    data: dict
+    id: int = 0
+    at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def to_json(self) -> str:
+        return json.dumps(jsonable_encoder({"type": self.type, "data": self.data, "at": self.at}))
+
+
+class Subscription:
+    """Bounded per-connection queue that drops the oldest events when full."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.queue: asyncio.Queue[Event] = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, event: Event) -> None:
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float | None = None) -> Event | None:
+        """Next event, a ``resync`` marker if events were dropped, or None on timeout."""
+        if self.dropped:
+            self.dropped = 0
+            return Event(type="resync", data={})
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class MemoryBroker:
+    def __init__(self, queue_size: int = 256) -> None:
+        self.queue_size = queue_size
+        self._subscribers: set[Subscription] = set()
+        self._internal: dict[str, list[InternalHandler]] = {}
+        self._ids = itertools.count(1)
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        self._subscribers.clear()
+
+    def subscribe(self) -> Subscription:
+        sub = Subscription(self.queue_size)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def on_internal(self, event_type: str, handler: InternalHandler) -> None:
+        """Call ``handler(data)`` for internal ``event_type`` events (published by any worker)."""
+        self._internal.setdefault(event_type, []).append(handler)
+
+    def _deliver(self, event: Event) -> None:
+        if event.type.startswith(INTERNAL_PREFIX):
+            for handler in self._internal.get(event.type, ()):
+                try:
+                    handler(event.data)
+                except Exception:
+                    logger.exception("Internal event handler failed for %s", event.type)
+            return
+        event.id = next(self._ids)
+        for sub in list(self._subscribers):
+            sub.offer(event)
+
+    async def publish(self, event: Event) -> None:
+        self._deliver(event)
+
+
+class PostgresBroker(MemoryBroker):
+    """Fans events out through ``LISTEN/NOTIFY`` so all workers see them.
+
+    The listening connection is supervised: when it drops (or fails the
+    periodic health check) it is reopened with exponential backoff, and after
+    each reconnect local stream clients get a ``resync`` and the
+    :data:`RECONNECTED` internal event fires, since notifications sent while
+    disconnected are lost.
+    """
+
+    def __init__(self, queue_size: int = 256) -> None:
+        super().__init__(queue_size)
+        self._conn: Any = None
+        self._lost = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._supervisor: asyncio.Task | None = None
+
+    async def _connect(self):
+        import asyncpg
+
+        from app.db.session import _sanitize_database_url
+
+        # LISTEN needs a session of its own: use a direct URL, not a transaction-mode pooler.
+        url, connect_args = _sanitize_database_url(settings.events_database_url or settings.database_url)
+        dsn = url.set(drivername="postgresql", query={}).render_as_string(hide_password=False)
+        return await asyncpg.connect(
+            dsn, ssl=connect_args.get("ssl"), statement_cache_size=connect_args.get("statement_cache_size", 0)
+        )
+
+    async def _listen(self) -> None:
+        conn = await self._connect()
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _conn: lost.set())
+        try:
+            await conn.add_listener(PG_CHANNEL, self._on_notify)
+        except Exception:
+            conn.terminate()
+            raise
+        self._conn, self._lost = conn, lost
+
+    def _drop(self) -> None:
+        if self._conn is not None:
+            self._conn.terminate()
+            self._conn = None
+        self._lost.set()
+
+    async def start(self) -> None:
+        from app.db.session import POOL_MODE_PGBOUNCER
+
+        if settings.events_database_url is None and settings.db_pool_mode == POOL_MODE_PGBOUNCER:
+            logger.warning(
+                "EVENTS_BACKEND=postgres with DB_POOL_MODE=pgbouncer and no EVENTS_DATABASE_URL: "
+                "LISTEN does not work through a transaction-mode pooler"
+            )
+        try:
+            await self._listen()
+        except Exception:
+            logger.exception("Could not open the events listener; retrying in the background")
+            self._lost.set()
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    async def _supervise(self) -> None:
+        delay = settings.events_reconnect_min_seconds
+        while True:
+            if self._conn is not None:
+                await self._wait_lost()
+                logger.warning("Events listener connection lost; reconnecting")
+                self._drop()
+                delay = settings.events_reconnect_min_seconds
+            await asyncio.sleep(delay)
+            try:
+                await self._listen()
+            except Exception as exc:
+                delay = min(delay * 2, settings.events_reconnect_max_seconds)
+                logger.warning("Events listener reconnect failed (%s); next attempt in %.0fs", exc, delay)
+                continue
+            logger.info("Events listener reconnected")
+            self._deliver(Event(type="resync", data={}))
+            self._deliver(Event(type=RECONNECTED, data={}))
+
+    async def _wait_lost(self) -> None:
+        """Return once the listening connection is gone or stops answering."""
+        while True:
+            try:
+                await asyncio.wait_for(self._lost.wait(), settings.events_healthcheck_seconds)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                async with self._lock:
+                    await self._conn.execute("SELECT 1", timeout=settings.events_healthcheck_seconds)
+            except Exception:
+                return
+
+    async def stop(self) -> None:
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            try:
+                await self._supervisor
+            except asyncio.CancelledError:
+                pass
+            self._supervisor = None
+        if self._conn is not None:
+            try:
+                await self._conn.close()
+            except Exception:
+                logger.exception("Could not close the events listener")
+            self._conn = None
+        await super().stop()
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            raw = json.loads(payload)
+            self._deliver(Event(type=raw["type"], data=raw.get("data") or {}, at=datetime.fromisoformat(raw["at"])))
+        except Exception:
+            logger.exception("Invalid notification on %s", channel)
+
+    async def publish(self, event: Event) -> None:
+        conn = self._conn
+        if conn is None:
+            # Disconnected: local clients still get it; other workers resync on reconnect.
+            self._deliver(event)
+            return
+        try:
+            async with self._lock:
+                await conn.execute("SELECT pg_notify($1, $2)", PG_CHANNEL, event.to_json())
+        except Exception:
+            logger.warning("Could not notify %s; delivering locally", event.type, exc_info=True)
+            if conn is self._conn:
+                self._drop()
+            self._deliver(event)
+
+
+def _build_broker() -> MemoryBroker:
+    if settings.events_backend == "postgres":
+        return PostgresBroker(settings.events_queue_size)
+    return MemoryBroker(settings.events_queue_size)
+
+
+broker = _build_broker()
+
+
+async def publish(event_type: str, **data: Any) -> None:
+    """Publish after commit; failures are logged and never break the write."""
+    try:
+        await broker.publish(Event(type=event_type, data=data))
+    except Exception:
+        logger.exception("Could not publish %s", event_type)
+
+
+_pending: set[asyncio.Task] = set()
+
+
+def publish_soon(event_type: str, **data: Any) -> None:
+    """Schedule :func:`publish` from synchronous code (commit hooks); a no-op outside an event loop."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Sync engines (migrations, scripts) have no loop and no peers to notify.
+        return
+    task = loop.create_task(publish(event_type, **data))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
@@ -0,0 +1,545 @@
+"""Bulk import of legacy portfolio spreadsheets (CSV/XLSX).
+
+Rows are read one at a time (``csv`` or openpyxl in read-only mode, on the I/O
+pool) and handled in batches of ``IMPORT_BATCH_SIZE``. Each batch is validated
+with the ``*ImportRow`` schemas, then its foreign keys are resolved with a
+single query per referenced table (properties by ``codigo``, persons by
+normalized RUT, contracts by property), and it is written with multi-row
+statements:
+
+- ``propiedades``, ``personas`` and ``cobranzas``: ``INSERT ... ON CONFLICT``
+  on ``codigo`` / ``rut_normalizado`` / ``(contrato_id, periodo)``. A person
+  matched by normalized RUT keeps the spelling of ``rut`` already stored; only
+  the other columns are updated. Charge state and payment date belong to the
+  payment ledger (``app.services.payments``): rows marked paid are rejected,
+  updates never touch ``estado``/``fecha_pago``, and new amounts re-derive the
+  state from ``monto_pagado_total``.
+- ``contratos`` (key: property + ``fecha_inicio``) have no unique constraint:
+  existing keys are looked up in bulk and the batch is split into a bulk
+  insert and a bulk update by primary key.
+
+Every batch commits on its own, so memory stays flat and a failed batch only
+loses its own rows; re-running a file is idempotent. Updates only touch the
+columns present in the file. Rows that fail validation or reference unknown
+records are reported with their spreadsheet row number.
+"""
+
+import csv
+import json
+import logging
+import unicodedata
+import uuid
+from calendar import monthrange
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator
+
+from geoalchemy2 import WKTElement
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.executors import run_io
+from app.core.rut import normalize_rut
+from app.db.session import AsyncSessionLocal
+from app.db.upsert import insert_for
+from app.models.charge import Charge, ChargeState
+from app.models.contract import LeaseContract
+from app.models.document import Document
+from app.models.person import Person
+from app.models.property import Property
+from app.schemas.imports import (
+    ChargeImportRow,
+    ContractImportRow,
+    ImportReport,
+    ImportRowError,
+    PersonImportRow,
+    PropertyImportRow,
+)
+from app.services.broker import publish
+from app.services.jobs import JobContext, JobError, job_handler
+from app.services.map_version import MAP_LOGGED, OP_INSERT, OP_UPDATE, log_map_changes, tenant_properties
+from app.services.payments import resettle_charges
+from app.services.persons import find_persons_by_rut
+from app.services.storage import fetch_to_temp
+
+logger = logging.getLogger(__name__)
+
+PROPIEDADES = "propiedades"
+PERSONAS = "personas"
+CONTRATOS = "contratos"
+COBRANZAS = "cobranzas"
+
+IMPORT_JOB = "imports.portfolio"
+
+# Charge states that only the payment ledger may set.
+LEDGER_STATES = (ChargeState.PAGADO, ChargeState.PARCIAL)
+
+CSV_SNIFF_BYTES = 64 * 1024
+
+Batch = list[tuple[int, Any]]
+
+
+class ImportFormatError(Exception):
+    """The file cannot be imported at all (format, encoding, missing columns)."""
+
+
+def normalize_header(name: Any) -> str:
+    """``"Código Propiedad "`` -> ``"codigo_propiedad"``."""
+    text = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode("ascii")
+    return "_".join("".join(c if c.isalnum() else " " for c in text.lower()).split())
+
+
+def _cell(value: Any) -> Any:
+    """Spreadsheet cell -> value the row schemas accept (numbers as text, blanks as None)."""
+    if value is None or (isinstance(value, (bool, date)) and not isinstance(value, datetime)):
+        return value
+    if isinstance(value, datetime):
+        return value.date() if value.time() == datetime.min.time() else value
+    if isinstance(value, str):
+        return value.strip() or None
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return value
+
+
+class RowSource:
+    """Header plus an iterator of ``(row_number, {column: value})``; blank rows are skipped."""
+
+    def __init__(self, header: list[str], rows: Iterator[tuple[Any, ...]], close: Callable[[], None]) -> None:
+        self.header = header
+        self._rows = rows
+        self._close = close
+
+    def __iter__(self) -> Iterator[tuple[int, dict[str, Any]]]:
+        for number, values in enumerate(self._rows, start=2):
+            row = {name: _cell(value) for name, value in zip(self.header, values) if name}
+            if any(value is not None for value in row.values()):
+                yield number, row
+
+    def close(self) -> None:
+        self._close()
+
+
+def _open_csv(path: Path) -> RowSource:
+    with path.open("rb") as probe:
+        sample = probe.read(CSV_SNIFF_BYTES)
+    # Excel on Windows exports CSV as cp1252 unless told otherwise.
+    try:
+        sample.decode("utf-8")
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError as exc:
+        # A multi-byte character cut at the end of the sample is still UTF-8.
+        encoding = "utf-8-sig" if exc.start >= len(sample) - 3 else "cp1252"
+    text_sample = sample.decode(encoding, errors="ignore")
+    try:
+        dialect = csv.Sniffer().sniff(text_sample, delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    handle = path.open("r", encoding=encoding, newline="")
+    reader = csv.reader(handle, dialect)
+    header = [normalize_header(name) for name in next(reader, [])]
+    return RowSource(header, reader, handle.close)
+
+
+def _open_xlsx(path: Path) -> RowSource:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ImportFormatError("Importar .xlsx requiere openpyxl") from exc
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ImportFormatError(f"No se pudo leer el archivo Excel: {exc}") from exc
+    rows = workbook.worksheets[0].iter_rows(values_only=True)
+    header = [normalize_header(name) for name in next(rows, ())]
+    return RowSource(header, rows, workbook.close)
+
+
+def open_rows(path: Path, filename: str) -> RowSource:
+    suffix = Path(filename).suffix.lower()
+    if suffix in (".csv", ".txt"):
+        return _open_csv(path)
+    if suffix in (".xlsx", ".xlsm"):
+        return _open_xlsx(path)
+    raise ImportFormatError("Formato no soportado; use .csv o .xlsx")
+
+
+def _error_messages(exc: ValidationError) -> list[str]:
+    messages = []
+    for error in exc.errors():
+        loc = ".".join(str(part) for part in error["loc"])
+        msg = error["msg"].removeprefix("Value error, ")
+        messages.append(f"{loc}: {msg}" if loc else msg)
+    return messages
+
+
+@dataclass
+class BatchResult:
+    inserted: int = 0
+    updated: int = 0
+    # Rows skipped while resolving references: (row number, messages).
+    errors: list[tuple[int, list[str]]] = field(default_factory=list)
+
+    def reject(self, fila: int, *messages: str) -> None:
+        self.errors.append((fila, list(messages)))
+
+
+def _add_error(report: ImportReport, fila: int, *messages: str) -> None:
+    report.con_error += 1
+    if len(report.errores) < settings.import_max_errors:
+        report.errores.append(ImportRowError(fila=fila, errores=list(messages)))
+    else:
+        report.errores_omitidos += 1
+
+
+def _last_per_key(rows: Batch, key: Callable[[Any], Any]) -> dict[Any, tuple[int, Any]]:
+    """Deduplicate a batch by natural key; a later row for the same key wins."""
+    return {key(row): (fila, row) for fila, row in rows}
+
+
+def _in_chunks(values: list, size: int = 1000) -> Iterator[list]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+async def _property_ids(session: AsyncSession, codes: set[str]) -> dict[str, uuid.UUID]:
+    found: dict[str, uuid.UUID] = {}
+    for chunk in _in_chunks(sorted(codes)):
+        result = await session.execute(select(Property.codigo, Property.id).where(Property.codigo.in_(chunk)))
+        found.update(dict(result.tuples().all()))
+    return found
+
+
+def _point(lat: float | None, lon: float | None) -> WKTElement | None:
+    if lat is None or lon is None:
+        return None
+    return WKTElement(f"POINT({lon} {lat})", srid=4326)
+
+
+async def _upsert(
+    session: AsyncSession, model, rows: list[dict], conflict_columns: list, update_columns: list[str]
+) -> list[uuid.UUID]:
+    """Multi-row upsert; returns the ids of the inserted or updated rows.
+
+    Map tables are logged by the callers (``log_map_changes``) with the ids they know.
+    """
+    stmt = insert_for(session, model).values(rows)
+    set_ = {name: stmt.excluded[name] for name in update_columns}
+    set_["updated_at"] = func.now()
+    result = await session.execute(
+        stmt.on_conflict_do_update(index_elements=conflict_columns, set_=set_)
+        .returning(model.id)
+        .execution_options(**{MAP_LOGGED: True})
+    )
+    return list(result.scalars())
+
+
+async def _import_properties(
+    session: AsyncSession, rows: Batch, columns: set[str], dry_run: bool
+) -> BatchResult:
+    latest = _last_per_key(rows, lambda row: row.codigo)
+    existing = await _property_ids(session, set(latest))
+    result = BatchResult(inserted=len(latest.keys() - existing.keys()), updated=len(existing))
+    if dry_run:
+        return result
+
+    update_columns = sorted((columns & PropertyImportRow.model_fields.keys()) - {"codigo", "lat", "lon"})
+    if {"lat", "lon"} <= columns:
+        update_columns += ["lat", "lon", "latlon"]
+    values = []
+    for _, row in latest.values():
+        data = row.model_dump()
+        data["id"] = uuid.uuid4()
+        data["latlon"] = _point(row.lat, row.lon)
+        values.append(data)
+    ids = await _upsert(session, Property, values, [Property.codigo], update_columns)
+    known = set(existing.values())
+    await log_map_changes(session, {prop_id: OP_UPDATE if prop_id in known else OP_INSERT for prop_id in ids})
+    return result
+
+
+async def _import_persons(
+    session: AsyncSession, rows: Batch, columns: set[str], dry_run: bool
+) -> BatchResult:
+    latest = _last_per_key(rows, lambda row: normalize_rut(row.rut))
+    existing = await find_persons_by_rut(session, latest)
+    result = BatchResult(inserted=len(latest.keys() - existing.keys()), updated=len(existing))
+    if dry_run:
+        return result
+
+    update_columns = sorted((columns & PersonImportRow.model_fields.keys()) - {"rut"})
+    values = []
+    for normalized, (_, row) in latest.items():
+        data = row.model_dump()
+        # Existing people keep their stored spelling: ``rut`` is never in update_columns.
+        data["rut_normalizado"] = normalized
+        data["id"] = uuid.uuid4()
+        values.append(data)
+    await _upsert(session, Person, values, [Person.rut_normalizado], update_columns)
+    if existing and {"nombres", "apellidos"} & set(update_columns):
+        # New people rent nothing yet; renamed tenants change their properties' features.
+        rented = await tenant_properties(session, [person.id for person in existing.values()])
+        await log_map_changes(session, dict.fromkeys(rented, OP_UPDATE))
+    return result
+
+
+async def _apply_by_key(
+    session: AsyncSession,
+    model,
+    resolved: dict[tuple, dict],
+    existing: dict[tuple, uuid.UUID],
+    update_columns: list[str],
+    result: BatchResult,
+    dry_run: bool,
+) -> BatchResult:
+    inserts = [{"id": uuid.uuid4(), **data} for key, data in resolved.items() if key not in existing]
+    updates = [
+        {"id": existing[key], **{name: data[name] for name in update_columns}}
+        for key, data in resolved.items()
+        if key in existing
+    ]
+    result.inserted += len(inserts)
+    result.updated += len(updates)
+    if dry_run:
+        return result
+    # Map tables are logged by the callers with the ids they know.
+    options = {MAP_LOGGED: True}
+    if inserts:
+        await session.execute(insert(model), inserts, execution_options=options)
+    if updates and update_columns:
+        await session.execute(update(model), updates, execution_options=options)
+    return result
+
+
+async def _import_contracts(
+    session: AsyncSession, rows: Batch, columns: set[str], dry_run: bool
+) -> BatchResult:
+    properties = await _property_ids(session, {row.propiedad_codigo for _, row in rows})
+    persons = await find_persons_by_rut(
+        session, [rut for _, row in rows for rut in (row.arrendatario_rut, row.propietario_rut)]
+    )
+
+    result = BatchResult()
+    resolved: dict[tuple, dict] = {}
+    for fila, row in rows:
+        prop_id = properties.get(row.propiedad_codigo)
+        tenant = persons.get(normalize_rut(row.arrendatario_rut))
+        owner = persons.get(normalize_rut(row.propietario_rut))
+        problems = []
+        if prop_id is None:
+            problems.append(f"propiedad_codigo: propiedad {row.propiedad_codigo} no existe")
+        if tenant is None:
+            problems.append(f"arrendatario_rut: persona {row.arrendatario_rut} no existe")
+        if owner is None:
+            problems.append(f"propietario_rut: persona {row.propietario_rut} no existe")
+        if problems:
+            result.reject(fila, *problems)
+            continue
+        data = row.model_dump(exclude={"propiedad_codigo", "arrendatario_rut", "propietario_rut"})
+        data.update(propiedad_id=prop_id, arrendatario_id=tenant.id, propietario_id=owner.id)
+        resolved[(prop_id, row.fecha_inicio)] = data
+    if not resolved:
+        return result
+
+    existing: dict[tuple, uuid.UUID] = {}
+    prop_ids = sorted({prop_id for prop_id, _ in resolved})
+    for chunk in _in_chunks(prop_ids):
+        found = await session.execute(
+            select(LeaseContract.propiedad_id, LeaseContract.fecha_inicio, LeaseContract.id).where(
+                LeaseContract.propiedad_id.in_(chunk)
+            )
+        )
+        for prop_id, start, contract_id in found:
+            existing.setdefault((prop_id, start), contract_id)
+
+    renamed = {"arrendatario_rut": "arrendatario_id", "propietario_rut": "propietario_id"}
+    update_columns = sorted(
+        renamed.get(name, name)
+        for name in columns & ContractImportRow.model_fields.keys()
+        if name not in ("propiedad_codigo", "fecha_inicio")
+    )
+    result = await _apply_by_key(session, LeaseContract, resolved, existing, update_columns, result, dry_run)
+    if not dry_run:
+        await log_map_changes(session, dict.fromkeys({prop_id for prop_id, _ in resolved}, OP_UPDATE))
+    return result
+
+
+def _month_bounds(periodo: date) -> tuple[date, date]:
+    return periodo.replace(day=1), periodo.replace(day=monthrange(periodo.year, periodo.month)[1])
+
+
+async def _import_charges(
+    session: AsyncSession, rows: Batch, columns: set[str], dry_run: bool
+) -> BatchResult:
+    properties = await _property_ids(session, {row.propiedad_codigo for _, row in rows})
+    contracts: dict[uuid.UUID, list[tuple[date, date, uuid.UUID]]] = {}
+    for chunk in _in_chunks(sorted(set(properties.values()))):
+        found = await session.execute(
+            select(LeaseContract.propiedad_id, LeaseContract.fecha_inicio, LeaseContract.fecha_fin, LeaseContract.id)
+            .where(LeaseContract.propiedad_id.in_(chunk))
+            .order_by(LeaseContract.fecha_inicio)
+        )
+        for prop_id, start, end, contract_id in found:
+            contracts.setdefault(prop_id, []).append((start, end, contract_id))
+
+    result = BatchResult()
+    resolved: dict[tuple, dict] = {}
+    for fila, row in rows:
+        prop_id = properties.get(row.propiedad_codigo)
+        if prop_id is None:
+            result.reject(fila, f"propiedad_codigo: propiedad {row.propiedad_codigo} no existe")
+            continue
+        month_start, month_end = _month_bounds(row.periodo)
+        # Latest contract overlapping the charged month.
+        contract_id = next(
+            (cid for start, end, cid in reversed(contracts.get(prop_id, [])) if start <= month_end and end >= month_start),
+            None,
+        )
+        if contract_id is None:
+            result.reject(fila, f"periodo: sin contrato para {row.propiedad_codigo} en {row.periodo:%Y-%m}")
+            continue
+        if row.estado in LEDGER_STATES or row.fecha_pago is not None:
+            # A paid state without payments behind it would break balances, the sweep and reconciliation.
+            result.reject(fila, "estado: los pagos se registran con POST /charges/payments/bulk, no por importacion")
+            continue
+        data = row.model_dump(exclude={"propiedad_codigo"})
+        data["contrato_id"] = contract_id
+        resolved[(contract_id, row.periodo)] = data
+    if not resolved:
+        return result
+
+    existing: dict[tuple, uuid.UUID] = {}
+    contract_ids = sorted({contract_id for contract_id, _ in resolved})
+    for chunk in _in_chunks(contract_ids):
+        found = await session.execute(
+            select(Charge.contrato_id, Charge.periodo, Charge.id).where(Charge.contrato_id.in_(chunk))
+        )
+        for contract_id, periodo, charge_id in found:
+            existing.setdefault((contract_id, periodo), charge_id)
+
+    result.inserted = len(resolved.keys() - existing.keys())
+    result.updated = len(resolved.keys() & existing.keys())
+    if dry_run:
+        return result
+    # State and payment date belong to the payment ledger: existing charges keep theirs.
+    update_columns = sorted(
+        (columns & ChargeImportRow.model_fields.keys()) - {"propiedad_codigo", "periodo", "estado", "fecha_pago"}
+    )
+    values = [{"id": uuid.uuid4(), **data} for data in resolved.values()]
+    await _upsert(session, Charge, values, [Charge.contrato_id, Charge.periodo], update_columns)
+    if {"monto_original", "monto_ajustado"} & set(update_columns):
+        # A new amount can settle or reopen a charge that already has payments.
+        await resettle_charges(session, [existing[key] for key in resolved.keys() & existing.keys()])
+    return result
+
+
+BatchHandler = Callable[[AsyncSession, Batch, set[str], bool], Awaitable[BatchResult]]
+
+
+@dataclass(frozen=True)
+class EntitySpec:
+    row_model: type[BaseModel]
+    handler: BatchHandler
+
+    @property
+    def required_columns(self) -> set[str]:
+        return {name for name, info in self.row_model.model_fields.items() if info.is_required()}
+
+
+ENTITIES: dict[str, EntitySpec] = {
+    PROPIEDADES: EntitySpec(PropertyImportRow, _import_properties),
+    PERSONAS: EntitySpec(PersonImportRow, _import_persons),
+    CONTRATOS: EntitySpec(ContractImportRow, _import_contracts),
+    COBRANZAS: EntitySpec(ChargeImportRow, _import_charges),
+}
+
+
+def _next_batch(rows: Iterator[tuple[int, dict]], size: int) -> list[tuple[int, dict]]:
+    return list(islice(rows, size))
+
+
+async def import_file(
+    session: AsyncSession,
+    entidad: str,
+    path: Path,
+    filename: str,
+    *,
+    dry_run: bool = False,
+    batch_size: int | None = None,
+) -> ImportReport:
+    """Import ``path`` into ``entidad``; commits per batch (or rolls back everything on ``dry_run``)."""
+    spec = ENTITIES.get(entidad)
+    if spec is None:
+        raise ImportFormatError(f"Entidad desconocida: {entidad}")
+    size = batch_size or settings.import_batch_size
+    report = ImportReport(entidad=entidad, dry_run=dry_run)
+
+    source = await run_io(open_rows, path, filename)
+    try:
+        columns = set(source.header)
+        missing = spec.required_columns - columns
+        if missing:
+            raise ImportFormatError(f"Faltan columnas: {', '.join(sorted(missing))}")
+        rows = iter(source)
+        while batch := await run_io(_next_batch, rows, size):
+            valid: Batch = []
+            for fila, raw in batch:
+                try:
+                    valid.append((fila, spec.row_model.model_validate(raw)))
+                except ValidationError as exc:
+                    _add_error(report, fila, *_error_messages(exc))
+            report.filas += len(batch)
+            if not valid:
+                continue
+            try:
+                result = await spec.handler(session, valid, columns, dry_run)
+                if dry_run:
+                    await session.rollback()
+                else:
+                    await session.commit()
+            except SQLAlchemyError as exc:
+                await session.rollback()
+                logger.warning("Import batch %s-%s failed: %s", valid[0][0], valid[-1][0], exc)
+                detail = str(getattr(exc, "orig", None) or exc).splitlines()[0][:300]
+                for fila, _ in valid:
+                    _add_error(report, fila, f"Lote rechazado por la base de datos: {detail}")
+                continue
+            report.insertadas += result.inserted
+            report.actualizadas += result.updated
+            for fila, messages in result.errors:
+                _add_error(report, fila, *messages)
+    finally:
+        await run_io(source.close)
+    return report
+
+
+@job_handler(IMPORT_JOB)
+async def _import_job(ctx: JobContext) -> dict:
+    payload = ctx.payload
+    filename = payload["filename"]
+    path = await fetch_to_temp(payload["storage_key"], Path(filename).suffix)
+    try:
+        # Own session: batches commit as they go, independently of the job row.
+        async with AsyncSessionLocal() as session:
+            report = await import_file(
+                session, payload["entidad"], path, filename, dry_run=bool(payload.get("dry_run"))
+            )
+    except ImportFormatError as exc:
+        raise JobError(str(exc)) from exc
+    finally:
+        await run_io(path.unlink, missing_ok=True)
+
+    summary = report.model_dump(mode="json", exclude={"errores"})
+    document = await ctx.session.get(Document, uuid.UUID(payload["document_id"]))
+    if document is not None:
+        document.metadata_json = json.dumps({"job_id": str(ctx.job.id), **summary})
+    if not report.dry_run:
+        ctx.after_commit(lambda: publish("import.completed", job_id=ctx.job.id, **summary))
+    return report.model_dump(mode="json")
@@ -0,0 +1,142 @@
+"""Monthly charge generation (motor de cobranza).
+
+One ``INSERT ... SELECT`` creates the charges of every VIGENTE contract for a
+range of months. The months come in as a small ``VALUES`` calendar built in
+Python with one row per (month, pay day 1..31) and the due date already
+clamped to the month's last day, so the statement needs no dialect-specific
+date arithmetic. A contract owes a month when its term overlaps it; the due
+date uses ``dia_pago`` (``CHARGES_DEFAULT_PAY_DAY`` when missing).
+
+``ON CONFLICT (contrato_id, periodo) DO NOTHING`` on
+``uq_cobranzas_contrato_periodo`` makes runs idempotent: existing charges,
+manual or paid, are never touched. ``periodo`` is the first day of the month,
+as for charges created from receipts. When charges were created, the
+readjustment engine fills in ``monto_ajustado`` for the same range.
+"""
+
+import logging
+from calendar import monthrange
+from datetime import date
+from uuid import UUID
+
+from sqlalchemy import Date, Integer, and_, case, cast, column, literal, select, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.clock import add_months, local_today, month_start
+from app.core.config import settings
+from app.db.upsert import insert_for, new_uuid
+from app.models.charge import Charge, ChargeState
+from app.models.contract import ContractStatus, LeaseContract
+from app.services.broker import publish
+from app.services.jobs import JobContext, job_handler
+from app.services.readjustment import recompute_adjustments
+from app.services.scheduler import Schedule, daily_at, register_schedule
+
+logger = logging.getLogger(__name__)
+
+CHARGE_GENERATION_JOB = "charges.generate"
+
+
+def month_range(start: date, end: date) -> list[date]:
+    months: list[date] = []
+    current = month_start(start)
+    while current <= end:
+        months.append(current)
+        current = add_months(current, 1)
+    return months
+
+
+def _calendar(months: list[date]):
+    rows = []
+    for periodo in months:
+        last_day = monthrange(periodo.year, periodo.month)[1]
+        fin_mes = periodo.replace(day=last_day)
+        for dia in range(1, 32):
+            rows.append((periodo, fin_mes, dia, periodo.replace(day=min(dia, last_day))))
+    return values(
+        column("periodo", Date),
+        column("fin_mes", Date),
+        column("dia", Integer),
+        column("vencimiento", Date),
+        name="calendario",
+    ).data(rows)
+
+
+async def generate_charges(
+    session: AsyncSession,
+    period_from: date,
+    period_to: date,
+    contract_ids: list[UUID] | None = None,
+) -> int:
+    """Create the missing charges for ``period_from``..``period_to`` (by month); returns how many were inserted."""
+    months = month_range(period_from, period_to)
+    if not months:
+        return 0
+    calendar = _calendar(months)
+    default_day = settings.charges_default_pay_day
+    pay_day = case((LeaseContract.dia_pago.between(1, 31), LeaseContract.dia_pago), else_=default_day)
+
+    source = (
+        select(
+            new_uuid(session),
+            LeaseContract.id,
+            calendar.c.periodo,
+            LeaseContract.renta_mensual,
+            calendar.c.vencimiento,
+            # Enum columns store member names.
+            cast(literal(ChargeState.PENDIENTE.name), Charge.estado.type),
+        )
+        .select_from(LeaseContract)
+        .join(
+            calendar,
+            and_(
+                calendar.c.dia == pay_day,
+                LeaseContract.fecha_inicio <= calendar.c.fin_mes,
+                LeaseContract.fecha_fin >= calendar.c.periodo,
+            ),
+        )
+        .where(LeaseContract.estado == ContractStatus.VIGENTE)
+    )
+    if contract_ids:
+        source = source.where(LeaseContract.id.in_(contract_ids))
+
+    stmt = insert_for(session, Charge).from_select(
+        ["id", "contrato_id", "periodo", "monto_original", "fecha_vencimiento", "estado"], source
+    )
+    result = await session.execute(
+        stmt.on_conflict_do_nothing(index_elements=[Charge.contrato_id, Charge.periodo])
+    )
+    created = max(result.rowcount or 0, 0)
+    if created:
+        await recompute_adjustments(session, contract_ids=contract_ids, since=months[0])
+    return created
+
+
+def default_window(today: date | None = None) -> tuple[date, date]:
+    """Current month plus ``CHARGES_MONTHS_AHEAD`` months."""
+    start = month_start(today or local_today())
+    return start, add_months(start, settings.charges_months_ahead)
+
+
+@job_handler(CHARGE_GENERATION_JOB)
+async def _generate_charges_job(ctx: JobContext) -> dict:
+    payload = ctx.payload
+    default_from, default_to = default_window()
+    period_from = date.fromisoformat(payload["periodo_desde"]) if payload.get("periodo_desde") else default_from
+    period_to = date.fromisoformat(payload["periodo_hasta"]) if payload.get("periodo_hasta") else default_to
+    created = await generate_charges(ctx.session, period_from, period_to)
+    logger.info("Generated %s charges for %s..%s", created, period_from, period_to)
+    if created:
+        ctx.after_commit(
+            lambda: publish("charges.generated", periodo_desde=period_from, periodo_hasta=period_to, creadas=created)
+        )
+    return {"periodo_desde": period_from, "periodo_hasta": period_to, "creadas": created}
+
+
+register_schedule(
+    Schedule(
+        nombre="generar_cobranzas",
+        job_tipo=CHARGE_GENERATION_JOB,
+        next_run=daily_at(settings.charges_generation_hour),
+    )
+)
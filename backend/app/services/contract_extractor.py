@@ -0,0 +1,266 @@
+"""Rule-based field extraction from lease contract text.
+
+All patterns are compiled once at import. ``scan`` walks the text a single time
+over numeric tokens (maximal runs of ``[0-9.,/-kK]`` starting with a digit) and
+collects every candidate the rules need, with its offset:
+
+- amounts, generic RUTs and numeric dates, matched inside each token (none of
+  these patterns can cross a token boundary);
+- written dates ("5 de marzo de 2024") and "N primeros dias habiles", probed at
+  token ends since both start with the last one or two digits of a token.
+
+Labelled rules ("renta mensual ... 350.000", "inicio ... 01/03/2024") find the
+label with a precompiled pattern and take the first token after it by bisecting
+token offsets, instead of rescanning the text per field. Gemini values in
+``ai_data`` always win over these fallbacks.
+"""
+
+import re
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+MONTHS = {
+    "enero": 1,
+    "febrero": 2,
+    "marzo": 3,
+    "abril": 4,
+    "mayo": 5,
+    "junio": 6,
+    "julio": 7,
+    "agosto": 8,
+    "septiembre": 9,
+    "setiembre": 9,
+    "octubre": 10,
+    "noviembre": 11,
+    "diciembre": 12,
+}
+
+NAME_CONTEXT_CHARS = 80
+
+_TOKEN = re.compile(r"[0-9][0-9.,/\-kK]*")
+_LEADING_INT = re.compile(r"\d{1,2}")
+_AMOUNT = re.compile(r"[0-9]{1,3}(?:[\.\,][0-9]{3})*(?:[\.,][0-9]+)?")
+_AMOUNT_RUN = re.compile(r"[0-9\.\,]+")
+_RUT = re.compile(r"\d{1,2}\.?\d{3}\.?\d{3}-[0-9Kk]")
+_NUMERIC_DATE = re.compile(r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}")
+_NUMERIC_DATE_FORMATS = ("%d-%m-%Y", "%d/%m/%Y", "%d-%m-%y", "%d/%m/%y")
+_WRITTEN_DATE = re.compile(r"(?i)(\d{1,2})\s+de\s+([a-záéíóú]+)\s+(?:de|del)\s+(\d{4})")
+_PAY_DAY_N = re.compile(r"(?i)(\d{1,2})\s+primeros\s+d[ií]as\s+h[aá]biles")
+_PAY_DAY_CINCO = re.compile(r"(?i)cinco\s+primeros\s+d[ií]as\s+h[aá]biles")
+_START_SENTENCE = re.compile(r"(?i)regir el d[ií]a\s+(\d{1,2})\s+de\s+([a-záéíóú]+)\s+de\s+(\d{4})")
+_END_SENTENCE = re.compile(r"(?i)terminar[aá]? el d[ií]a\s+(\d{1,2})\s+de\s+([a-záéíóú]+)\s+de\s+(\d{4})")
+_NAME = re.compile(r"(?i)(don|doña)?\s*([A-ZÁÉÍÓÚÑ][A-Za-zÁÉÍÓÚÑáéíóúñ\s']{5,80})")
+
+_LABEL_START = re.compile(r"(?i)inicio")
+_LABEL_END = re.compile(r"(?i)termino|término|fin")
+_LABEL_PAY_DAY = re.compile(r"(?i)dia de pago|día de pago")
+_LABEL_RENT = re.compile(r"(?i)renta mensual|canon|arriendo|renta de arrendamiento")
+_RUT_NEAR_TENANT = re.compile(r"(?is)(?:arrendatario|arrendadora)[^\n]{0,160}?rut\s*([0-9\.\-kK]+)")
+_RUT_NEAR_OWNER = re.compile(r"(?is)(?:arrendador|propietario)[^\n]{0,160}?rut\s*([0-9\.\-kK]+)")
+
+
+@dataclass
+class Scan:
+    text: str
+    token_starts: list[int] = field(default_factory=list)
+    tokens: list[str] = field(default_factory=list)
+    amounts: list[str] = field(default_factory=list)
+    ruts: list[tuple[str, int]] = field(default_factory=list)
+    written_dates: list[date] = field(default_factory=list)
+    pay_day: int | None = None
+
+    def token_after(self, offset: int) -> str | None:
+        """First numeric token starting at or after ``offset``."""
+        index = bisect_left(self.token_starts, offset)
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def context_before(self, offset: int) -> str:
+        return self.text[max(offset - NAME_CONTEXT_CHARS, 0) : offset]
+
+
+def _month_date(day: str, month: str, year: str) -> date | None:
+    number = MONTHS.get(month.lower())
+    if not number:
+        return None
+    try:
+        return date(int(year), number, int(day))
+    except ValueError:
+        return None
+
+
+def _trailing_digits_start(text: str, start: int, end: int, floor: int) -> int | None:
+    """Leftmost of the last (up to) two positions before ``end`` that begin a pure digit run."""
+    for pos in (end - 2, end - 1):
+        if pos >= max(start, floor) and text[pos:end].isdigit():
+            return pos
+    return None
+
+
+def scan(text: str) -> Scan:
+    result = Scan(text=text)
+    starts, tokens, amounts, ruts = result.token_starts, result.tokens, result.amounts, result.ruts
+    written_floor = 0
+    for token_match in _TOKEN.finditer(text):
+        start, end = token_match.span()
+        token = token_match.group()
+        starts.append(start)
+        tokens.append(token)
+        amounts.extend(_AMOUNT.findall(token))
+        if "-" in token:
+            ruts.extend((m.group(), start + m.start()) for m in _RUT.finditer(token))
+
+        # Written dates and "N primeros dias habiles" need whitespace right after the digits.
+        if not text[end : end + 1].isspace():
+            continue
+        tail = _trailing_digits_start(text, start, end, 0)
+        if tail is None:
+            continue
+        if result.pay_day is None:
+            pay_day_match = _PAY_DAY_N.match(text, tail)
+            if pay_day_match:
+                result.pay_day = int(pay_day_match.group(1))
+        probe = tail if tail >= written_floor else _trailing_digits_start(text, start, end, written_floor)
+        written = _WRITTEN_DATE.match(text, probe) if probe is not None else None
+        if written:
+            written_floor = written.end()
+            parsed = _month_date(*written.groups())
+            if parsed:
+                result.written_dates.append(parsed)
+    return result
+
+
+def _parse_numeric_date(raw: str) -> date | None:
+    for fmt in _NUMERIC_DATE_FORMATS:
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_amount(raw: str) -> Decimal | None:
+    try:
+        return Decimal(raw.replace(".", "").replace(",", "."))
+    except InvalidOperation:
+        return None
+
+
+def labelled_date(s: Scan, label: re.Pattern) -> date | None:
+    """Numeric date that is the first number after the label (first label occurrence that has one)."""
+    for label_match in label.finditer(s.text):
+        token = s.token_after(label_match.end())
+        if token is None:
+            return None
+        found = _NUMERIC_DATE.match(token)
+        if found:
+            return _parse_numeric_date(found.group())
+    return None
+
+
+def labelled_int(s: Scan, label: re.Pattern) -> int | None:
+    label_match = label.search(s.text)
+    token = s.token_after(label_match.end()) if label_match else None
+    if token is None:
+        return None
+    return int(_LEADING_INT.match(token).group())
+
+
+def labelled_amount(s: Scan, label: re.Pattern) -> Decimal | None:
+    label_match = label.search(s.text)
+    token = s.token_after(label_match.end()) if label_match else None
+    if token is None:
+        return None
+    return _parse_amount(_AMOUNT_RUN.match(token).group())
+
+
+def contract_dates(s: Scan) -> tuple[date | None, date | None]:
+    specific_start = _START_SENTENCE.search(s.text)
+    specific_end = _END_SENTENCE.search(s.text)
+    start_date = _sentence_date(specific_start)
+    end_date = _sentence_date(specific_end)
+
+    written = s.written_dates
+    if not start_date or not end_date:
+        # Contracts usually open with the signing date, then start and end.
+        if len(written) >= 3:
+            start_date = start_date or written[1]
+            end_date = end_date or written[2]
+        elif len(written) >= 2:
+            start_date = start_date or written[0]
+            end_date = end_date or written[1]
+        elif len(written) == 1:
+            start_date = start_date or written[0]
+    return start_date, end_date
+
+
+def _sentence_date(match: re.Match | None) -> date | None:
+    if not match:
+        return None
+    try:
+        return date(int(match.group(3)), MONTHS.get(match.group(2).lower()) or 1, int(match.group(1)))
+    except ValueError:
+        return None
+
+
+def pay_day(s: Scan) -> int | None:
+    if s.pay_day is not None:
+        return s.pay_day
+    if _PAY_DAY_CINCO.search(s.text):
+        return 5
+    return labelled_int(s, _LABEL_PAY_DAY)
+
+
+def rent(s: Scan) -> Decimal | None:
+    labelled = labelled_amount(s, _LABEL_RENT)
+    if labelled:
+        return labelled
+    candidates = [amount for amount in map(_parse_amount, s.amounts) if amount is not None]
+    # Highest amount, to avoid picking addresses or numbers like "611".
+    return max(candidates) if candidates else None
+
+
+def rut_near(s: Scan, pattern: re.Pattern) -> tuple[str | None, str | None]:
+    """(rut, text before it) for a RUT written shortly after a party label."""
+    match = pattern.search(s.text)
+    if not match:
+        return None, None
+    return match.group(1), s.context_before(match.start(1))
+
+
+def name_from_context(snippet: str | None) -> str | None:
+    if not snippet:
+        return None
+    parts = _NAME.findall(snippet)
+    if parts:
+        # Last candidate is the closest to the RUT; drop don/doña markers.
+        return " ".join(parts[-1][1].strip().split())
+    return None
+
+
+def extract_contract_text(text: str, ai_data: dict) -> dict:
+    """Contract fields from PDF text; values in ``ai_data`` (Gemini) take precedence."""
+    s = scan(text)
+    start_written, end_written = contract_dates(s)
+
+    arr_rut, arr_context = rut_near(s, _RUT_NEAR_TENANT)
+    prop_rut, prop_context = rut_near(s, _RUT_NEAR_OWNER)
+    if not arr_rut or not prop_rut:
+        # Without labels, the owner is usually introduced first and the tenant second.
+        generic = [(rut, s.context_before(offset)) for rut, offset in s.ruts]
+        if not prop_rut and len(generic) >= 1:
+            prop_rut, prop_context = generic[0]
+        if not arr_rut and len(generic) >= 2:
+            arr_rut, arr_context = generic[1]
+
+    return {
+        "fecha_inicio": ai_data.get("fecha_inicio") or start_written or labelled_date(s, _LABEL_START),
+        "fecha_fin": ai_data.get("fecha_fin") or end_written or labelled_date(s, _LABEL_END),
+        "dia_pago": ai_data.get("dia_pago") or pay_day(s) or 5,
+        "renta_mensual": ai_data.get("renta_mensual") or rent(s),
+        "arrendatario_rut": ai_data.get("arrendatario_rut") or arr_rut,
+        "propietario_rut": ai_data.get("propietario_rut") or prop_rut,
+        "arrendatario_nombre": ai_data.get("arrendatario_nombre") or name_from_context(arr_context),
+        "propietario_nombre": ai_data.get("propietario_nombre") or name_from_context(prop_context),
+    }
@@ -0,0 +1,274 @@
+"""Portfolio dashboard aggregates (ocupacion, mora, vencimientos, recaudacion).
+
+Everything is computed with SQL ``GROUP BY`` aggregates so the payload does not
+grow with the charge/payment history. Results are cached per process and
+dropped whenever a transaction touching the underlying tables commits, here or
+in another worker (internal ``_dashboard.changed`` event, delivered to every
+worker with ``EVENTS_BACKEND=postgres``).
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import and_, case, exists, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.clock import local_today
+from app.core.config import settings
+from app.db.events import on_commit_changes
+from app.models.charge import Charge, ChargeState, PaymentDetail
+from app.models.contract import ContractStatus, LeaseContract
+from app.models.document import Document
+from app.models.property import Property, PropertyState
+from app.services.broker import RECONNECTED, broker, publish_soon
+
+DASHBOARD_TABLES = {
+    Property.__tablename__,
+    LeaseContract.__tablename__,
+    Charge.__tablename__,
+    PaymentDetail.__tablename__,
+    Document.__tablename__,
+}
+
+DASHBOARD_CHANGED = "_dashboard.changed"
+
+_summary_cache: TTLCache[dict] = TTLCache(maxsize=32, ttl=settings.dashboard_cache_ttl_seconds)
+
+
+def invalidate_summary() -> None:
+    _summary_cache.clear()
+
+
+@on_commit_changes
+def _invalidate(tables: set[str]) -> None:
+    if tables & DASHBOARD_TABLES:
+        invalidate_summary()
+        publish_soon(DASHBOARD_CHANGED)
+
+
+broker.on_internal(DASHBOARD_CHANGED, lambda data: invalidate_summary())
+# Invalidations sent while the listener was down are lost.
+broker.on_internal(RECONNECTED, lambda data: invalidate_summary())
+
+
+def _month_start(value: date, months_back: int = 0) -> date:
+    index = value.year * 12 + value.month - 1 - months_back
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _amount(value) -> float:
+    return float(value or Decimal("0"))
+
+
+async def _occupancy(session: AsyncSession) -> dict[str, int]:
+    result = await session.execute(
+        select(Property.estado_actual, func.count()).group_by(Property.estado_actual)
+    )
+    counts = {state.value: 0 for state in PropertyState}
+    for estado, total in result:
+        counts[PropertyState(estado).value] = total
+    return counts
+
+
+async def _alerts(session: AsyncSession, today: date, expiring_days: int) -> dict[str, int]:
+    horizon = today + timedelta(days=expiring_days)
+    vigente = LeaseContract.estado == ContractStatus.VIGENTE
+
+    contracts_row = (
+        await session.execute(
+            select(
+                func.count(func.distinct(case((LeaseContract.fecha_fin < today, LeaseContract.propiedad_id)))),
+                func.count(
+                    func.distinct(
+                        case(
+                            (
+                                and_(LeaseContract.fecha_fin >= today, LeaseContract.fecha_fin <= horizon),
+                                LeaseContract.propiedad_id,
+                            )
+                        )
+                    )
+                ),
+            ).where(vigente)
+        )
+    ).one()
+
+    has_vigente = exists().where(LeaseContract.propiedad_id == Property.id, vigente)
+    has_docs = exists().where(
+        Document.entidad_tipo == "propiedad",
+        Document.entidad_id == Property.id,
+        Document.activo.is_(True),
+    )
+    props_row = (
+        await session.execute(
+            select(
+                func.count(case((and_(Property.estado_actual == PropertyState.DISPONIBLE, ~has_vigente), 1))),
+                func.count(case((~has_docs, 1))),
+            )
+        )
+    ).one()
+
+    late_props = (
+        await session.execute(
+            select(func.count(func.distinct(LeaseContract.propiedad_id)))
+            .select_from(Charge)
+            .join(LeaseContract, Charge.contrato_id == LeaseContract.id)
+            .where(_overdue_clause(today))
+        )
+    ).scalar_one()
+
+    return {
+        "vencidos": contracts_row[0],
+        "por_vencer": contracts_row[1],
+        "sin_contrato": props_row[0],
+        "cobranza_atrasada": late_props,
+        "docs_incompletos": props_row[1],
+    }
+
+
+def _overdue_clause(today: date):
+    return or_(
+        Charge.estado == ChargeState.ATRASADO,
+        and_(
+            Charge.estado.in_([ChargeState.PENDIENTE, ChargeState.PARCIAL]),
+            Charge.fecha_vencimiento < today,
+        ),
+    )
+
+
+async def _arrears(session: AsyncSession, today: date) -> dict[str, dict]:
+    target = func.coalesce(Charge.monto_ajustado, Charge.monto_original)
+    bucket = case(
+        (_overdue_clause(today), "atrasadas"),
+        (Charge.estado == ChargeState.PARCIAL, "parciales"),
+        else_=None,
+    ).label("bucket")
+    open_states = [ChargeState.PENDIENTE, ChargeState.PARCIAL, ChargeState.ATRASADO]
+
+    totals_result = await session.execute(
+        select(
+            bucket,
+            func.count(),
+            func.sum(target),
+            func.sum(Charge.monto_pagado_total),
+            func.sum(func.coalesce(Charge.mora_monto, 0)),
+        )
+        .where(Charge.estado.in_(open_states))
+        .group_by(bucket)
+    )
+
+    summary = {
+        name: {"cantidad": 0, "monto": 0.0, "pagado": 0.0, "saldo": 0.0, "mora": 0.0}
+        for name in ("atrasadas", "parciales")
+    }
+    for name, count, monto, pagado, mora in totals_result:
+        if not name:
+            continue
+        entry = summary[name]
+        entry["cantidad"] = count
+        entry["monto"] = _amount(monto)
+        entry["mora"] = _amount(mora)
+        entry["pagado"] = _amount(pagado)
+        entry["saldo"] = entry["monto"] - entry["pagado"]
+    return summary
+
+
+async def _expiring_contracts(session: AsyncSession, today: date, expiring_days: int, limit: int) -> list[dict]:
+    result = await session.execute(
+        select(LeaseContract.id, LeaseContract.propiedad_id, Property.codigo, LeaseContract.fecha_fin)
+        .join(Property, LeaseContract.propiedad_id == Property.id)
+        .where(
+            LeaseContract.estado == ContractStatus.VIGENTE,
+            LeaseContract.fecha_fin >= today,
+            LeaseContract.fecha_fin <= today + timedelta(days=expiring_days),
+        )
+        .order_by(LeaseContract.fecha_fin)
+        .limit(limit)
+    )
+    return [
+        {"contrato_id": cid, "propiedad_id": pid, "codigo": codigo, "fecha_fin": fecha_fin}
+        for cid, pid, codigo, fecha_fin in result
+    ]
+
+
+async def _collections(session: AsyncSession, today: date, months: int) -> list[dict]:
+    since = _month_start(today, months - 1)
+    target = func.coalesce(Charge.monto_ajustado, Charge.monto_original)
+
+    result = await session.execute(
+        select(Charge.periodo, func.sum(target), func.sum(Charge.monto_pagado_total), func.count())
+        .where(Charge.periodo >= since)
+        .group_by(Charge.periodo)
+    )
+
+    # Periods are normally the first day of the month, but fold any other day in.
+    rows: dict[date, dict] = {}
+    for periodo, esperado, recaudado, cantidad in result:
+        key = _month_start(periodo)
+        row = rows.setdefault(key, {"periodo": key, "esperado": 0.0, "recaudado": 0.0, "cobranzas": 0})
+        row["esperado"] += _amount(esperado)
+        row["recaudado"] += _amount(recaudado)
+        row["cobranzas"] += cantidad
+    return [rows[key] for key in sorted(rows)]
+
+
+async def _payments_month(session: AsyncSession, today: date) -> dict:
+    start = _month_start(today)
+    totals = (
+        await session.execute(
+            select(func.sum(PaymentDetail.monto_pagado), func.count()).where(
+                PaymentDetail.fecha_pago >= start, PaymentDetail.fecha_pago <= today
+            )
+        )
+    ).one()
+
+    last_result = await session.execute(
+        select(PaymentDetail, Property.codigo)
+        .join(Charge, PaymentDetail.cobranza_id == Charge.id)
+        .join(LeaseContract, Charge.contrato_id == LeaseContract.id)
+        .join(Property, LeaseContract.propiedad_id == Property.id)
+        .order_by(PaymentDetail.fecha_pago.desc(), PaymentDetail.created_at.desc())
+        .limit(1)
+    )
+    last_row = last_result.first()
+    last = None
+    if last_row:
+        pay, codigo = last_row
+        last = {
+            "id": pay.id,
+            "monto_pagado": float(pay.monto_pagado),
+            "fecha_pago": pay.fecha_pago,
+            "medio_pago": pay.medio_pago,
+            "referencia": pay.referencia,
+            "codigo_propiedad": codigo,
+        }
+    return {"monto_total": _amount(totals[0]), "cantidad": totals[1], "ultimo": last}
+
+
+async def get_summary(
+    session: AsyncSession,
+    *,
+    today: date | None = None,
+    expiring_days: int = 30,
+    months: int = 12,
+    expiring_limit: int = 50,
+) -> dict:
+    today = today or local_today()
+    key = (today, expiring_days, months, expiring_limit)
+    cached = _summary_cache.get(key)
+    if cached is not None:
+        return cached
+    # A commit that clears the cache while the aggregates run must not be undone by this refill.
+    generation = _summary_cache.generation
+
+    summary = {
+        "fecha": today,
+        "ocupacion": await _occupancy(session),
+        "alertas": await _alerts(session, today, expiring_days),
+        "mora": await _arrears(session, today),
+        "contratos_por_vencer": await _expiring_contracts(session, today, expiring_days, expiring_limit),
+        "pagos_mes": await _payments_month(session, today),
+        "cobranza_mensual": await _collections(session, today, months),
+    }
+    _summary_cache.set(key, summary, generation)
+    return summary
@@ -0,0 +1,341 @@
+"""Contract PDF and payment receipt processing for uploaded documents.
+
+These run from the job queue (see ``app.services.jobs``) so uploads do not wait
+on PDF parsing or Gemini calls.
+"""
+
+import hashlib
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.executors import run_cpu, run_io
+from app.core.rut import is_valid_rut, normalize_rut
+from app.models.contract import AdjustmentType, ContractStatus, Currency, LeaseContract
+from app.models.charge import Charge, ChargeState, PaymentDetail
+from app.models.person import Person, PersonType
+from app.models.property import Property, PropertyState
+from app.models.property_state import PropertyStateHistory
+from app.services import extraction_cache
+from app.services.ai_extract import (
+    CONTRACT_PROMPT,
+    RECEIPT_PROMPT,
+    extract_contract_fields,
+    extract_payment_from_image,
+)
+from app.services.broker import publish
+from app.services.contract_extractor import extract_contract_text
+from app.services.jobs import JobContext, JobError, job_handler
+from app.services.payments import PaymentInput, apply_payment
+from app.services.pdf_text import PDF_TEXT_VARIANT, extract_pdf_text
+from app.services.persons import add_person, find_persons_by_rut
+from app.services.storage_drivers import storage
+
+CONTRACT_PDF_JOB = "documents.contract_pdf"
+RECEIPT_JOB = "documents.receipt"
+
+
+class DocumentProcessingError(Exception):
+    """The document cannot be applied; retrying will not help."""
+
+
+async def parse_contract_pdf(raw: bytes, content_hash: str | None = None) -> dict:
+    """Best-effort extraction of key fields from a lease contract PDF.
+
+    PDF text extraction and the rule-based pass (``contract_extractor``) run on
+    the process pool; the Gemini call runs on the I/O thread pool. Page text and
+    the Gemini result are cached by file hash (``extraction_cache``).
+    """
+    content_hash = content_hash or hashlib.sha256(raw).hexdigest()
+    text = await extraction_cache.cached(
+        extraction_cache.PDF_TEXT, content_hash, PDF_TEXT_VARIANT, lambda: run_cpu(extract_pdf_text, raw)
+    )
+    if text is None:
+        return {}
+    ai_data = await extraction_cache.cached(
+        extraction_cache.CONTRACT_AI,
+        content_hash,
+        extraction_cache.prompt_variant(CONTRACT_PROMPT),
+        lambda: run_io(extract_contract_fields, text),
+    )
+    return await run_cpu(extract_contract_text, text, ai_data)
+
+
+def _valid_rut(value: str | None) -> str | None:
+    # Extracted RUTs failing the check digit are OCR/regex noise: do not store them.
+    return normalize_rut(value) if is_valid_rut(value) else None
+
+
+async def resolve_person(
+    session: AsyncSession, raw: str, role: str, fallback_rut: str | None, fallback_name: str | None
+) -> uuid.UUID:
+    """Accept UUID or RUT; if not found, creates a Person for tests."""
+    candidates: list[str] = []
+    if raw:
+        candidates.append(raw.strip())
+    if fallback_rut:
+        candidates.append(fallback_rut)
+
+    normalized_candidates = [normalize_rut(c) for c in candidates if c]
+
+    # 1) Try UUID lookup or use provided UUID to create
+    for cand in candidates:
+        try:
+            cand_uuid = uuid.UUID(cand)
+        except Exception:
+            cand_uuid = None
+        if cand_uuid:
+            obj = await session.get(Person, cand_uuid)
+            if obj:
+                return obj.id
+            # create with this UUID
+            new_person = Person(
+                id=cand_uuid,
+                tipo=PersonType.ARRENDATARIO if role.lower().startswith("tenant") else PersonType.PROPIETARIO,
+                nombres=fallback_name or f"{role} auto",
+                apellidos=None,
+                rut=_valid_rut(fallback_rut) or _valid_rut(raw),
+            )
+            return (await add_person(session, new_person)).id
+
+    # 2) Try RUT lookup (indexed on the normalized RUT)
+    found = await find_persons_by_rut(session, normalized_candidates)
+    for norm in normalized_candidates:
+        if norm in found:
+            return found[norm].id
+
+    # 3) Create person with normalized rut or no rut
+    new_person = Person(
+        tipo=PersonType.ARRENDATARIO if role.lower().startswith("tenant") else PersonType.PROPIETARIO,
+        nombres=fallback_name or f"{role} auto",
+        apellidos=None,
+        rut=_valid_rut(fallback_rut) or _valid_rut(raw),
+    )
+    return (await add_person(session, new_person)).id
+
+
+async def attach_contract_from_pdf(
+    *,
+    session: AsyncSession,
+    property_id: uuid.UUID,
+    arrendatario_id: uuid.UUID,
+    propietario_id: uuid.UUID,
+    parsed: dict,
+    current_user_id: uuid.UUID,
+) -> LeaseContract:
+    prop = await session.get(Property, property_id)
+    if not prop:
+        raise DocumentProcessingError("Property not found")
+
+    def _coerce_date(value: Any, default: date | None = None) -> date | None:
+        if isinstance(value, date):
+            return value
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value).date()
+            except Exception:
+                pass
+        return default
+
+    def _coerce_int(value: Any, default: int | None = None) -> int | None:
+        try:
+            return int(value)
+        except Exception:
+            return default
+
+    def _coerce_decimal(value: Any, default: Decimal | None = None) -> Decimal | None:
+        try:
+            return Decimal(str(value))
+        except Exception:
+            return default
+
+    start_date = _coerce_date(parsed.get("fecha_inicio"), date.today())
+    end_date = _coerce_date(parsed.get("fecha_fin"), (start_date or date.today()) + timedelta(days=365))
+    pay_day: int | None = _coerce_int(parsed.get("dia_pago"), 5)
+    renta: Decimal = _coerce_decimal(parsed.get("renta_mensual"), prop.valor_arriendo or Decimal("0"))
+
+    contract = LeaseContract(
+        propiedad_id=prop.id,
+        arrendatario_id=arrendatario_id,
+        propietario_id=propietario_id,
+        fecha_inicio=start_date,
+        fecha_fin=end_date,
+        renta_mensual=renta,
+        moneda=Currency.CLP,
+        reajuste_tipo=AdjustmentType.NONE,
+        dia_pago=pay_day,
+        estado=ContractStatus.VIGENTE,
+        notas="Autogenerado desde PDF de contrato",
+    )
+
+    prop.estado_actual = PropertyState.ARRENDADA
+    if prop.valor_arriendo is None and renta:
+        prop.valor_arriendo = renta
+
+    history = PropertyStateHistory(
+        propiedad_id=prop.id,
+        estado=PropertyState.ARRENDADA,
+        motivo="Contrato de arriendo cargado",
+        fecha_inicio=date.today(),
+        actor_id=current_user_id,
+    )
+
+    session.add(contract)
+    session.add(history)
+    return contract
+
+
+async def apply_receipt_payment(
+    session: AsyncSession, property_id: uuid.UUID, parsed: dict
+) -> tuple[Charge, PaymentDetail]:
+    """Register a payment read from a receipt against the property's VIGENTE contract."""
+    prop = await session.get(Property, property_id)
+    if not parsed:
+        raise DocumentProcessingError("No se pudo leer el comprobante (IA)")
+    if not prop:
+        raise DocumentProcessingError("Propiedad no existe")
+
+    try:
+        amount = Decimal(str(parsed.get("monto_pagado")))
+    except Exception:
+        amount = None
+    if amount is None:
+        raise DocumentProcessingError("El comprobante no tiene monto válido")
+
+    raw_date = parsed.get("fecha_pago")
+    try:
+        pay_date = datetime.fromisoformat(str(raw_date)).date() if raw_date else date.today()
+    except Exception:
+        pay_date = date.today()
+
+    medio = parsed.get("medio_pago")
+    referencia = parsed.get("referencia")
+
+    contract_q = await session.execute(
+        select(LeaseContract)
+        .where(LeaseContract.propiedad_id == property_id, LeaseContract.estado == ContractStatus.VIGENTE)
+        .order_by(LeaseContract.fecha_inicio.desc())
+        .limit(1)
+    )
+    contract = contract_q.scalars().first()
+    if not contract:
+        raise DocumentProcessingError("La propiedad no tiene contrato vigente para asociar el pago")
+
+    periodo = date(pay_date.year, pay_date.month, 1)
+    charge_q = await session.execute(
+        select(Charge.id).where(Charge.contrato_id == contract.id, Charge.periodo == periodo).limit(1)
+    )
+    charge_id = charge_q.scalar_one_or_none()
+
+    if charge_id is None:
+        charge = Charge(
+            contrato_id=contract.id,
+            periodo=periodo,
+            monto_original=amount,
+            monto_ajustado=None,
+            fecha_vencimiento=pay_date,
+            estado=ChargeState.PENDIENTE,
+        )
+        session.add(charge)
+        await session.flush()
+        charge_id = charge.id
+
+    return await apply_payment(
+        session,
+        PaymentInput(
+            cobranza_id=charge_id, monto_pagado=amount, fecha_pago=pay_date, medio_pago=medio, referencia=referencia
+        ),
+    )
+
+
+async def _read_upload(payload: dict) -> bytes:
+    if "storage_key" in payload:
+        return await storage.read_bytes(payload["storage_key"])
+    # Jobs queued before the storage drivers carry a local path.
+    return await run_io(Path(payload["storage_path"]).read_bytes)
+
+
+@job_handler(CONTRACT_PDF_JOB)
+async def _contract_pdf_job(ctx: JobContext) -> dict:
+    payload = ctx.payload
+    session = ctx.session
+    raw = await _read_upload(payload)
+    parsed = await parse_contract_pdf(raw, payload.get("content_hash"))
+
+    try:
+        arr_id = await resolve_person(
+            session,
+            payload.get("arrendatario_id") or "",
+            "Tenant",
+            parsed.get("arrendatario_rut"),
+            parsed.get("arrendatario_nombre"),
+        )
+        prop_id = await resolve_person(
+            session,
+            payload.get("propietario_id") or "",
+            "Owner",
+            parsed.get("propietario_rut"),
+            parsed.get("propietario_nombre"),
+        )
+        contract = await attach_contract_from_pdf(
+            session=session,
+            property_id=uuid.UUID(payload["property_id"]),
+            arrendatario_id=arr_id,
+            propietario_id=prop_id,
+            parsed=parsed,
+            current_user_id=uuid.UUID(payload["created_by"]),
+        )
+    except DocumentProcessingError as exc:
+        raise JobError(str(exc)) from exc
+    await session.flush()
+
+    async def _announce() -> None:
+        await publish("contract.created", id=contract.id, propiedad_id=contract.propiedad_id, estado=contract.estado)
+        await publish("property.updated", id=contract.propiedad_id, estado=PropertyState.ARRENDADA)
+
+    ctx.after_commit(_announce)
+    return {
+        "contrato_id": contract.id,
+        "arrendatario_id": arr_id,
+        "propietario_id": prop_id,
+        "extraido": parsed,
+    }
+
+
+async def extract_receipt(raw: bytes, content_type: str | None, content_hash: str | None = None) -> dict | None:
+    """Gemini reading of a payment receipt, on the I/O pool and cached by file hash."""
+    return await extraction_cache.cached(
+        extraction_cache.RECEIPT_AI,
+        content_hash or hashlib.sha256(raw).hexdigest(),
+        extraction_cache.prompt_variant(RECEIPT_PROMPT, content_type or ""),
+        lambda: run_io(extract_payment_from_image, raw, content_type),
+    )
+
+
+@job_handler(RECEIPT_JOB)
+async def _receipt_job(ctx: JobContext) -> dict:
+    payload = ctx.payload
+    raw = await _read_upload(payload)
+    parsed = await extract_receipt(raw, payload.get("content_type"), payload.get("content_hash"))
+    try:
+        charge, payment = await apply_receipt_payment(ctx.session, uuid.UUID(payload["property_id"]), parsed)
+    except DocumentProcessingError as exc:
+        raise JobError(str(exc)) from exc
+
+    async def _announce() -> None:
+        await publish(
+            "payment.created",
+            id=payment.id,
+            cobranza_id=charge.id,
+            contrato_id=charge.contrato_id,
+            monto_pagado=payment.monto_pagado,
+            estado_cobranza=charge.estado,
+        )
+
+    ctx.after_commit(_announce)
+    return {"cobranza_id": charge.id, "pago_id": payment.id, "monto_pagado": payment.monto_pagado, "extraido": parsed}
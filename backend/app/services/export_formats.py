@@ -0,0 +1,313 @@
+"""Incremental file writers for exports.
+
+Each writer turns batches of row tuples into bytes as they arrive, so a
+response can be streamed without holding the whole file:
+
+- CSV (UTF-8 with BOM so Excel detects the encoding) and NDJSON are plain
+  line formats.
+- XLSX is written as a zip stream (``zipfile`` on a non-seekable sink uses data
+  descriptors) with a single sheet of inline strings; only the zip's central
+  directory is kept in memory. Excel's row limit applies.
+- Parquet uses pyarrow's ``ParquetWriter`` with one row group per batch
+  (optional dependency).
+
+Writers are synchronous and run on the I/O pool.
+"""
+
+import csv
+import io
+import json
+import re
+import zipfile
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Sequence
+from uuid import UUID
+from xml.sax.saxutils import escape
+
+EXCEL_MAX_ROWS = 1_048_576
+
+# Column kinds used by the dataset definitions.
+STR = "str"
+INT = "int"
+DECIMAL = "decimal"
+DATE = "date"
+DATETIME = "datetime"
+FLOAT = "float"
+
+
+class ExportFormatError(Exception):
+    """The requested format cannot be produced (e.g. missing optional dependency)."""
+
+
+class _Sink(io.RawIOBase):
+    """Write-only, non-seekable buffer that is drained after each batch."""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+class CsvWriter:
+    media_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def __init__(self, columns: Sequence[tuple[str, str]]) -> None:
+        self._text = io.StringIO()
+        self._writer = csv.writer(self._text)
+        self._text.write("\ufeff")
+        self._writer.writerow([name for name, _ in columns])
+
+    def _take(self) -> bytes:
+        data = self._text.getvalue().encode("utf-8")
+        self._text.seek(0)
+        self._text.truncate()
+        return data
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        for row in rows:
+            self._writer.writerow(["" if v is None else _plain(v) for v in row])
+        return self._take()
+
+    def close(self) -> bytes:
+        return self._take()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    # Strings keep the exact amount, as in the API responses.
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class NdjsonWriter:
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def __init__(self, columns: Sequence[tuple[str, str]]) -> None:
+        self._names = [name for name, _ in columns]
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        lines = [
+            json.dumps(dict(zip(self._names, row)), default=_json_default, ensure_ascii=False) for row in rows
+        ]
+        return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+    def close(self) -> bytes:
+        return b""
+
+
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+# Cell styles defined in _XLSX_STYLES: 1 = date, 2 = date + time.
+_STYLE_DATE = 1
+_STYLE_DATETIME = 2
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    "</Types>"
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    "</Relationships>"
+)
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm:ss"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    "</cellXfs>"
+    "</styleSheet>"
+)
+
+
+def _workbook_xml(sheet_name: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    )
+
+
+def _text_cell(value: Any) -> str:
+    text = _XML_ILLEGAL.sub("", str(value))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def _xlsx_cell(value: Any) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f"<c><v>{value}</v></c>"
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        serial = (value - _EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c s="{_STYLE_DATETIME}"><v>{serial:.6f}</v></c>'
+    if isinstance(value, date):
+        return f'<c s="{_STYLE_DATE}"><v>{(value - _EXCEL_EPOCH.date()).days}</v></c>'
+    return _text_cell(_plain(value))
+
+
+class XlsxWriter:
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    extension = "xlsx"
+
+    def __init__(self, columns: Sequence[tuple[str, str]], sheet_name: str = "datos") -> None:
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, mode="w", compression=zipfile.ZIP_DEFLATED)
+        self._zip.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+        self._zip.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+        self._zip.writestr("xl/workbook.xml", _workbook_xml(sheet_name))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+        self._zip.writestr("xl/styles.xml", _XLSX_STYLES)
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", mode="w")
+        self._sheet.write(
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+        )
+        self._rows = 0
+        self._append([[name for name, _ in columns]])
+
+    def _append(self, rows: Sequence[Sequence[Any]]) -> None:
+        room = EXCEL_MAX_ROWS - self._rows
+        if room <= 0:
+            return
+        rows = rows[:room]
+        parts = ["<row>" + "".join(_xlsx_cell(value) for value in row) + "</row>" for row in rows]
+        self._sheet.write("".join(parts).encode("utf-8"))
+        self._rows += len(rows)
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        self._append(rows)
+        return self._sink.drain()
+
+    @property
+    def truncated(self) -> bool:
+        return self._rows >= EXCEL_MAX_ROWS
+
+    def close(self) -> bytes:
+        self._sheet.write(b"</sheetData></worksheet>")
+        self._sheet.close()
+        self._zip.close()
+        return self._sink.drain()
+
+
+_CENT = Decimal("0.01")
+# Driver values that pyarrow will not take as-is for the column type.
+_PARQUET_CONVERTERS = {
+    STR: lambda v: str(_plain(v)),
+    FLOAT: float,
+    DECIMAL: lambda v: Decimal(str(v)).quantize(_CENT),
+}
+
+
+class ParquetWriter:
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self, columns: Sequence[tuple[str, str]]) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ExportFormatError("Exportar Parquet requiere pyarrow") from exc
+        arrow_types = {
+            STR: pa.string(),
+            INT: pa.int64(),
+            DECIMAL: pa.decimal128(14, 2),
+            DATE: pa.date32(),
+            DATETIME: pa.timestamp("us", tz="UTC"),
+            FLOAT: pa.float64(),
+        }
+        self._pa = pa
+        self._kinds = [kind for _, kind in columns]
+        self._schema = pa.schema([(name, arrow_types[kind]) for name, kind in columns])
+        self._sink = _Sink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="snappy")
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        if not rows:
+            return b""
+        arrays = []
+        for index, kind in enumerate(self._kinds):
+            convert = _PARQUET_CONVERTERS.get(kind)
+            column = [row[index] for row in rows]
+            arrays.append([None if v is None else convert(v) for v in column] if convert else column)
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+WRITERS = {
+    "csv": CsvWriter,
+    "ndjson": NdjsonWriter,
+    "xlsx": XlsxWriter,
+    "parquet": ParquetWriter,
+}
@@ -0,0 +1,150 @@
+"""Persistent cache for document extraction results.
+
+PDF text (PyPDF2) and structured Gemini output are stored in
+``cache_extracciones`` keyed by the file's SHA-256 plus a *variant* string that
+identifies the extractor (library version, or Gemini model + prompt digest), so
+changing the prompt or ``GEMINI_MODEL`` naturally misses. Re-uploading or
+re-processing a known file skips the PDF parse and the paid API call.
+
+Entries expire after ``EXTRACTION_CACHE_TTL_DAYS``; when the table grows past
+``EXTRACTION_CACHE_MAX_MB`` the least recently used entries are evicted. Cache
+reads/writes use their own short sessions so a failed job still keeps the
+results it paid for, and cache errors never fail the extraction itself.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, TypeVar
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.db.upsert import insert_for
+from app.models.extraction_cache import ExtractionCacheEntry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PDF_TEXT = "pdf_text"
+CONTRACT_AI = "contract_ai"
+RECEIPT_AI = "receipt_ai"
+
+# Evict down to this fraction of the size limit so eviction does not run on every write.
+_EVICT_TARGET = 0.9
+
+
+def prompt_variant(prompt: str, *extra: str) -> str:
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+    return ":".join((settings.gemini_model, digest, *extra))
+
+
+def _key(tipo: str, content_hash: str, variant: str) -> str:
+    return hashlib.sha256(f"{tipo}|{content_hash}|{variant}".encode("utf-8")).hexdigest()
+
+
+def _enabled() -> bool:
+    return settings.extraction_cache_ttl_days > 0
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def get(tipo: str, content_hash: str, variant: str) -> Any | None:
+    if not _enabled():
+        return None
+    key = _key(tipo, content_hash, variant)
+    now = _utcnow()
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(ExtractionCacheEntry.value_json).where(
+                    ExtractionCacheEntry.key == key, ExtractionCacheEntry.expires_at > now
+                )
+            )
+            raw = result.scalar_one_or_none()
+            if raw is None:
+                return None
+            await session.execute(
+                update(ExtractionCacheEntry).where(ExtractionCacheEntry.key == key).values(last_used_at=now)
+            )
+            await session.commit()
+            return json.loads(raw)
+    except Exception:
+        logger.exception("Extraction cache read failed (%s)", tipo)
+        return None
+
+
+async def put(tipo: str, content_hash: str, variant: str, value: Any) -> None:
+    if not _enabled():
+        return
+    now = _utcnow()
+    value_json = json.dumps(value)
+    values = {
+        "key": _key(tipo, content_hash, variant),
+        "tipo": tipo,
+        "content_hash": content_hash,
+        "variant": variant[:200],
+        "value_json": value_json,
+        "size": len(value_json.encode("utf-8")),
+        "last_used_at": now,
+        "expires_at": now + timedelta(days=settings.extraction_cache_ttl_days),
+    }
+    try:
+        async with AsyncSessionLocal() as session:
+            stmt = insert_for(session, ExtractionCacheEntry).values(**values)
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[ExtractionCacheEntry.key],
+                    set_={k: values[k] for k in ("value_json", "size", "last_used_at", "expires_at")},
+                )
+            )
+            await session.commit()
+            await evict(session)
+    except Exception:
+        logger.exception("Extraction cache write failed (%s)", tipo)
+
+
+async def evict(session: AsyncSession) -> int:
+    """Drop expired entries, then least recently used ones beyond the size limit."""
+    removed = (
+        await session.execute(delete(ExtractionCacheEntry).where(ExtractionCacheEntry.expires_at <= _utcnow()))
+    ).rowcount or 0
+    limit = settings.extraction_cache_max_mb * 1024 * 1024
+    total = (await session.execute(select(func.coalesce(func.sum(ExtractionCacheEntry.size), 0)))).scalar_one()
+    if total > limit:
+        excess = total - int(limit * _EVICT_TARGET)
+        result = await session.execute(
+            select(ExtractionCacheEntry.key, ExtractionCacheEntry.size).order_by(ExtractionCacheEntry.last_used_at)
+        )
+        victims: list[str] = []
+        for key, size in result:
+            victims.append(key)
+            excess -= size
+            if excess <= 0:
+                break
+        await session.execute(delete(ExtractionCacheEntry).where(ExtractionCacheEntry.key.in_(victims)))
+        removed += len(victims)
+    await session.commit()
+    return removed
+
+
+async def cached(
+    tipo: str,
+    content_hash: str,
+    variant: str,
+    compute: Callable[[], Awaitable[T]],
+) -> T:
+    """Return the cached value or compute and store it; empty results (failed extractions) are not cached."""
+    hit = await get(tipo, content_hash, variant)
+    if hit is not None:
+        return hit
+    value = await compute()
+    if value:
+        await put(tipo, content_hash, variant, value)
+    return value
@@ -0,0 +1,166 @@
+"""UF and IPC series kept locally for rent readjustment.
+
+- UF: CLP value of one UF, one row per day.
+- IPC: monthly change in percent (``0.4`` = +0.4 %), stored on the first day of
+  the month it measures.
+
+Files (CSV/XLSX with ``fecha`` and ``valor`` columns, e.g. the Banco Central
+downloads) are read with the bulk import readers and written in batches with
+``INSERT ... ON CONFLICT (tipo, fecha) DO UPDATE``. Rows whose value did not
+change are skipped, and the report carries the earliest changed date so only
+charges due from then on need to be readjusted.
+
+:func:`load_series` reads both series into memory (a few thousand rows) for
+the readjustment engine.
+"""
+
+import bisect
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.clock import add_months, month_start
+from app.core.config import settings
+from app.core.executors import run_io
+from app.db.upsert import insert_for
+from app.models.indicator import EconomicIndicator, IndicatorType
+from app.schemas.indicator import IndicatorImportReport, IndicatorImportRow
+from app.services.bulk_import import ImportFormatError, _add_error, _error_messages, _next_batch, open_rows
+
+logger = logging.getLogger(__name__)
+
+_HUNDRED = Decimal(100)
+
+
+def _check_row(tipo: IndicatorType, row: IndicatorImportRow) -> str | None:
+    if tipo == IndicatorType.UF and row.valor <= 0:
+        return "valor: la UF debe ser positiva"
+    if tipo == IndicatorType.IPC and not -_HUNDRED < row.valor < _HUNDRED:
+        return "valor: variación del IPC fuera de rango (porcentaje mensual)"
+    return None
+
+
+async def _stored_values(session: AsyncSession, tipo: IndicatorType, days: list[date]) -> dict[date, Decimal]:
+    result = await session.execute(
+        select(EconomicIndicator.fecha, EconomicIndicator.valor).where(
+            EconomicIndicator.tipo == tipo,
+            EconomicIndicator.fecha.between(min(days), max(days)),
+        )
+    )
+    return dict(result.tuples().all())
+
+
+async def load_indicator_file(
+    session: AsyncSession,
+    tipo: IndicatorType,
+    path: Path,
+    filename: str,
+    *,
+    batch_size: int | None = None,
+) -> IndicatorImportReport:
+    """Upsert a UF/IPC file; commits per batch. IPC dates are moved to the first of the month."""
+    size = batch_size or settings.import_batch_size
+    report = IndicatorImportReport(entidad=tipo.value)
+
+    source = await run_io(open_rows, path, filename)
+    try:
+        missing = {"fecha", "valor"} - set(source.header)
+        if missing:
+            raise ImportFormatError(f"Faltan columnas: {', '.join(sorted(missing))}")
+        rows = iter(source)
+        while batch := await run_io(_next_batch, rows, size):
+            report.filas += len(batch)
+            latest: dict[date, tuple[int, Decimal]] = {}
+            for fila, raw in batch:
+                try:
+                    row = IndicatorImportRow.model_validate(raw)
+                except ValidationError as exc:
+                    _add_error(report, fila, *_error_messages(exc))
+                    continue
+                problem = _check_row(tipo, row)
+                if problem:
+                    _add_error(report, fila, problem)
+                    continue
+                day = month_start(row.fecha) if tipo == IndicatorType.IPC else row.fecha
+                latest[day] = (fila, row.valor)
+            if not latest:
+                continue
+
+            try:
+                stored = await _stored_values(session, tipo, list(latest))
+                changed = {day: valor for day, (_, valor) in latest.items() if stored.get(day) != valor}
+                if changed:
+                    stmt = insert_for(session, EconomicIndicator).values(
+                        [{"tipo": tipo, "fecha": day, "valor": valor} for day, valor in changed.items()]
+                    )
+                    await session.execute(
+                        stmt.on_conflict_do_update(
+                            index_elements=[EconomicIndicator.tipo, EconomicIndicator.fecha],
+                            set_={"valor": stmt.excluded.valor, "updated_at": func.now()},
+                        )
+                    )
+                await session.commit()
+            except SQLAlchemyError as exc:
+                await session.rollback()
+                detail = str(getattr(exc, "orig", None) or exc).splitlines()[0][:300]
+                for fila, _ in latest.values():
+                    _add_error(report, fila, f"Lote rechazado por la base de datos: {detail}")
+                continue
+            report.insertadas += len(changed.keys() - stored.keys())
+            report.actualizadas += len(changed.keys() & stored.keys())
+            if changed:
+                first = min(changed)
+                report.cambios_desde = min(first, report.cambios_desde or first)
+    finally:
+        await run_io(source.close)
+    return report
+
+
+@dataclass
+class RateSeries:
+    """In-memory UF/IPC values; lookups return None when the value is not loaded yet."""
+
+    uf_days: list[date] = field(default_factory=list)
+    uf_values: list[Decimal] = field(default_factory=list)
+    ipc: dict[date, Decimal] = field(default_factory=dict)
+
+    def uf_on(self, day: date) -> Decimal | None:
+        # Past the last loaded day the UF is unknown, not the last value.
+        if not self.uf_days or day > self.uf_days[-1] or day < self.uf_days[0]:
+            return None
+        return self.uf_values[bisect.bisect_right(self.uf_days, day) - 1]
+
+    def ipc_change(self, first_month: date, months: int) -> Decimal | None:
+        """Compound IPC factor of ``months`` months starting at ``first_month`` (``1.0123`` = +1.23 %)."""
+        factor = Decimal(1)
+        current = first_month
+        for _ in range(months):
+            change = self.ipc.get(current)
+            if change is None:
+                return None
+            factor *= 1 + change / _HUNDRED
+            current = add_months(current, 1)
+        return factor
+
+
+async def load_series(session: AsyncSession) -> RateSeries:
+    series = RateSeries()
+    result = await session.execute(
+        select(EconomicIndicator.tipo, EconomicIndicator.fecha, EconomicIndicator.valor).order_by(
+            EconomicIndicator.tipo, EconomicIndicator.fecha
+        )
+    )
+    for tipo, fecha, valor in result:
+        if tipo == IndicatorType.UF:
+            series.uf_days.append(fecha)
+            series.uf_values.append(valor)
+        else:
+            series.ipc[fecha] = valor
+    return series
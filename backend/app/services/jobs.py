@@ -0,0 +1,229 @@
+"""Persistent background job queue.
+
+Jobs are rows in ``trabajos``. Request handlers ``enqueue`` them inside their
+own transaction; a pool of asyncio workers started with the app claims due
+jobs (``FOR UPDATE SKIP LOCKED`` on PostgreSQL), runs the registered handler
+and records the result. Failures are retried with exponential backoff until
+``max_intentos``; handlers raise :class:`JobError` for failures that retrying
+cannot fix. A job whose worker died is reclaimed once its lease expires.
+"""
+
+import asyncio
+import json
+import logging
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable
+from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.events import on_commit_changes
+from app.db.session import AsyncSessionLocal
+from app.models.job import Job, JobState
+
+logger = logging.getLogger(__name__)
+
+
+class JobError(Exception):
+    """Permanent job failure: the job is marked failed without further retries."""
+
+
+@dataclass
+class JobContext:
+    session: AsyncSession
+    job: Job
+    payload: dict
+    _after_commit: list[Callable[[], Awaitable[Any]]] = field(default_factory=list)
+
+    def after_commit(self, callback: Callable[[], Awaitable[Any]]) -> None:
+        """Run ``callback`` once the job's transaction has committed (e.g. to publish events)."""
+        self._after_commit.append(callback)
+
+
+JobHandler = Callable[[JobContext], Awaitable[dict | None]]
+
+_handlers: dict[str, JobHandler] = {}
+
+
+def job_handler(tipo: str) -> Callable[[JobHandler], JobHandler]:
+    def register(func: JobHandler) -> JobHandler:
+        _handlers[tipo] = func
+        return func
+
+    return register
+
+
+def enqueue(
+    session: AsyncSession,
+    tipo: str,
+    payload: dict,
+    *,
+    created_by: UUID | None = None,
+    max_intentos: int | None = None,
+) -> Job:
+    """Add a job to the caller's transaction; it becomes visible to workers on commit."""
+    job = Job(
+        tipo=tipo,
+        estado=JobState.PENDIENTE,
+        payload_json=json.dumps(jsonable_encoder(payload)),
+        intentos=0,
+        max_intentos=max_intentos or settings.jobs_max_attempts,
+        run_after=_utcnow(),
+        created_by=created_by,
+    )
+    session.add(job)
+    return job
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def backoff_seconds(attempt: int) -> float:
+    base = settings.jobs_backoff_seconds
+    delay = min(base * 2 ** max(attempt - 1, 0), settings.jobs_backoff_max_seconds)
+    return delay + random.uniform(0, base)
+
+
+class JobWorker:
+    def __init__(self, concurrency: int, poll_interval: float) -> None:
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        # Bind the event to the running loop (it may have been created at import time).
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run(i), name=f"job-worker-{i}") for i in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, index: int) -> None:
+        while True:
+            try:
+                job_id = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job worker %s could not claim a job", index)
+                job_id = None
+            if job_id is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            await self._execute(job_id)
+
+    async def _claim(self) -> UUID | None:
+        now = _utcnow()
+        lease_expired = now - timedelta(seconds=settings.jobs_lease_seconds)
+        candidate = (
+            select(Job.id)
+            .where(
+                or_(
+                    and_(Job.estado == JobState.PENDIENTE, Job.run_after <= now),
+                    and_(Job.estado == JobState.EN_PROCESO, Job.locked_at < lease_expired),
+                )
+            )
+            .order_by(Job.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with AsyncSessionLocal() as session:
+            while True:
+                result = await session.execute(
+                    update(Job)
+                    .where(Job.id == candidate)
+                    .values(estado=JobState.EN_PROCESO, locked_at=now, intentos=Job.intentos + 1)
+                    .returning(Job.id, Job.tipo, Job.intentos, Job.max_intentos)
+                    .execution_options(synchronize_session=False)
+                )
+                claimed = result.one_or_none()
+                if claimed is None or claimed.intentos <= claimed.max_intentos:
+                    await session.commit()
+                    return claimed.id if claimed is not None else None
+                # An expired lease on the last attempt (worker crashed or hung): fail instead of running again.
+                attempts = claimed.intentos - 1
+                await session.execute(
+                    update(Job)
+                    .where(Job.id == claimed.id)
+                    .values(
+                        estado=JobState.FALLIDO,
+                        intentos=attempts,
+                        error=f"Lease expirado en el intento {attempts}",
+                        finished_at=now,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+                logger.warning("Job %s (%s) failed: lease expired on attempt %s", claimed.id, claimed.tipo, attempts)
+
+    async def _execute(self, job_id: UUID) -> None:
+        async with AsyncSessionLocal() as session:
+            job = await session.get(Job, job_id)
+            if job is None:
+                return
+            ctx = JobContext(session=session, job=job, payload=json.loads(job.payload_json or "{}"))
+            handler = _handlers.get(job.tipo)
+            try:
+                if handler is None:
+                    raise JobError(f"Tipo de trabajo desconocido: {job.tipo}")
+                result = await asyncio.wait_for(handler(ctx), settings.jobs_lease_seconds)
+                job.estado = JobState.COMPLETADO
+                job.result_json = json.dumps(jsonable_encoder(result or {}))
+                job.error = None
+                job.finished_at = _utcnow()
+                await session.commit()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                await session.rollback()
+                await self._record_failure(session, job_id, exc)
+                return
+
+            for callback in ctx._after_commit:
+                try:
+                    await callback()
+                except Exception:
+                    logger.exception("After-commit callback failed for job %s", job_id)
+
+    async def _record_failure(self, session: AsyncSession, job_id: UUID, exc: Exception) -> None:
+        job = await session.get(Job, job_id)
+        if job is None:
+            return
+        permanent = isinstance(exc, JobError) or job.intentos >= job.max_intentos
+        job.error = f"{type(exc).__name__}: {exc}"[:2000]
+        if permanent:
+            job.estado = JobState.FALLIDO
+            job.finished_at = _utcnow()
+            logger.warning("Job %s (%s) failed: %s", job.id, job.tipo, job.error)
+        else:
+            job.estado = JobState.PENDIENTE
+            job.run_after = _utcnow() + timedelta(seconds=backoff_seconds(job.intentos))
+            logger.info("Job %s (%s) retry %s: %s", job.id, job.tipo, job.intentos, job.error)
+        await session.commit()
+
+
+worker = JobWorker(settings.jobs_workers, settings.jobs_poll_seconds)
+
+
+@on_commit_changes
+def _wake_on_enqueue(tables: set[str]) -> None:
+    if Job.__tablename__ in tables:
+        worker.wake()
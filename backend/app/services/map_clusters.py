@@ -0,0 +1,165 @@
+"""Viewport-aware, clustered GeoJSON for the property map.
+
+The visible bounding box is split into a grid whose cell size depends on the
+zoom level (``CELLS_PER_TILE`` cells across each 256px web-mercator tile).
+Cells holding several properties become a single cluster feature; singleton
+cells and everything at ``MAX_CLUSTER_ZOOM`` and above are returned as regular
+property features.
+
+On PostgreSQL the bbox filter uses ``ST_Intersects`` on the ``latlon``
+geography column (served by the GIST index ``idx_propiedades_latlon``) and the
+grid is aggregated in SQL. Other databases (SQLite in dev) filter on the
+numeric ``lat``/``lon`` columns and aggregate the grid in Python.
+"""
+
+import math
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import String, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.property import Property
+from app.services.map_features import load_features
+
+CELLS_PER_TILE = 4
+MAX_CLUSTER_ZOOM = 16
+
+
+@dataclass(frozen=True)
+class BBox:
+    min_lon: float
+    min_lat: float
+    max_lon: float
+    max_lat: float
+
+
+@dataclass
+class _Cell:
+    count: int = 0
+    sum_lon: float = 0.0
+    sum_lat: float = 0.0
+    estados: dict[str, int] = field(default_factory=dict)
+    sample_id: str | None = None
+
+
+def parse_bbox(raw: str) -> BBox:
+    """Parse ``min_lon,min_lat,max_lon,max_lat`` (Leaflet's ``toBBoxString``)."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in raw.split(","))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="bbox debe ser min_lon,min_lat,max_lon,max_lat")
+    if not (-180 <= min_lon <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="bbox fuera de rango")
+    return BBox(min_lon, min_lat, max_lon, max_lat)
+
+
+def cell_size(zoom: int) -> float:
+    """Grid cell size in degrees for a zoom level."""
+    return 360.0 / (2**zoom * CELLS_PER_TILE)
+
+
+def _is_postgis(session: AsyncSession) -> bool:
+    return session.bind is not None and session.bind.dialect.name == "postgresql"
+
+
+def bbox_filter(session: AsyncSession, bbox: BBox):
+    if _is_postgis(session):
+        envelope = func.geography(func.ST_MakeEnvelope(bbox.min_lon, bbox.min_lat, bbox.max_lon, bbox.max_lat, 4326))
+        return func.ST_Intersects(Property.latlon, envelope)
+    return (
+        Property.lat.is_not(None)
+        & Property.lon.is_not(None)
+        & Property.lon.between(bbox.min_lon, bbox.max_lon)
+        & Property.lat.between(bbox.min_lat, bbox.max_lat)
+    )
+
+
+async def _grid_postgis(session: AsyncSession, bbox: BBox, size: float) -> dict[tuple[int, int], _Cell]:
+    geom = func.geometry(Property.latlon)
+    x = func.ST_X(geom)
+    y = func.ST_Y(geom)
+    gx = func.floor(x / size).label("gx")
+    gy = func.floor(y / size).label("gy")
+    result = await session.execute(
+        select(
+            gx,
+            gy,
+            Property.estado_actual,
+            func.count(),
+            func.sum(x),
+            func.sum(y),
+            func.min(cast(Property.id, String)),
+        )
+        .where(bbox_filter(session, bbox))
+        .group_by(gx, gy, Property.estado_actual)
+    )
+    cells: dict[tuple[int, int], _Cell] = {}
+    for cx, cy, estado, count, sum_lon, sum_lat, sample_id in result:
+        cell = cells.setdefault((int(cx), int(cy)), _Cell())
+        cell.count += count
+        cell.sum_lon += float(sum_lon)
+        cell.sum_lat += float(sum_lat)
+        cell.estados[estado.value] = cell.estados.get(estado.value, 0) + count
+        cell.sample_id = cell.sample_id or sample_id
+    return cells
+
+
+async def _grid_python(session: AsyncSession, bbox: BBox, size: float) -> dict[tuple[int, int], _Cell]:
+    result = await session.execute(
+        select(Property.id, Property.lon, Property.lat, Property.estado_actual).where(bbox_filter(session, bbox))
+    )
+    cells: dict[tuple[int, int], _Cell] = {}
+    for prop_id, lon, lat, estado in result:
+        lon_f, lat_f = float(lon), float(lat)
+        cell = cells.setdefault((math.floor(lon_f / size), math.floor(lat_f / size)), _Cell())
+        cell.count += 1
+        cell.sum_lon += lon_f
+        cell.sum_lat += lat_f
+        cell.estados[estado.value] = cell.estados.get(estado.value, 0) + 1
+        cell.sample_id = cell.sample_id or str(prop_id)
+    return cells
+
+
+async def _point_features(session: AsyncSession, bbox: BBox, ids: list[UUID] | None = None) -> list[dict]:
+    stmt = select(Property).where(bbox_filter(session, bbox))
+    if ids is not None:
+        if not ids:
+            return []
+        stmt = stmt.where(Property.id.in_(ids))
+    result = await session.execute(stmt)
+    return await load_features(session, list(result.scalars().all()))
+
+
+async def clustered_features(session: AsyncSession, bbox: BBox, zoom: int) -> list[dict]:
+    if zoom >= MAX_CLUSTER_ZOOM:
+        return await _point_features(session, bbox)
+
+    size = cell_size(zoom)
+    grid = _grid_postgis if _is_postgis(session) else _grid_python
+    cells = await grid(session, bbox, size)
+
+    features: list[dict] = []
+    singleton_ids: list[UUID] = []
+    for (cx, cy), cell in cells.items():
+        if cell.count == 1 and cell.sample_id:
+            singleton_ids.append(UUID(cell.sample_id))
+            continue
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [cell.sum_lon / cell.count, cell.sum_lat / cell.count],
+                },
+                "properties": {
+                    "cluster": True,
+                    "cluster_id": f"{zoom}/{cx}/{cy}",
+                    "point_count": cell.count,
+                    "estados": cell.estados,
+                },
+            }
+        )
+    features.extend(await _point_features(session, bbox, singleton_ids))
+    return features
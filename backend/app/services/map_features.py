@@ -0,0 +1,102 @@
+"""GeoJSON features for the property map."""
+
+from datetime import date
+from typing import Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.clock import local_today
+from app.models.contract import ContractStatus, LeaseContract
+from app.models.person import Person
+from app.models.property import Property
+
+
+def next_payment_day(dia_pago: int | None, today: date | None = None) -> date | None:
+    if not dia_pago:
+        return None
+    today = today or local_today()
+    try:
+        candidate = date(today.year, today.month, dia_pago)
+    except ValueError:
+        return None
+    if candidate < today:
+        month = today.month + 1
+        year = today.year + (1 if month > 12 else 0)
+        month = 1 if month > 12 else month
+        try:
+            candidate = date(year, month, dia_pago)
+        except ValueError:
+            return None
+    return candidate
+
+
+def build_feature(
+    prop: Property,
+    contract: LeaseContract | None = None,
+    arrendatario: Person | None = None,
+    today: date | None = None,
+) -> dict:
+    arr_name = None
+    next_cobranza = None
+    fecha_fin = None
+    if contract is not None and arrendatario is not None:
+        arr_name = " ".join(filter(None, [arrendatario.nombres, arrendatario.apellidos]))
+        fecha_fin = contract.fecha_fin
+        next_cobranza = next_payment_day(contract.dia_pago, today)
+
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "Point",
+            "coordinates": [float(prop.lon), float(prop.lat)],
+        },
+        "properties": {
+            "id": str(prop.id),
+            "codigo": prop.codigo,
+            "direccion": prop.direccion_linea1,
+            "estado": prop.estado_actual,
+            "tipo": prop.tipo,
+            "comuna": prop.comuna,
+            "region": prop.region,
+            "valor_arriendo": float(prop.valor_arriendo) if prop.valor_arriendo else None,
+            "valor_venta": float(prop.valor_venta) if prop.valor_venta else None,
+            "arrendatario": arr_name,
+            "fecha_fin_contrato": fecha_fin,
+            "proxima_cobranza": next_cobranza,
+        },
+    }
+
+
+async def load_current_contracts(
+    session: AsyncSession, prop_ids: Sequence[UUID]
+) -> dict[UUID, tuple[LeaseContract, Person]]:
+    """Latest VIGENTE contract (by fecha_inicio) and its tenant for each property."""
+    if not prop_ids:
+        return {}
+    contracts_result = await session.execute(
+        select(LeaseContract, Person)
+        .join(Person, LeaseContract.arrendatario_id == Person.id)
+        .where(
+            LeaseContract.propiedad_id.in_(prop_ids),
+            LeaseContract.estado == ContractStatus.VIGENTE,
+        )
+    )
+    latest: dict[UUID, tuple[LeaseContract, Person]] = {}
+    for contract, arrendatario in contracts_result:
+        prev = latest.get(contract.propiedad_id)
+        if prev is None or contract.fecha_inicio > prev[0].fecha_inicio:
+            latest[contract.propiedad_id] = (contract, arrendatario)
+    return latest
+
+
+async def load_features(session: AsyncSession, props: Sequence[Property]) -> list[dict]:
+    """Map features for ``props`` (which must all have lat/lon)."""
+    today = local_today()
+    current = await load_current_contracts(session, [p.id for p in props])
+    features: list[dict] = []
+    for prop in props:
+        contract, arrendatario = current.get(prop.id, (None, None))
+        features.append(build_feature(prop, contract, arrendatario, today))
+    return features
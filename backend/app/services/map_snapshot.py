@@ -0,0 +1,154 @@
+"""In-process snapshot of the map feed.
+
+Building ``/properties/geojson`` from scratch means loading every mapped
+property, its latest VIGENTE contract and tenant, and computing
+``proxima_cobranza`` for each. The snapshot keeps every feature already
+serialized (orjson bytes) per property, tagged with the portfolio version
+(``app.services.map_version``, assigned in commit order, so patching from the
+change log never skips a late commit) it reflects:
+
+- when the version moves, only the properties listed in ``mapa_cambios``
+  since the snapshot's version are reloaded and re-serialized (a ``reset``
+  entry, from a bulk statement without per-row logging, rebuilds everything);
+- when the local date changes, ``proxima_cobranza`` is recomputed from the
+  contract's ``dia_pago`` kept with each feature, without touching the
+  database, and only the features whose date moved are re-serialized;
+- the response is assembled by concatenating the feature bytes and reused
+  until the next change; ``bbox`` requests filter the snapshot by coordinates.
+
+A steady-state request therefore costs the cached version lookup and no
+per-property work. Each worker keeps its own snapshot; ``MAP_SNAPSHOT_ENABLED``
+turns it off.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date
+from typing import Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.clock import local_today
+from app.core.responses import dumps
+from app.models.property import Property
+from app.services.map_clusters import BBox
+from app.services.map_features import build_feature, load_current_contracts, next_payment_day
+from app.services.map_version import changes_since
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    lon: float
+    lat: float
+    dia_pago: int | None
+    feature: dict
+    body: bytes
+
+    def inside(self, bbox: BBox) -> bool:
+        return bbox.min_lon <= self.lon <= bbox.max_lon and bbox.min_lat <= self.lat <= bbox.max_lat
+
+
+def _mapped(stmt):
+    return stmt.where(Property.lat.is_not(None), Property.lon.is_not(None))
+
+
+async def _load_entries(session: AsyncSession, props: Sequence[Property], today: date) -> dict[UUID, _Entry]:
+    current = await load_current_contracts(session, [p.id for p in props])
+    entries: dict[UUID, _Entry] = {}
+    for prop in props:
+        contract, arrendatario = current.get(prop.id, (None, None))
+        feature = build_feature(prop, contract, arrendatario, today)
+        lon, lat = feature["geometry"]["coordinates"]
+        dia_pago = contract.dia_pago if contract is not None and arrendatario is not None else None
+        entries[prop.id] = _Entry(lon=lon, lat=lat, dia_pago=dia_pago, feature=feature, body=dumps(feature))
+    return entries
+
+
+class MapSnapshot:
+    def __init__(self) -> None:
+        self.version: int | None = None
+        self.day: date | None = None
+        self._entries: dict[UUID, _Entry] = {}
+        # Assembled full collections, keyed by the ``reset`` flag.
+        self._assembled: dict[bool, bytes] = {}
+        self._lock = asyncio.Lock()
+
+    async def collection(
+        self, session: AsyncSession, version: int, *, reset: bool = False, bbox: BBox | None = None
+    ) -> bytes:
+        """FeatureCollection JSON for ``version`` (or newer), optionally limited to ``bbox``."""
+        today = local_today()
+        async with self._lock:
+            # Checked under the lock: a concurrent refresh may already have moved the snapshot.
+            if self.version is None or self.version < version or self.day != today:
+                await self._refresh(session, version, today)
+            if bbox is not None:
+                return self._assemble([e.body for e in self._entries.values() if e.inside(bbox)], reset)
+            body = self._assembled.get(reset)
+            if body is None:
+                body = self._assembled[reset] = self._assemble([e.body for e in self._entries.values()], reset)
+            return body
+
+    def _assemble(self, bodies: list[bytes], reset: bool) -> bytes:
+        head = b'{"type":"FeatureCollection","version":%d' % self.version
+        if reset:
+            head += b',"reset":true'
+        return head + b',"features":[' + b",".join(bodies) + b"]}"
+
+    async def _refresh(self, session: AsyncSession, version: int, today: date) -> None:
+        if self.version is None:
+            await self._rebuild(session, version, today)
+            return
+        if self.version < version:
+            delta = await changes_since(session, self.version, version)
+            if delta.reset:
+                await self._rebuild(session, version, today)
+                return
+            await self._patch(session, delta.upserted, delta.deleted, today)
+            self.version = version
+        if self.day != today:
+            self._rollover(today)
+
+    async def _rebuild(self, session: AsyncSession, version: int, today: date) -> None:
+        result = await session.execute(_mapped(select(Property)))
+        props = list(result.scalars().all())
+        self._entries = await _load_entries(session, props, today)
+        self.version = version
+        self.day = today
+        self._assembled.clear()
+        logger.info("Map snapshot rebuilt at version %s (%s features)", version, len(self._entries))
+
+    async def _patch(self, session: AsyncSession, upserted: set[UUID], deleted: set[UUID], today: date) -> None:
+        for prop_id in deleted:
+            self._entries.pop(prop_id, None)
+        if upserted:
+            result = await session.execute(_mapped(select(Property).where(Property.id.in_(upserted))))
+            loaded = await _load_entries(session, list(result.scalars().all()), today)
+            # Updated to drop its coordinates: gone from the map.
+            for prop_id in upserted - loaded.keys():
+                self._entries.pop(prop_id, None)
+            self._entries.update(loaded)
+        self._assembled.clear()
+
+    def _rollover(self, today: date) -> None:
+        changed = 0
+        for entry in self._entries.values():
+            if entry.dia_pago is None:
+                continue
+            properties = entry.feature["properties"]
+            proxima = next_payment_day(entry.dia_pago, today)
+            if proxima != properties["proxima_cobranza"]:
+                properties["proxima_cobranza"] = proxima
+                entry.body = dumps(entry.feature)
+                changed += 1
+        self.day = today
+        self._assembled.clear()
+        logger.info("Map snapshot rolled over to %s (%s features updated)", today, changed)
+
+
+map_snapshot = MapSnapshot()
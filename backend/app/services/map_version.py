@@ -0,0 +1,277 @@
+"""Portfolio version for the map feed (ETag + ``?since=`` delta sync).
+
+Every flush that writes ``propiedades``, ``contratos_arriendo`` or ``personas``
+appends the affected property ids to ``mapa_cambios`` in the same transaction,
+with no version yet. At commit, one short statement bumps the single row of
+``mapa_version`` and stamps the transaction's rows with the new value; the row
+lock is held only from there to the commit, so writers run concurrently and
+versions are still assigned in commit order: a client that saw version N has
+seen every change tagged N or lower. (Log ids come from a sequence allocated at
+insert time and could commit out of order.)
+
+Bulk statements log the ids they touch when the caller knows them
+(:func:`log_map_changes`, with the :data:`MAP_LOGGED` execution option);
+otherwise they log a ``reset`` and clients reload everything.
+
+The current version is cached per process and engine, so conditional requests
+can be answered with ``304`` without touching the database, and a replica
+request never pairs the primary's newer version with the replica's older log.
+Local commits drop the cache immediately; writes from other workers are picked
+up after ``map_version_ttl_seconds``. A daily job prunes log entries older than
+``MAP_CHANGES_RETENTION_DAYS``; clients behind the pruned range get a reset.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import Connection, delete, event, func, insert, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.core.config import settings
+from app.db.events import on_commit_changes
+from app.models.contract import LeaseContract
+from app.models.map_change import MapChange, MapVersion
+from app.models.person import Person
+from app.models.property import Property
+from app.services.jobs import JobContext, job_handler
+from app.services.scheduler import Schedule, daily_at, register_schedule
+
+logger = logging.getLogger(__name__)
+
+MAP_TABLES = {Property.__tablename__, LeaseContract.__tablename__, Person.__tablename__}
+
+OP_INSERT = "insert"
+OP_UPDATE = "update"
+OP_DELETE = "delete"
+OP_RESET = "reset"
+
+MAP_CHANGES_PRUNE_JOB = "map.prune_changes"
+# Execution option for bulk statements whose caller logs the affected properties itself.
+MAP_LOGGED = "sigap_map_logged"
+_PENDING_KEY = "sigap_map_pending"
+_VERSION_ID = 1
+
+
+@dataclass
+class _VersionCache:
+    version: int | None = None
+    loaded_at: float = 0.0
+
+
+# Per engine: a replica may lag the primary, and the version must match the data it is read with.
+_caches: dict[object, _VersionCache] = {}
+
+
+@on_commit_changes
+def _invalidate(tables: set[str]) -> None:
+    if tables & MAP_TABLES:
+        for cache in _caches.values():
+            cache.version = None
+
+
+@event.listens_for(Session, "before_commit")
+def _stamp_version(session: Session) -> None:
+    """Give the transaction's ``mapa_cambios`` rows the next version, right before commit."""
+    if session.in_nested_transaction():
+        return
+    # Commit flushes after this hook; the log rows must exist before they are stamped.
+    session.flush()
+    if not session.info.pop(_PENDING_KEY, False):
+        return
+    connection = session.connection()
+    table = MapVersion.__table__
+    bumped = connection.execute(
+        update(table).where(table.c.id == _VERSION_ID).values(version=table.c.version + 1)
+    )
+    if bumped.rowcount == 0:
+        # Database created without the migration's seed row.
+        connection.execute(insert(table).values(id=_VERSION_ID, version=1))
+    version = connection.execute(select(table.c.version).where(table.c.id == _VERSION_ID)).scalar_one()
+    # Other transactions' unstamped rows are uncommitted, hence invisible here.
+    changes = MapChange.__table__
+    connection.execute(update(changes).where(changes.c.version.is_(None)).values(version=version))
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _forget_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _log(session: Session, connection: Connection, changes: dict[UUID | None, str]) -> None:
+    connection.execute(
+        insert(MapChange.__table__), [{"propiedad_id": pid, "op": op} for pid, op in changes.items()]
+    )
+    session.info[_PENDING_KEY] = True
+
+
+async def log_map_changes(session: AsyncSession, changes: dict[UUID, str]) -> None:
+    """Log the properties touched by a bulk statement executed with ``MAP_LOGGED``."""
+    if changes:
+        await session.run_sync(lambda sync_session: _log(sync_session, sync_session.connection(), changes))
+
+
+async def tenant_properties(session: AsyncSession, person_ids: list[UUID]) -> set[UUID]:
+    """Properties rented by ``person_ids`` (tenant names are shown on the map)."""
+    found: set[UUID] = set()
+    for start in range(0, len(person_ids), 1000):
+        result = await session.execute(
+            select(LeaseContract.propiedad_id)
+            .where(LeaseContract.arrendatario_id.in_(person_ids[start : start + 1000]))
+            .distinct()
+        )
+        found.update(result.scalars())
+    return found
+
+
+def _history_values(obj, attr: str) -> set:
+    hist = inspect(obj).attrs[attr].history
+    return {v for v in (*hist.added, *hist.deleted, *hist.unchanged) if v is not None}
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flush(session: Session, flush_context) -> None:
+    changes: dict[UUID, str] = {}
+    person_ids: set[UUID] = set()
+
+    def mark(prop_id: UUID | None, op: str) -> None:
+        if prop_id is None:
+            return
+        # insert/delete win over update for the same property in one flush
+        if changes.get(prop_id) in (OP_INSERT, OP_DELETE):
+            return
+        changes[prop_id] = op
+
+    for obj in session.new:
+        if isinstance(obj, Property):
+            mark(obj.id, OP_INSERT)
+        elif isinstance(obj, LeaseContract):
+            mark(obj.propiedad_id, OP_UPDATE)
+    for obj in session.dirty:
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, Property):
+            mark(obj.id, OP_UPDATE)
+        elif isinstance(obj, LeaseContract):
+            for prop_id in _history_values(obj, "propiedad_id"):
+                mark(prop_id, OP_UPDATE)
+        elif isinstance(obj, Person):
+            person_ids.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Property):
+            changes[obj.id] = OP_DELETE
+        elif isinstance(obj, LeaseContract):
+            mark(obj.propiedad_id, OP_UPDATE)
+        elif isinstance(obj, Person):
+            person_ids.add(obj.id)
+
+    connection = session.connection()
+    if person_ids:
+        # Tenant names are shown on the map: touch every property they rent.
+        rows = connection.execute(
+            select(LeaseContract.propiedad_id).where(LeaseContract.arrendatario_id.in_(person_ids)).distinct()
+        )
+        for (prop_id,) in rows:
+            mark(prop_id, OP_UPDATE)
+
+    if changes:
+        _log(session, connection, changes)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk(state: ORMExecuteState) -> None:
+    if not (state.is_update or state.is_delete or state.is_insert):
+        return
+    if state.execution_options.get(MAP_LOGGED):
+        return
+    table = getattr(state.statement, "table", None)
+    if getattr(table, "name", None) in MAP_TABLES:
+        _log(state.session, state.session.connection(), {None: OP_RESET})
+
+
+async def current_version(session: AsyncSession) -> int:
+    """Latest version visible through ``session``'s engine (primary or replica)."""
+    cache = _caches.setdefault(session.bind, _VersionCache())
+    now = time.monotonic()
+    if cache.version is not None and now - cache.loaded_at < settings.map_version_ttl_seconds:
+        return cache.version
+    version = (await session.execute(select(MapVersion.version).where(MapVersion.id == _VERSION_ID))).scalar()
+    cache.version = int(version or 0)
+    cache.loaded_at = now
+    return cache.version
+
+
+@dataclass
+class MapDelta:
+    reset: bool = False
+    upserted: set[UUID] = field(default_factory=set)
+    inserted: set[UUID] = field(default_factory=set)
+    deleted: set[UUID] = field(default_factory=set)
+
+
+async def changes_since(session: AsyncSession, since: int, version: int) -> MapDelta:
+    """Collapse the change log between ``since`` (exclusive) and ``version`` (inclusive)."""
+    if since > version:
+        return MapDelta(reset=True)
+    oldest = (await session.execute(select(func.min(MapChange.version)))).scalar_one()
+    if oldest is not None and since < oldest - 1:
+        # The log was pruned past the client's version.
+        return MapDelta(reset=True)
+
+    result = await session.execute(
+        select(MapChange.propiedad_id, MapChange.op)
+        .where(MapChange.version > since, MapChange.version <= version)
+        .order_by(MapChange.version, MapChange.id)
+    )
+    delta = MapDelta()
+    first_op: dict[UUID, str] = {}
+    last_op: dict[UUID, str] = {}
+    for prop_id, op in result:
+        if op == OP_RESET or prop_id is None:
+            return MapDelta(reset=True)
+        first_op.setdefault(prop_id, op)
+        last_op[prop_id] = op
+
+    for prop_id, op in last_op.items():
+        if op == OP_DELETE:
+            if first_op[prop_id] != OP_INSERT:
+                delta.deleted.add(prop_id)
+            continue
+        delta.upserted.add(prop_id)
+        if first_op[prop_id] == OP_INSERT:
+            delta.inserted.add(prop_id)
+    return delta
+
+
+async def prune_changes(session: AsyncSession, before: datetime) -> int:
+    """Drop whole versions logged before ``before``; returns the number of rows deleted."""
+    cutoff = (
+        await session.execute(select(func.max(MapChange.version)).where(MapChange.created_at < before))
+    ).scalar_one()
+    if cutoff is None:
+        return 0
+    result = await session.execute(
+        delete(MapChange).where(MapChange.version <= cutoff).execution_options(synchronize_session=False)
+    )
+    return max(result.rowcount or 0, 0)
+
+
+@job_handler(MAP_CHANGES_PRUNE_JOB)
+async def _prune_changes_job(ctx: JobContext) -> dict:
+    before = datetime.now(timezone.utc) - timedelta(days=settings.map_changes_retention_days)
+    deleted = await prune_changes(ctx.session, before)
+    logger.info("Pruned %s map change rows older than %s", deleted, before)
+    return {"eliminadas": deleted}
+
+
+register_schedule(
+    Schedule(
+        nombre="purgar_mapa_cambios",
+        job_tipo=MAP_CHANGES_PRUNE_JOB,
+        next_run=daily_at(settings.map_changes_prune_hour),
+    )
+)
@@ -0,0 +1,149 @@
+"""Overdue sweep: marks late charges and computes their late fee (mora).
+
+Runs daily (``MORA_SWEEP_HOUR``) as a job, and on demand. Everything happens in
+set-based statements inside one transaction, whatever the portfolio size:
+
+1. a ``barridos_mora`` row records the cut-off date, grace days and rate used;
+2. ``INSERT ... SELECT`` into ``mora_historial`` the PENDIENTE charges that are
+   about to become ATRASADO, with their old and new fee;
+3. one ``UPDATE cobranzas`` over the open charges (PENDIENTE, ATRASADO,
+   PARCIAL) due before ``today - MORA_GRACE_DAYS``: PENDIENTE becomes ATRASADO
+   (PARCIAL keeps its state) and ``mora_monto`` is set to
+   ``saldo * MORA_MONTHLY_RATE_PCT / 100 * dias_atraso / 30`` rounded to pesos.
+
+``saldo`` is the adjusted (or original) amount minus the payments, and the days
+are counted from ``fecha_vencimiento``: the grace period only delays when a
+charge is considered late. Rows whose state and fee would not change are not
+touched, so running the sweep twice on the same day is a no-op apart from the
+run record. Fees of charges already ATRASADO are not logged per charge on each
+run; they follow from the balance, the dates and the rate stored on the run.
+"""
+
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy import Date, Integer, Numeric, String, and_, case, cast, func, insert, literal, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.clock import local_today
+from app.core.config import settings
+from app.core.types import GUID
+from app.db.upsert import new_uuid
+from app.models.charge import Charge, ChargeState
+from app.models.overdue import OverdueSweep, OverdueTransition
+from app.services.broker import publish
+from app.services.jobs import JobContext, job_handler
+from app.services.scheduler import Schedule, daily_at, register_schedule
+
+logger = logging.getLogger(__name__)
+
+OVERDUE_SWEEP_JOB = "charges.overdue_sweep"
+
+SWEPT_STATES = (ChargeState.PENDIENTE, ChargeState.ATRASADO, ChargeState.PARCIAL)
+
+
+def _days_late(session: AsyncSession, today: date):
+    dialect = session.bind.dialect.name if session.bind is not None else ""
+    if dialect == "postgresql":
+        # date - date is an integer number of days.
+        return literal(today, Date) - Charge.fecha_vencimiento
+    return cast(func.julianday(literal(today, Date)) - func.julianday(Charge.fecha_vencimiento), Integer)
+
+
+def _late_fee(session: AsyncSession, today: date, monthly_rate_pct: Decimal):
+    balance = func.coalesce(Charge.monto_ajustado, Charge.monto_original) - Charge.monto_pagado_total
+    unpaid = case((balance > 0, balance), else_=0)
+    rate = literal(monthly_rate_pct, Numeric(6, 3))
+    return func.round(unpaid * rate * _days_late(session, today) / 3000, 0)
+
+
+async def sweep_overdue(
+    session: AsyncSession,
+    today: date | None = None,
+    *,
+    job_id: UUID | None = None,
+    created_by: UUID | None = None,
+) -> OverdueSweep:
+    """Mark overdue charges and refresh their fees as of ``today`` (local date); does not commit."""
+    today = today or local_today()
+    grace_days = max(settings.mora_grace_days, 0)
+    rate = settings.mora_monthly_rate_pct
+    cutoff = today - timedelta(days=grace_days)
+
+    run = OverdueSweep(
+        fecha_corte=today,
+        dias_gracia=grace_days,
+        tasa_mensual_pct=rate,
+        marcadas=0,
+        actualizadas=0,
+        job_id=job_id,
+        created_by=created_by,
+    )
+    session.add(run)
+    await session.flush()
+
+    fee = _late_fee(session, today, rate)
+    overdue = and_(Charge.estado.in_(SWEPT_STATES), Charge.fecha_vencimiento < cutoff)
+    # Enum columns store member names.
+    late_state = cast(literal(ChargeState.ATRASADO.name), Charge.estado.type)
+
+    logged = await session.execute(
+        insert(OverdueTransition).from_select(
+            ["id", "barrido_id", "cobranza_id", "estado_anterior", "estado_nuevo", "mora_anterior", "mora_nueva"],
+            select(
+                new_uuid(session),
+                literal(run.id, GUID()),
+                Charge.id,
+                literal(ChargeState.PENDIENTE.name, String(20)),
+                literal(ChargeState.ATRASADO.name, String(20)),
+                Charge.mora_monto,
+                fee,
+            ).where(overdue, Charge.estado == ChargeState.PENDIENTE),
+        )
+    )
+    updated = await session.execute(
+        update(Charge)
+        .where(overdue, or_(Charge.estado == ChargeState.PENDIENTE, Charge.mora_monto.is_distinct_from(fee)))
+        .values(
+            estado=case((Charge.estado == ChargeState.PENDIENTE, late_state), else_=Charge.estado),
+            mora_monto=fee,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    total = await session.execute(select(func.sum(Charge.mora_monto)).where(overdue))
+
+    run.marcadas = max(logged.rowcount or 0, 0)
+    run.actualizadas = max(updated.rowcount or 0, 0)
+    run.mora_total = total.scalar_one()
+    await session.flush()
+    return run
+
+
+@job_handler(OVERDUE_SWEEP_JOB)
+async def _overdue_sweep_job(ctx: JobContext) -> dict:
+    run = await sweep_overdue(ctx.session, job_id=ctx.job.id)
+    logger.info("Overdue sweep %s: %s marked, %s updated", run.fecha_corte, run.marcadas, run.actualizadas)
+    if run.actualizadas:
+        ctx.after_commit(
+            lambda: publish(
+                "charges.overdue_swept", barrido_id=run.id, marcadas=run.marcadas, actualizadas=run.actualizadas
+            )
+        )
+    return {
+        "barrido_id": run.id,
+        "fecha_corte": run.fecha_corte,
+        "marcadas": run.marcadas,
+        "actualizadas": run.actualizadas,
+        "mora_total": run.mora_total,
+    }
+
+
+register_schedule(
+    Schedule(
+        nombre="barrido_mora",
+        job_tipo=OVERDUE_SWEEP_JOB,
+        next_run=daily_at(settings.mora_sweep_hour),
+    )
+)
@@ -0,0 +1,126 @@
+"""Payment ledger: the single place where payments are posted against charges.
+
+``Charge.monto_pagado_total`` materializes the sum of the charge's
+``pagos_detalle`` rows, so the state of a charge follows from one comparison
+instead of an aggregate over its payments. Every posting path (manual payment,
+receipt read by the AI, bulk posting) goes through :func:`apply_payments`:
+
+1. the affected charges are read with ``SELECT ... FOR UPDATE`` in primary key
+   order, so concurrent postings to the same charge queue up instead of
+   losing an increment, and bulk postings cannot deadlock each other;
+2. the payment rows are added and each charge's total is increased by the sum
+   of its new payments;
+3. the state is derived from the new total: PAGADO once the adjusted (or
+   original) amount is covered, PARCIAL while something is paid, otherwise the
+   charge keeps PENDIENTE/ATRASADO.
+
+Bulk imports never set a paid state; when they change a charge's amounts,
+:func:`resettle_charges` re-derives its state from the same total.
+
+Nothing is committed here; callers commit together with their own changes.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Sequence
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.charge import Charge, ChargeState, PaymentDetail
+
+UNPAID_STATES = (ChargeState.PENDIENTE, ChargeState.ATRASADO)
+
+
+class PaymentError(Exception):
+    """A payment cannot be posted (unknown charge)."""
+
+
+@dataclass(frozen=True)
+class PaymentInput:
+    cobranza_id: UUID
+    monto_pagado: Decimal
+    # Defaults to the charge's due date.
+    fecha_pago: date | None = None
+    medio_pago: str | None = None
+    referencia: str | None = None
+
+
+def charge_target(charge: Charge) -> Decimal:
+    return charge.monto_ajustado or charge.monto_original
+
+
+def _settle(charge: Charge, last_payment: date) -> None:
+    total = charge.monto_pagado_total
+    if total >= charge_target(charge):
+        charge.estado = ChargeState.PAGADO
+        charge.fecha_pago = last_payment
+    elif total > 0:
+        charge.estado = ChargeState.PARCIAL
+    elif charge.estado not in UNPAID_STATES:
+        charge.estado = ChargeState.PENDIENTE
+
+
+async def lock_charges(session: AsyncSession, charge_ids: Sequence[UUID]) -> dict[UUID, Charge]:
+    """Load and row-lock charges (no-op lock on SQLite, which serializes writers)."""
+    result = await session.execute(
+        select(Charge)
+        .where(Charge.id.in_(sorted(set(charge_ids))))
+        .order_by(Charge.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return {charge.id: charge for charge in result.scalars()}
+
+
+async def apply_payments(
+    session: AsyncSession, payments: Sequence[PaymentInput]
+) -> list[tuple[Charge, PaymentDetail]]:
+    """Post ``payments`` (all or nothing); returns ``(charge, payment)`` in input order, flushed."""
+    charges = await lock_charges(session, [item.cobranza_id for item in payments])
+    missing = {item.cobranza_id for item in payments} - charges.keys()
+    if missing:
+        raise PaymentError("Cobranzas no encontradas: " + ", ".join(sorted(str(cid) for cid in missing)))
+
+    posted: list[tuple[Charge, PaymentDetail]] = []
+    last_payment: dict[UUID, date] = {}
+    for item in payments:
+        charge = charges[item.cobranza_id]
+        payment = PaymentDetail(
+            cobranza_id=charge.id,
+            monto_pagado=item.monto_pagado,
+            fecha_pago=item.fecha_pago or charge.fecha_vencimiento,
+            medio_pago=item.medio_pago,
+            referencia=item.referencia,
+        )
+        session.add(payment)
+        charge.monto_pagado_total = (charge.monto_pagado_total or Decimal("0")) + item.monto_pagado
+        last_payment[charge.id] = max(payment.fecha_pago, last_payment.get(charge.id, payment.fecha_pago))
+        posted.append((charge, payment))
+
+    for charge_id, paid_on in last_payment.items():
+        _settle(charges[charge_id], paid_on)
+    await session.flush()
+    return posted
+
+
+async def resettle_charges(session: AsyncSession, charge_ids: Sequence[UUID]) -> None:
+    """Re-derive the state of charges whose amounts changed outside the ledger (bulk import)."""
+    charges = await lock_charges(session, charge_ids)
+    if not charges:
+        return
+    result = await session.execute(
+        select(PaymentDetail.cobranza_id, func.max(PaymentDetail.fecha_pago))
+        .where(PaymentDetail.cobranza_id.in_(list(charges)))
+        .group_by(PaymentDetail.cobranza_id)
+    )
+    last_payment = dict(result.tuples().all())
+    for charge in charges.values():
+        _settle(charge, last_payment.get(charge.id) or charge.fecha_pago or charge.fecha_vencimiento)
+    await session.flush()
+
+
+async def apply_payment(session: AsyncSession, payment: PaymentInput) -> tuple[Charge, PaymentDetail]:
+    return (await apply_payments(session, [payment]))[0]
@@ -0,0 +1,21 @@
+"""PDF text extraction for the CPU process pool.
+
+Kept free of app imports (DB engine, jobs, broker, storage) so the spawned
+worker processes of ``app.core.executors`` import only PyPDF2 when they
+unpickle :func:`extract_pdf_text`.
+"""
+
+from io import BytesIO
+
+import PyPDF2
+from PyPDF2 import PdfReader
+
+PDF_TEXT_VARIANT = f"pypdf2-{PyPDF2.__version__}"
+
+
+def extract_pdf_text(raw: bytes) -> str | None:
+    try:
+        reader = PdfReader(BytesIO(raw))
+        return "\n".join((page.extract_text() or "") for page in reader.pages)
+    except Exception:
+        return None
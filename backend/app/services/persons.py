@@ -0,0 +1,50 @@
+"""Person lookups by RUT on the indexed ``rut_normalizado`` column."""
+
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.rut import normalize_rut
+from app.models.person import Person
+
+# Keeps IN lists well below driver bind-parameter limits.
+LOOKUP_BATCH_SIZE = 1000
+
+
+async def find_person_by_rut(session: AsyncSession, rut: str | None) -> Person | None:
+    normalized = normalize_rut(rut)
+    if not normalized:
+        return None
+    result = await session.execute(
+        select(Person).where(Person.rut_normalizado == normalized).order_by(Person.created_at).limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def find_persons_by_rut(session: AsyncSession, ruts: Iterable[str | None]) -> dict[str, Person]:
+    """Resolve many RUTs at once; returns ``{normalized_rut: person}`` for those found."""
+    wanted = sorted({n for n in (normalize_rut(r) for r in ruts) if n})
+    found: dict[str, Person] = {}
+    for start in range(0, len(wanted), LOOKUP_BATCH_SIZE):
+        batch = wanted[start : start + LOOKUP_BATCH_SIZE]
+        result = await session.execute(
+            select(Person).where(Person.rut_normalizado.in_(batch)).order_by(Person.created_at)
+        )
+        for person in result.scalars():
+            found.setdefault(person.rut_normalizado, person)
+    return found
+
+
+async def add_person(session: AsyncSession, person: Person) -> Person:
+    """Insert ``person``, or return the one a concurrent writer already created with the same RUT."""
+    try:
+        async with session.begin_nested():
+            session.add(person)
+    except IntegrityError:
+        existing = await find_person_by_rut(session, person.rut)
+        if existing is None:
+            raise
+        return existing
+    return person
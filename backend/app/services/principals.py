@@ -0,0 +1,80 @@
+"""Cache of authenticated users, so most requests authorize without a query.
+
+:func:`load_principal` keeps a snapshot of the user (id, email, name, role,
+``is_active``; never the password hash) in a bounded LRU with a short TTL,
+keyed by the token subject. The snapshot is a transient ``User`` that belongs
+to no session, so it can be shared by concurrent requests.
+
+Invalidation:
+
+- any commit that writes ``users`` clears the cache of this process
+  (:func:`app.db.events.on_commit_changes`) and publishes an internal
+  ``_users.changed`` event; with ``EVENTS_BACKEND=postgres`` it reaches every
+  worker, which clears its own cache;
+- a load that started before an invalidation does not store its result
+  (:attr:`app.core.cache.TTLCache.generation`), so a deactivated user is not
+  cached again from a read that raced the commit;
+- changes made outside the app (SQL console) are picked up when entries
+  expire after ``AUTH_CACHE_TTL_SECONDS``.
+
+``AUTH_CACHE_TTL_SECONDS=0`` disables the cache.
+"""
+
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.events import on_commit_changes
+from app.models.user import User
+from app.services.broker import RECONNECTED, broker, publish_soon
+
+logger = logging.getLogger(__name__)
+
+USERS_CHANGED = "_users.changed"
+
+_principals: TTLCache[User] = TTLCache(maxsize=settings.auth_cache_size, ttl=settings.auth_cache_ttl_seconds)
+
+
+def _snapshot(user: User) -> User:
+    return User(
+        id=user.id,
+        email=user.email,
+        full_name=user.full_name,
+        role=user.role,
+        is_active=user.is_active,
+        created_at=user.created_at,
+    )
+
+
+async def load_principal(session: AsyncSession, subject: str) -> User | None:
+    """User for a token subject, from the cache or the database (None if it does not exist)."""
+    cached = _principals.get(subject)
+    if cached is not None:
+        return cached
+    # Read before the query: an invalidation committed meanwhile must not be undone by this refill.
+    generation = _principals.generation
+    user = await session.get(User, subject)
+    if user is None:
+        return None
+    principal = _snapshot(user)
+    _principals.set(subject, principal, generation)
+    return principal
+
+
+def invalidate_principals() -> None:
+    _principals.clear()
+
+
+@on_commit_changes
+def _on_commit(tables: set[str]) -> None:
+    if User.__tablename__ not in tables:
+        return
+    invalidate_principals()
+    publish_soon(USERS_CHANGED)
+
+
+broker.on_internal(USERS_CHANGED, lambda data: invalidate_principals())
+# Invalidations sent while the listener was down are lost.
+broker.on_internal(RECONNECTED, lambda data: invalidate_principals())
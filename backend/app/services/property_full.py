@@ -0,0 +1,186 @@
+"""Batched loader for the per-property "full" payload (ficha de propiedad)."""
+
+from typing import Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.charge import Charge, PaymentDetail
+from app.models.contract import ContractStatus, LeaseContract
+from app.models.document import Document
+from app.models.person import Person
+from app.models.property import Property
+from app.models.property_state import PropertyStateHistory
+
+
+def _person_payload(person: Person) -> dict:
+    return {
+        "id": person.id,
+        "nombre": " ".join(filter(None, [person.nombres, person.apellidos])),
+        "rut": person.rut,
+        "email": person.email,
+        "telefono": person.telefono,
+    }
+
+
+def _property_payload(prop: Property) -> dict:
+    return {
+        "id": prop.id,
+        "codigo": prop.codigo,
+        "direccion_linea1": prop.direccion_linea1,
+        "comuna": prop.comuna,
+        "region": prop.region,
+        "tipo": prop.tipo,
+        "estado_actual": prop.estado_actual,
+        "valor_arriendo": float(prop.valor_arriendo) if prop.valor_arriendo else None,
+        "valor_venta": float(prop.valor_venta) if prop.valor_venta else None,
+        "lat": float(prop.lat) if prop.lat else None,
+        "lon": float(prop.lon) if prop.lon else None,
+        "fecha_publicacion": prop.fecha_publicacion,
+        "created_at": prop.created_at,
+        "updated_at": prop.updated_at,
+    }
+
+
+def _contract_payload(contract: LeaseContract, arr: Person, owner: Person) -> dict:
+    return {
+        "id": contract.id,
+        "estado": contract.estado,
+        "fecha_inicio": contract.fecha_inicio,
+        "fecha_fin": contract.fecha_fin,
+        "renta_mensual": float(contract.renta_mensual),
+        "moneda": contract.moneda,
+        "dia_pago": contract.dia_pago,
+        "reajuste_tipo": contract.reajuste_tipo,
+        "reajuste_periodo_meses": contract.reajuste_periodo_meses,
+        "arrendatario": _person_payload(arr),
+        "propietario": _person_payload(owner),
+        "notas": contract.notas,
+        "created_at": contract.created_at,
+    }
+
+
+async def load_full_payloads(session: AsyncSession, props: Sequence[Property]) -> list[dict]:
+    """Build the `/properties/{id}/full` payload for many properties at once.
+
+    Runs a fixed number of set-based queries (history, contracts with both
+    parties, documents, charges, payments) regardless of ``len(props)``.
+    Results keep the order of ``props``.
+    """
+    if not props:
+        return []
+
+    prop_ids = [p.id for p in props]
+
+    history_by_prop: dict[UUID, list[dict]] = {}
+    history_result = await session.execute(
+        select(PropertyStateHistory)
+        .where(PropertyStateHistory.propiedad_id.in_(prop_ids))
+        .order_by(PropertyStateHistory.fecha_inicio.desc())
+    )
+    for h in history_result.scalars().all():
+        history_by_prop.setdefault(h.propiedad_id, []).append(
+            {
+                "estado": h.estado,
+                "motivo": h.motivo,
+                "fecha_inicio": h.fecha_inicio,
+                "fecha_fin": h.fecha_fin,
+                "actor_id": h.actor_id,
+            }
+        )
+
+    arr_alias = aliased(Person)
+    owner_alias = aliased(Person)
+    contracts_result = await session.execute(
+        select(LeaseContract, arr_alias, owner_alias)
+        .join(arr_alias, LeaseContract.arrendatario_id == arr_alias.id)
+        .join(owner_alias, LeaseContract.propietario_id == owner_alias.id)
+        .where(LeaseContract.propiedad_id.in_(prop_ids))
+        .order_by(LeaseContract.fecha_inicio.desc())
+    )
+    contracts_by_prop: dict[UUID, list[dict]] = {}
+    current_by_prop: dict[UUID, dict] = {}
+    for contract, arr, owner in contracts_result:
+        payload = _contract_payload(contract, arr, owner)
+        contracts_by_prop.setdefault(contract.propiedad_id, []).append(payload)
+        if contract.estado == ContractStatus.VIGENTE and contract.propiedad_id not in current_by_prop:
+            current_by_prop[contract.propiedad_id] = payload
+
+    docs_by_prop: dict[UUID, list[dict]] = {}
+    docs_result = await session.execute(
+        select(Document)
+        .where(
+            Document.entidad_tipo == "propiedad",
+            Document.entidad_id.in_(prop_ids),
+            Document.activo.is_(True),
+        )
+        .order_by(Document.created_at.desc())
+    )
+    for d in docs_result.scalars().all():
+        docs_by_prop.setdefault(d.entidad_id, []).append(
+            {
+                "id": d.id,
+                "categoria": d.categoria,
+                "filename": d.filename,
+                "version": d.version,
+                "created_at": d.created_at,
+                "activo": d.activo,
+            }
+        )
+
+    charges_by_prop: dict[UUID, list[dict]] = {}
+    if contracts_by_prop:
+        # Charges and payments are scoped through a subquery on contracts so the
+        # bind parameter count does not grow with the number of charges.
+        contract_ids_sq = select(LeaseContract.id).where(LeaseContract.propiedad_id.in_(prop_ids))
+
+        payments_map: dict[UUID, list[dict]] = {}
+        payments_result = await session.execute(
+            select(PaymentDetail)
+            .join(Charge, PaymentDetail.cobranza_id == Charge.id)
+            .where(Charge.contrato_id.in_(contract_ids_sq))
+        )
+        for pay in payments_result.scalars().all():
+            payments_map.setdefault(pay.cobranza_id, []).append(
+                {
+                    "id": pay.id,
+                    "monto_pagado": float(pay.monto_pagado),
+                    "fecha_pago": pay.fecha_pago,
+                    "medio_pago": pay.medio_pago,
+                    "referencia": pay.referencia,
+                }
+            )
+
+        charges_result = await session.execute(
+            select(Charge, LeaseContract.propiedad_id)
+            .join(LeaseContract, Charge.contrato_id == LeaseContract.id)
+            .where(LeaseContract.propiedad_id.in_(prop_ids))
+            .order_by(Charge.fecha_vencimiento.desc())
+        )
+        for charge, propiedad_id in charges_result:
+            charges_by_prop.setdefault(propiedad_id, []).append(
+                {
+                    "id": charge.id,
+                    "periodo": charge.periodo,
+                    "monto_original": float(charge.monto_original),
+                    "monto_ajustado": float(charge.monto_ajustado) if charge.monto_ajustado else None,
+                    "fecha_vencimiento": charge.fecha_vencimiento,
+                    "estado": charge.estado,
+                    "fecha_pago": charge.fecha_pago,
+                    "pagos": payments_map.get(charge.id, []),
+                }
+            )
+
+    return [
+        {
+            "property": _property_payload(prop),
+            "current_contract": current_by_prop.get(prop.id),
+            "state_history": history_by_prop.get(prop.id, []),
+            "contracts": contracts_by_prop.get(prop.id, []),
+            "documents": docs_by_prop.get(prop.id, []),
+            "charges": charges_by_prop.get(prop.id, []),
+        }
+        for prop in props
+    ]
@@ -0,0 +1,219 @@
+"""Rent readjustment: ``Charge.monto_ajustado`` from the contract terms and the UF/IPC series.
+
+``monto_original`` is the rent in the contract's currency; ``monto_ajustado`` is
+the amount owed in pesos:
+
+- ``moneda = UF``: ``monto_original * factor * UF(fecha_vencimiento)``.
+- ``moneda = CLP``: ``monto_original * factor``.
+
+The factor depends on how many full adjustment periods
+(``reajuste_periodo_meses``, 12 when missing) separate the charged month from
+the month of ``fecha_inicio``; ``k`` periods means ``k`` adjustments, the
+``j``-th one taking effect in month ``A_j = inicio + j * periodo``:
+
+- ``ipc``: ``factor_inicial`` times, for each adjustment, the compound IPC of
+  the ``periodo`` months before ``A_j`` shifted by ``IPC_LAG_MONTHS`` (the IPC of
+  a month is published the following month).
+- ``uf`` (CLP contracts): ``factor_inicial * UF(A_k) / UF(fecha_inicio)``. A UF
+  contract is already indexed, so only ``factor_inicial`` applies.
+- ``fijo``: ``factor_inicial ** k`` (``1.03`` = +3 % per period).
+- ``none``: ``factor_inicial`` for UF contracts; CLP contracts have no
+  adjusted amount.
+
+``factor_inicial`` defaults to 1. Amounts are rounded to whole pesos.
+
+Only open charges (PENDIENTE/ATRASADO) are readjusted; paid, partial and
+forgiven ones keep the amount they were settled with. The engine reads the
+series once, streams the affected charges joined to their contract as plain
+rows, computes the amounts with ``Decimal`` (factors are memoized per contract
+and period, so the per-row cost is a multiplication) and writes only the
+changed amounts back with executemany ``UPDATE`` by primary key. Charges whose
+UF/IPC values are not loaded yet keep their current amount until a later load
+triggers another pass.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from uuid import UUID
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.clock import add_months, month_start
+from app.core.config import settings
+from app.models.charge import Charge, ChargeState
+from app.models.contract import AdjustmentType, Currency, LeaseContract
+from app.schemas.indicator import ReadjustmentResult
+from app.services.broker import publish
+from app.services.indicators import RateSeries, load_series
+from app.services.jobs import JobContext, job_handler
+
+logger = logging.getLogger(__name__)
+
+READJUSTMENT_JOB = "charges.readjust"
+
+IPC_LAG_MONTHS = 1
+DEFAULT_PERIOD_MONTHS = 12
+OPEN_STATES = (ChargeState.PENDIENTE, ChargeState.ATRASADO)
+
+_PESO = Decimal(1)
+
+
+@dataclass(frozen=True)
+class ContractTerms:
+    fecha_inicio: date
+    moneda: Currency
+    tipo: AdjustmentType
+    periodo_meses: int
+    factor_inicial: Decimal
+
+
+def _months_between(start: date, end: date) -> int:
+    return (end.year - start.year) * 12 + end.month - start.month
+
+
+def adjustment_factor(terms: ContractTerms, periods: int, series: RateSeries) -> Decimal | None:
+    """Factor after ``periods`` adjustments; None when a needed UF/IPC value is missing."""
+    base = terms.factor_inicial
+    if periods <= 0 or terms.tipo == AdjustmentType.NONE:
+        return base
+    if terms.tipo == AdjustmentType.FIJO:
+        return base**periods
+    start = month_start(terms.fecha_inicio)
+    if terms.tipo == AdjustmentType.UF:
+        if terms.moneda == Currency.UF:
+            return base
+        uf_start = series.uf_on(terms.fecha_inicio)
+        uf_now = series.uf_on(add_months(start, periods * terms.periodo_meses))
+        if uf_start is None or uf_now is None:
+            return None
+        return base * uf_now / uf_start
+    factor = base
+    for j in range(1, periods + 1):
+        effective = add_months(start, j * terms.periodo_meses)
+        change = series.ipc_change(add_months(effective, -terms.periodo_meses - IPC_LAG_MONTHS), terms.periodo_meses)
+        if change is None:
+            return None
+        factor *= change
+    return factor
+
+
+class _Engine:
+    def __init__(self, series: RateSeries) -> None:
+        self.series = series
+        self._factors: dict[tuple[UUID, int], Decimal | None] = {}
+
+    def amount(
+        self, contract_id: UUID, terms: ContractTerms, periodo: date, vencimiento: date, original: Decimal
+    ) -> Decimal | None:
+        periods = max(_months_between(month_start(terms.fecha_inicio), periodo), 0) // terms.periodo_meses
+        key = (contract_id, periods)
+        if key not in self._factors:
+            self._factors[key] = adjustment_factor(terms, periods, self.series)
+        factor = self._factors[key]
+        if factor is None:
+            return None
+        amount = original * factor
+        if terms.moneda == Currency.UF:
+            uf = self.series.uf_on(vencimiento)
+            if uf is None:
+                return None
+            amount *= uf
+        return amount.quantize(_PESO, rounding=ROUND_HALF_UP)
+
+
+def _affected_charges(contract_ids: list[UUID] | None, since: date | None):
+    stmt = (
+        select(
+            Charge.id,
+            Charge.periodo,
+            Charge.fecha_vencimiento,
+            Charge.monto_original,
+            Charge.monto_ajustado,
+            LeaseContract.id,
+            LeaseContract.fecha_inicio,
+            LeaseContract.moneda,
+            LeaseContract.reajuste_tipo,
+            LeaseContract.reajuste_periodo_meses,
+            LeaseContract.reajuste_factor_inicial,
+        )
+        .join(LeaseContract, LeaseContract.id == Charge.contrato_id)
+        .where(Charge.estado.in_(OPEN_STATES))
+    )
+    if contract_ids:
+        # Explicit contracts include unadjusted ones, so a change of terms clears stale amounts.
+        stmt = stmt.where(Charge.contrato_id.in_(contract_ids))
+    else:
+        stmt = stmt.where(
+            or_(LeaseContract.moneda == Currency.UF, LeaseContract.reajuste_tipo != AdjustmentType.NONE)
+        )
+    if since:
+        # A charge only depends on values up to its due date.
+        stmt = stmt.where(Charge.fecha_vencimiento >= since)
+    return stmt
+
+
+async def recompute_adjustments(
+    session: AsyncSession,
+    *,
+    contract_ids: list[UUID] | None = None,
+    since: date | None = None,
+) -> ReadjustmentResult:
+    """Recompute ``monto_ajustado`` of open charges (optionally of some contracts / due from ``since``); does not commit."""
+    engine = _Engine(await load_series(session))
+    batch_size = settings.export_batch_size
+    outcome = ReadjustmentResult()
+    changes: list[dict] = []
+
+    result = await session.stream(_affected_charges(contract_ids, since).execution_options(yield_per=batch_size))
+    async for partition in result.partitions(batch_size):
+        for (
+            charge_id,
+            periodo,
+            vencimiento,
+            original,
+            current,
+            contract_id,
+            inicio,
+            moneda,
+            tipo,
+            periodo_meses,
+            factor_inicial,
+        ) in partition:
+            terms = ContractTerms(
+                fecha_inicio=inicio,
+                moneda=moneda,
+                tipo=tipo,
+                periodo_meses=periodo_meses if periodo_meses and periodo_meses > 0 else DEFAULT_PERIOD_MONTHS,
+                factor_inicial=factor_inicial if factor_inicial is not None else Decimal(1),
+            )
+            outcome.revisadas += 1
+            if moneda == Currency.CLP and tipo == AdjustmentType.NONE:
+                if current is not None:
+                    changes.append({"id": charge_id, "monto_ajustado": None})
+                continue
+            amount = engine.amount(contract_id, terms, periodo, vencimiento, original)
+            if amount is None:
+                outcome.sin_indicador += 1
+            elif amount != current:
+                changes.append({"id": charge_id, "monto_ajustado": amount})
+
+    # Written after the cursor is drained: one executemany per chunk.
+    for start in range(0, len(changes), batch_size):
+        await session.execute(update(Charge), changes[start : start + batch_size])
+    outcome.actualizadas = len(changes)
+    return outcome
+
+
+@job_handler(READJUSTMENT_JOB)
+async def _readjust_job(ctx: JobContext) -> dict:
+    payload = ctx.payload
+    since = date.fromisoformat(payload["desde"]) if payload.get("desde") else None
+    contract_ids = [UUID(value) for value in payload.get("contrato_ids") or []] or None
+    outcome = await recompute_adjustments(ctx.session, contract_ids=contract_ids, since=since)
+    logger.info("Readjusted %s of %s charges", outcome.actualizadas, outcome.revisadas)
+    if outcome.actualizadas:
+        ctx.after_commit(lambda: publish("charges.readjusted", desde=since, actualizadas=outcome.actualizadas))
+    return outcome.model_dump(mode="json")
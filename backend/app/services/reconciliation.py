@@ -0,0 +1,272 @@
+"""Bank statement reconciliation: match credits to open charges and post them in bulk.
+
+The open charges (PENDIENTE, ATRASADO, PARCIAL) are read once, as plain rows,
+into hash indexes keyed by tenant RUT, property ``codigo`` and balance in
+pesos (with and without the late fee). Each credit then costs a few
+dictionary lookups, so a month of collections reconciles in one pass:
+
+- ``alta``: the credit names the tenant (RUT) or the property (its code in the
+  description/reference) and its amount equals one of their balances; the
+  oldest such charge is paid. These are posted through the payment ledger in a
+  single :func:`app.services.payments.apply_payments` call.
+- ``media``: only the RUT/code matches (partial or combined payment), or only
+  the amount matches one charge due within ``RECONCILIATION_DATE_WINDOW_DAYS``.
+- ``ambigua``: the amount matches several charges in the window.
+- ``sin_match``: nothing matches.
+
+Suggestions are returned for a person to confirm through
+``POST /charges/payments/bulk`` with the given ``referencia_pago``. That
+reference is a hash of the bank line, stored on the payment, so uploading the
+same statement again reports those lines as ``ya_aplicada`` instead of paying
+twice; the references are re-checked once the matched charges are locked, and
+a unique index backs the check against concurrent uploads. A charge matched
+``alta`` is not offered to later lines of the same statement.
+"""
+
+import hashlib
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.charge import Charge, ChargeState, PaymentDetail
+from app.models.contract import LeaseContract
+from app.models.person import Person
+from app.models.property import Property
+from app.schemas.imports import ImportRowError
+from app.schemas.reconciliation import ReconciliationMatch, ReconciliationReport, StatementTransactionRead
+from app.services.bank_statements import BankTransaction, Statement
+from app.services.payments import PaymentInput, apply_payments, lock_charges
+
+ALTA = "alta"
+MEDIA = "media"
+AMBIGUA = "ambigua"
+SIN_MATCH = "sin_match"
+YA_APLICADA = "ya_aplicada"
+
+OPEN_STATES = (ChargeState.PENDIENTE, ChargeState.ATRASADO, ChargeState.PARCIAL)
+MAX_CANDIDATES = 5
+BANK_PAYMENT_METHOD = "transferencia"
+
+_PESO = Decimal(1)
+_TOKEN = re.compile(r"[A-Z0-9][A-Z0-9\-_/.]*")
+
+
+def _pesos(amount: Decimal) -> Decimal:
+    return amount.quantize(_PESO, rounding=ROUND_HALF_UP)
+
+
+@dataclass(frozen=True)
+class OpenCharge:
+    id: UUID
+    fecha_vencimiento: date
+    saldo: Decimal
+    saldo_con_mora: Decimal
+    rut: str | None
+    codigo: str
+
+
+class ChargeIndex:
+    """Open charges by tenant RUT, property code and balance; lists are ordered by due date."""
+
+    def __init__(self, charges: list[OpenCharge]) -> None:
+        self.by_rut: dict[str, list[OpenCharge]] = defaultdict(list)
+        self.by_code: dict[str, list[OpenCharge]] = defaultdict(list)
+        self.by_amount: dict[Decimal, list[OpenCharge]] = defaultdict(list)
+        self.consumed: set[UUID] = set()
+        for charge in sorted(charges, key=lambda c: (c.fecha_vencimiento, str(c.id))):
+            if charge.rut:
+                self.by_rut[charge.rut].append(charge)
+            self.by_code[charge.codigo.upper()].append(charge)
+            for amount in {charge.saldo, charge.saldo_con_mora}:
+                self.by_amount[amount].append(charge)
+
+    def _available(self, charges) -> list[OpenCharge]:
+        return [charge for charge in charges if charge.id not in self.consumed]
+
+    def _keyed(self, tx: BankTransaction) -> tuple[list[OpenCharge], list[str]]:
+        found: dict[UUID, OpenCharge] = {}
+        reasons = []
+        if tx.rut and tx.rut in self.by_rut:
+            reasons.append("rut")
+            found.update((c.id, c) for c in self.by_rut[tx.rut])
+        text = f"{tx.descripcion} {tx.referencia or ''}".upper()
+        for token in set(_TOKEN.findall(text)):
+            charges = self.by_code.get(token)
+            if charges:
+                if "referencia" not in reasons:
+                    reasons.append("referencia")
+                found.update((c.id, c) for c in charges)
+        ordered = sorted(found.values(), key=lambda c: (c.fecha_vencimiento, str(c.id)))
+        return self._available(ordered), reasons
+
+    def match(
+        self, tx: BankTransaction, window: timedelta
+    ) -> tuple[str, OpenCharge | None, list[OpenCharge], list[str]]:
+        amount = _pesos(tx.monto)
+        keyed, reasons = self._keyed(tx)
+        if keyed:
+            exact = [c for c in keyed if amount in (c.saldo, c.saldo_con_mora)]
+            if exact:
+                return ALTA, exact[0], exact[:MAX_CANDIDATES], reasons + ["monto"]
+            near = [c for c in keyed if abs(tx.fecha - c.fecha_vencimiento) <= window] or keyed
+            return MEDIA, near[0], near[:MAX_CANDIDATES], reasons
+        by_amount = [
+            c for c in self._available(self.by_amount.get(amount, ())) if abs(tx.fecha - c.fecha_vencimiento) <= window
+        ]
+        if len(by_amount) == 1:
+            return MEDIA, by_amount[0], by_amount, ["monto", "fecha"]
+        if by_amount:
+            return AMBIGUA, None, by_amount[:MAX_CANDIDATES], ["monto", "fecha"]
+        return SIN_MATCH, None, [], []
+
+
+def payment_references(transactions: list[BankTransaction]) -> list[str]:
+    """Stable ``pagos_detalle.referencia`` per bank line; identical lines are told apart by occurrence."""
+    seen: Counter = Counter()
+    references = []
+    for tx in transactions:
+        key = f"{tx.fecha.isoformat()}|{tx.monto}|{tx.descripcion}|{tx.referencia or ''}"
+        seen[key] += 1
+        digest = hashlib.sha256(f"{key}|{seen[key]}".encode("utf-8")).hexdigest()[:20]
+        references.append(f"banco:{digest} {tx.referencia or ''}".strip()[:200])
+    return references
+
+
+async def _applied_references(session: AsyncSession, references: list[str]) -> set[str]:
+    found: set[str] = set()
+    for start in range(0, len(references), 1000):
+        result = await session.execute(
+            select(PaymentDetail.referencia).where(PaymentDetail.referencia.in_(references[start : start + 1000]))
+        )
+        found.update(result.scalars())
+    return found
+
+
+async def load_open_charges(session: AsyncSession, due_until: date) -> list[OpenCharge]:
+    target = func.coalesce(Charge.monto_ajustado, Charge.monto_original)
+    result = await session.execute(
+        select(
+            Charge.id,
+            Charge.fecha_vencimiento,
+            target - Charge.monto_pagado_total,
+            func.coalesce(Charge.mora_monto, 0),
+            Person.rut_normalizado,
+            Property.codigo,
+        )
+        .join(LeaseContract, LeaseContract.id == Charge.contrato_id)
+        .join(Person, Person.id == LeaseContract.arrendatario_id)
+        .join(Property, Property.id == LeaseContract.propiedad_id)
+        .where(Charge.estado.in_(OPEN_STATES), Charge.fecha_vencimiento <= due_until)
+    )
+    charges = []
+    for charge_id, due, balance, mora, rut, codigo in result:
+        balance = _pesos(Decimal(balance))
+        charges.append(
+            OpenCharge(
+                id=charge_id,
+                fecha_vencimiento=due,
+                saldo=balance,
+                saldo_con_mora=balance + _pesos(Decimal(mora)),
+                rut=rut,
+                codigo=codigo,
+            )
+        )
+    return charges
+
+
+def _transaction_read(tx: BankTransaction) -> StatementTransactionRead:
+    return StatementTransactionRead(
+        fila=tx.fila, fecha=tx.fecha, monto=tx.monto, descripcion=tx.descripcion, referencia=tx.referencia, rut=tx.rut
+    )
+
+
+async def reconcile(session: AsyncSession, statement: Statement, *, dry_run: bool = False) -> ReconciliationReport:
+    """Match ``statement`` against open charges and post the ``alta`` matches (flushed, not committed)."""
+    limit = settings.import_max_errors
+    window = timedelta(days=settings.reconciliation_date_window_days)
+    transactions = statement.transactions
+    report = ReconciliationReport(
+        filas=len(transactions) + statement.cargos + len(statement.errors),
+        abonos=len(transactions),
+        cargos=statement.cargos,
+        dry_run=dry_run,
+        errores=[ImportRowError(fila=fila, errores=[message]) for fila, message in statement.errors[:limit]],
+    )
+    if not transactions:
+        return report
+
+    references = payment_references(transactions)
+    applied = await _applied_references(session, references)
+    index = ChargeIndex(await load_open_charges(session, max(tx.fecha for tx in transactions) + window))
+
+    postings: list[PaymentInput] = []
+    alta: dict[str, ReconciliationMatch] = {}
+    order = sorted(range(len(transactions)), key=lambda i: (transactions[i].fecha, transactions[i].fila))
+    for i in order:
+        tx, reference = transactions[i], references[i]
+        if reference in applied:
+            report.ya_aplicadas += 1
+            entry = ReconciliationMatch(
+                transaccion=_transaction_read(tx), confianza=YA_APLICADA, referencia_pago=reference
+            )
+            target_list = report.conciliadas
+        else:
+            confidence, charge, candidates, reasons = index.match(tx, window)
+            entry = ReconciliationMatch(
+                transaccion=_transaction_read(tx),
+                confianza=confidence,
+                cobranza_id=charge.id if charge else None,
+                candidatos=[c.id for c in candidates],
+                motivos=reasons,
+                referencia_pago=reference,
+            )
+            if confidence == ALTA:
+                index.consumed.add(charge.id)
+                alta[reference] = entry
+                postings.append(
+                    PaymentInput(
+                        cobranza_id=charge.id,
+                        monto_pagado=tx.monto,
+                        fecha_pago=tx.fecha,
+                        medio_pago=BANK_PAYMENT_METHOD,
+                        referencia=reference,
+                    )
+                )
+                report.aplicadas += 1
+                report.monto_aplicado += tx.monto
+                target_list = report.conciliadas
+            else:
+                if confidence == MEDIA:
+                    report.sugeridas += 1
+                elif confidence == AMBIGUA:
+                    report.ambiguas += 1
+                else:
+                    report.sin_match += 1
+                target_list = report.pendientes
+        if len(target_list) < limit:
+            target_list.append(entry)
+        else:
+            report.omitidas += 1
+
+    if postings and not dry_run:
+        await lock_charges(session, [item.cobranza_id for item in postings])
+        # A concurrent upload of the same statement may have posted these lines while we waited on the
+        # charge locks; the unique index on ``banco:`` references catches any it did not lock against.
+        late = await _applied_references(session, [item.referencia for item in postings])
+        for item in postings:
+            if item.referencia in late:
+                alta[item.referencia].confianza = YA_APLICADA
+                report.aplicadas -= 1
+                report.monto_aplicado -= item.monto_pagado
+                report.ya_aplicadas += 1
+        postings = [item for item in postings if item.referencia not in late]
+        if postings:
+            await apply_payments(session, postings)
+    return report
@@ -0,0 +1,62 @@
+"""Read-replica routing with read-your-writes.
+
+Read-only routes take their session from :func:`app.api.deps.get_read_session`,
+bound to ``READ_DATABASE_URL`` when configured. A replica lags the primary, so
+a user who just saved something must not read from it right away:
+:func:`app.api.deps.authenticate_token` tags the request session with the user
+id, and every commit with writes from a tagged session records the user as a
+recent writer for ``READ_AFTER_WRITE_SECONDS``. Their reads go to the primary
+meanwhile. The mark is shared through an internal broker event, so with
+``EVENTS_BACKEND=postgres`` it holds whichever worker serves the next request.
+"""
+
+import logging
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.events import on_session_commit
+from app.db.session import AsyncSessionLocal, ReadSessionLocal, read_engine
+from app.services.broker import broker, publish_soon
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_WROTE = "_principal.wrote"
+_PRINCIPAL_KEY = "sigap_principal_id"
+
+_recent_writers: TTLCache[bool] = TTLCache(maxsize=100_000, ttl=settings.read_after_write_seconds)
+
+
+def tag_session(session: AsyncSession, user_id: UUID) -> None:
+    """Attribute the writes committed by ``session`` to ``user_id``."""
+    session.info[_PRINCIPAL_KEY] = str(user_id)
+
+
+def wrote_recently(user_id: UUID) -> bool:
+    return _recent_writers.get(str(user_id)) is not None
+
+
+def read_sessionmaker(user_id: UUID) -> async_sessionmaker[AsyncSession]:
+    """Replica sessions, or primary ones when there is no replica or the user just wrote."""
+    if read_engine is None or wrote_recently(user_id):
+        return AsyncSessionLocal
+    return ReadSessionLocal
+
+
+def _mark_writer(user_id: str) -> None:
+    _recent_writers.set(user_id, True)
+
+
+@on_session_commit
+def _on_commit(session: Session, tables: set[str]) -> None:
+    user_id = session.info.get(_PRINCIPAL_KEY)
+    if read_engine is None or user_id is None:
+        return
+    _mark_writer(user_id)
+    publish_soon(PRINCIPAL_WROTE, user_id=user_id)
+
+
+broker.on_internal(PRINCIPAL_WROTE, lambda data: _mark_writer(data["user_id"]))
@@ -0,0 +1,130 @@
+"""Periodic jobs on top of the job queue.
+
+Services register a :class:`Schedule` (job type + "next run after" rule). Every
+``SCHEDULER_POLL_SECONDS`` each app process runs :meth:`Scheduler.tick`, which
+advances ``tareas_programadas.next_run_at`` with a conditional ``UPDATE``
+(``WHERE next_run_at <= now``) and enqueues the job in the same transaction.
+Only the process whose update matched enqueues, so running several API
+workers does not duplicate runs, and a run missed while the app was down is
+enqueued once at startup. The work itself happens in the job workers, with
+their retries.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.clock import local_tz
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.db.upsert import insert_for
+from app.models.scheduled_task import ScheduledTask
+from app.services.jobs import enqueue
+
+logger = logging.getLogger(__name__)
+
+NextRun = Callable[[datetime], datetime]
+
+
+def daily_at(hour: int, minute: int = 0) -> NextRun:
+    """Next ``hour:minute`` in ``APP_TIMEZONE`` strictly after ``now``."""
+
+    def next_run(now: datetime) -> datetime:
+        local = now.astimezone(local_tz())
+        candidate = datetime.combine(local.date(), time(hour, minute), tzinfo=local.tzinfo)
+        if candidate <= local:
+            candidate = datetime.combine(local.date() + timedelta(days=1), time(hour, minute), tzinfo=local.tzinfo)
+        return candidate.astimezone(timezone.utc)
+
+    return next_run
+
+
+@dataclass(frozen=True)
+class Schedule:
+    nombre: str
+    job_tipo: str
+    next_run: NextRun
+    payload: dict = field(default_factory=dict)
+
+
+_schedules: dict[str, Schedule] = {}
+
+
+def register_schedule(schedule: Schedule) -> Schedule:
+    _schedules[schedule.nombre] = schedule
+    return schedule
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def _ensure_rows(session: AsyncSession, now: datetime) -> None:
+    for schedule in _schedules.values():
+        stmt = insert_for(session, ScheduledTask).values(nombre=schedule.nombre, next_run_at=schedule.next_run(now))
+        await session.execute(stmt.on_conflict_do_nothing(index_elements=[ScheduledTask.nombre]))
+
+
+class Scheduler:
+    def __init__(self, poll_interval: float) -> None:
+        self.poll_interval = poll_interval
+        self._task: asyncio.Task | None = None
+        self._ready = False
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="scheduler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            await asyncio.sleep(self.poll_interval)
+
+    async def tick(self) -> list[str]:
+        """Enqueue every due schedule; returns the names enqueued by this process."""
+        now = _utcnow()
+        enqueued: list[str] = []
+        async with AsyncSessionLocal() as session:
+            if not self._ready:
+                await _ensure_rows(session, now)
+            for schedule in _schedules.values():
+                claimed = await session.execute(
+                    update(ScheduledTask)
+                    .where(ScheduledTask.nombre == schedule.nombre, ScheduledTask.next_run_at <= now)
+                    .values(next_run_at=schedule.next_run(now), last_run_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                if claimed.rowcount != 1:
+                    continue
+                job = enqueue(session, schedule.job_tipo, schedule.payload)
+                await session.flush()
+                await session.execute(
+                    update(ScheduledTask)
+                    .where(ScheduledTask.nombre == schedule.nombre)
+                    .values(last_job_id=job.id)
+                    .execution_options(synchronize_session=False)
+                )
+                enqueued.append(schedule.nombre)
+            await session.commit()
+        self._ready = True
+        for nombre in enqueued:
+            logger.info("Scheduled job %s enqueued", nombre)
+        return enqueued
+
+
+scheduler = Scheduler(settings.scheduler_poll_seconds)
@@ -0,0 +1,170 @@
+"""Content-addressed document storage.
+
+Uploads are streamed to a local temp file in ``CHUNK_SIZE`` pieces while the
+SHA-256 is computed, so memory stays flat regardless of file size. The file is
+then handed to the storage driver (``app.services.storage_drivers``) under the
+key ``blobs/<aa>/<bb>/<sha256>``: identical uploads share one blob.
+
+``documento_blobs`` counts the documents pointing at each blob. Acquiring a
+reference upserts the row (``ON CONFLICT DO UPDATE``) and releasing it locks
+the row; both happen in the caller's transaction, so a concurrent upload of the
+same content waits on the row lock. When the count reaches zero the row is
+deleted and the file is removed only after the caller commits
+(:func:`delete_blob_file`, which holds a placeholder row while deleting so it
+cannot race a new upload of the same content).
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import UploadFile
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.executors import run_io
+from app.db.upsert import insert_for
+from app.models.document import DocumentBlob
+from app.services.storage_drivers import legacy_storage, storage
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class StoredBlob:
+    hash: str
+    key: str
+    size: int
+
+
+def blob_key(digest: str) -> str:
+    return f"blobs/{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+def _open_temp(suffix: str = "") -> tuple[int, str]:
+    tmp_dir = Path(settings.storage_dir) / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    return tempfile.mkstemp(dir=tmp_dir, prefix="upload-", suffix=suffix)
+
+
+async def _spool(file: UploadFile) -> tuple[Path, str, int]:
+    """Copy the upload to a temp file, returning (path, sha256, size)."""
+    fd, tmp_name = await run_io(_open_temp)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(CHUNK_SIZE):
+                digest.update(chunk)
+                size += len(chunk)
+                await run_io(out.write, chunk)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return Path(tmp_name), digest.hexdigest(), size
+
+
+async def store_upload(session: AsyncSession, file: UploadFile) -> StoredBlob:
+    """Stream ``file`` into the blob store and take a reference on it."""
+    tmp, digest, size = await _spool(file)
+    key = blob_key(digest)
+    try:
+        stmt = insert_for(session, DocumentBlob).values(hash=digest, storage_path=key, size=size, ref_count=1)
+        ref_count = await session.scalar(
+            stmt.on_conflict_do_update(
+                index_elements=[DocumentBlob.hash],
+                set_={"ref_count": DocumentBlob.ref_count + 1},
+            ).returning(DocumentBlob.ref_count)
+        )
+        # A new row means no committed document uses the file: write it even if a released copy
+        # is still there (its deletion may be pending).
+        if ref_count == 1 or not await storage.exists(key):
+            await storage.put_file(key, tmp)
+    finally:
+        await run_io(tmp.unlink, missing_ok=True)
+    return StoredBlob(hash=digest, key=key, size=size)
+
+
+async def fetch_to_temp(key: str, suffix: str = "") -> Path:
+    """Copy a stored blob to a local temp file (for readers that need a real file); caller deletes it."""
+    stat = await storage.stat(key)
+    if stat is None:
+        raise FileNotFoundError(key)
+    fd, tmp_name = await run_io(_open_temp, suffix)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            if stat.size:
+                async for chunk in storage.iter_range(key, 0, stat.size - 1):
+                    await run_io(out.write, chunk)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return Path(tmp_name)
+
+
+async def spool_to_temp(file: UploadFile) -> Path:
+    """Copy an upload to a local temp file without storing it; caller deletes it."""
+    path, _, _ = await _spool(file)
+    return path
+
+
+async def release_blob(session: AsyncSession, digest: str) -> str | None:
+    """Drop one reference; the blob row goes away with the last one.
+
+    Returns the storage path to remove with :func:`delete_blob_file` once the
+    caller has committed (None while other documents still use the blob), so a
+    failed or rolled back transaction never loses the file.
+    """
+    result = await session.execute(
+        select(DocumentBlob)
+        .where(DocumentBlob.hash == digest)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    blob = result.scalar_one_or_none()
+    if blob is None:
+        return None
+    blob.ref_count -= 1
+    if blob.ref_count > 0:
+        return None
+    await session.delete(blob)
+    return blob.storage_path
+
+
+async def delete_blob_file(session: AsyncSession, digest: str, storage_path: str) -> None:
+    """Best-effort removal of a released blob's file, after the release committed.
+
+    The delete runs under a placeholder row (``ref_count=0``) for the hash: an
+    upload of the same content that got its row first keeps the file (the
+    placeholder conflicts), and one that comes later waits on the placeholder
+    and writes the file again.
+    """
+    try:
+        stmt = insert_for(session, DocumentBlob).values(hash=digest, storage_path=storage_path, size=0, ref_count=0)
+        result = await session.execute(stmt.on_conflict_do_nothing(index_elements=[DocumentBlob.hash]))
+        if not result.rowcount:
+            # Uploaded again since the release.
+            await session.rollback()
+            return
+        try:
+            await storage.delete(storage_path)
+        finally:
+            await session.execute(delete(DocumentBlob).where(DocumentBlob.hash == digest))
+            await session.commit()
+    except Exception:
+        await session.rollback()
+        logger.exception("Could not delete blob %s", digest)
+
+
+async def remove_legacy_file(storage_path: str) -> None:
+    """Best-effort removal of a pre-blob-store file (documents without ``hash``)."""
+    try:
+        await legacy_storage.delete(storage_path)
+    except OSError:
+        pass
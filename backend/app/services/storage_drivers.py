@@ -0,0 +1,191 @@
+"""Storage drivers for document blobs.
+
+Drivers address files by key (``blobs/aa/bb/<sha256>``) and expose the same
+async interface, so the blob store and the download endpoint do not care where
+bytes live:
+
+- ``local`` (default): files under ``STORAGE_DIR``.
+- ``s3``: any S3-compatible service (AWS, MinIO, moto via ``S3_ENDPOINT_URL``).
+  Uploads use boto3's managed multipart transfer; downloads read ranged
+  ``GetObject`` bodies in chunks and can be replaced by presigned-URL redirects
+  (``STORAGE_PRESIGNED_DOWNLOADS``) so large files skip the API worker.
+
+Blocking calls (disk, boto3) run on the shared I/O pool.
+"""
+
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator
+from urllib.parse import quote
+
+from app.core.config import settings
+from app.core.executors import run_io
+
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class BlobStat:
+    size: int
+    last_modified: datetime
+    etag: str
+
+
+class LocalStorage:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    async def exists(self, key: str) -> bool:
+        return await run_io(self._path(key).is_file)
+
+    async def put_file(self, key: str, source: Path) -> None:
+        """Move ``source`` (a local temp file) to ``key``."""
+        target = self._path(key)
+
+        def _move() -> None:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, target)
+
+        await run_io(_move)
+
+    async def delete(self, key: str) -> None:
+        await run_io(self._path(key).unlink, missing_ok=True)
+
+    async def stat(self, key: str) -> BlobStat | None:
+        try:
+            st = await run_io(self._path(key).stat)
+        except FileNotFoundError:
+            return None
+        return BlobStat(
+            size=st.st_size,
+            last_modified=datetime.fromtimestamp(st.st_mtime, timezone.utc),
+            etag=f"{st.st_mtime_ns:x}-{st.st_size:x}",
+        )
+
+    async def read_bytes(self, key: str) -> bytes:
+        return await run_io(self._path(key).read_bytes)
+
+    async def iter_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes ``start``..``end`` (inclusive) in ``CHUNK_SIZE`` pieces."""
+        handle = await run_io(open, self._path(key), "rb")
+        try:
+            await run_io(handle.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await run_io(handle.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await run_io(handle.close)
+
+    async def presigned_url(self, key: str, filename: str, content_type: str | None) -> str | None:
+        return None
+
+
+class S3Storage:
+    def __init__(self) -> None:
+        self.bucket = settings.s3_bucket
+        self.prefix = settings.s3_prefix.strip("/")
+        self._client_instance: Any = None
+
+    def _client(self):
+        if self._client_instance is None:
+            import boto3
+
+            self._client_instance = boto3.client(
+                "s3",
+                endpoint_url=settings.s3_endpoint_url,
+                region_name=settings.s3_region,
+                aws_access_key_id=settings.s3_access_key_id,
+                aws_secret_access_key=settings.s3_secret_access_key,
+            )
+        return self._client_instance
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    async def _head(self, key: str) -> dict | None:
+        from botocore.exceptions import ClientError
+
+        try:
+            return await run_io(self._client().head_object, Bucket=self.bucket, Key=self._key(key))
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    async def exists(self, key: str) -> bool:
+        return await self._head(key) is not None
+
+    async def put_file(self, key: str, source: Path) -> None:
+        from boto3.s3.transfer import TransferConfig
+
+        chunk = settings.s3_multipart_chunk_bytes
+        config = TransferConfig(multipart_threshold=chunk, multipart_chunksize=chunk)
+        await run_io(self._client().upload_file, str(source), self.bucket, self._key(key), Config=config)
+        await run_io(source.unlink, missing_ok=True)
+
+    async def delete(self, key: str) -> None:
+        await run_io(self._client().delete_object, Bucket=self.bucket, Key=self._key(key))
+
+    async def stat(self, key: str) -> BlobStat | None:
+        head = await self._head(key)
+        if head is None:
+            return None
+        return BlobStat(size=head["ContentLength"], last_modified=head["LastModified"], etag=head["ETag"].strip('"'))
+
+    async def read_bytes(self, key: str) -> bytes:
+        resp = await run_io(self._client().get_object, Bucket=self.bucket, Key=self._key(key))
+        return await run_io(resp["Body"].read)
+
+    async def iter_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        resp = await run_io(
+            self._client().get_object, Bucket=self.bucket, Key=self._key(key), Range=f"bytes={start}-{end}"
+        )
+        body = resp["Body"]
+        try:
+            while chunk := await run_io(body.read, CHUNK_SIZE):
+                yield chunk
+        finally:
+            body.close()
+
+    async def presigned_url(self, key: str, filename: str, content_type: str | None) -> str | None:
+        params = {
+            "Bucket": self.bucket,
+            "Key": self._key(key),
+            "ResponseContentDisposition": content_disposition(filename),
+        }
+        if content_type:
+            params["ResponseContentType"] = content_type
+        return await run_io(
+            self._client().generate_presigned_url,
+            "get_object",
+            Params=params,
+            ExpiresIn=settings.storage_presign_seconds,
+        )
+
+
+def content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _build_storage() -> LocalStorage | S3Storage:
+    if settings.storage_backend == "s3":
+        return S3Storage()
+    return LocalStorage(Path(settings.storage_dir))
+
+
+storage = _build_storage()
+
+# Documents uploaded before the blob store keep a filesystem path in ``storage_path``.
+legacy_storage = LocalStorage(Path())
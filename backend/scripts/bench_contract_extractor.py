@@ -0,0 +1,56 @@
+"""Microbenchmark for the rule-based contract extractor.
+
+Usage (from backend/): ``python -m scripts.bench_contract_extractor [--pages 2 10 40]``
+
+Builds synthetic contract text of increasing size (a realistic header plus
+filler clauses with sparse numbers) and reports the mean time of ``scan`` and of
+the full ``extract_contract_text`` pass.
+"""
+
+import argparse
+import random
+import timeit
+
+from app.services.contract_extractor import extract_contract_text, scan
+
+HEADER = (
+    "En Copiapo, a 12 de marzo de 2024, entre don Hector Patricio Olave Fara, RUT 9.647.123-8, "
+    "en adelante el arrendador, y la Intendencia Regional de Atacama, RUT 60.511.030-4, en adelante "
+    "la arrendataria, se conviene el siguiente contrato. El contrato comenzara a regir el dia 1 de abril "
+    "de 2024 y terminara el dia 31 de marzo de 2025. La renta mensual sera de $ 350.000 pagadera dentro "
+    "de los 5 primeros dias habiles de cada mes.\n"
+)
+WORDS = (
+    "el la de del que en y a los se las por un para con no una su al es lo como pero sus ya o este "
+    "contrato arrendamiento inmueble parte partes clausula presente obligaciones pago garantia mes meses "
+    "plazo renovacion servicios gastos comunes reajuste dias habiles domicilio ciudad comuna region"
+).split()
+WORDS_PER_PAGE = 400
+
+
+def synthetic_contract(pages: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    words = []
+    for _ in range(pages * WORDS_PER_PAGE):
+        words.append(rnd.choice(WORDS) if rnd.random() > 0.03 else str(rnd.randint(1, 99999)))
+        if rnd.random() < 0.05:
+            words.append("\n")
+    return HEADER + " ".join(words)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[2, 10, 40])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'pages':>5} {'chars':>8} {'scan ms':>9} {'extract ms':>11}")
+    for pages in args.pages:
+        text = synthetic_contract(pages)
+        scan_ms = timeit.timeit(lambda: scan(text), number=args.repeat) / args.repeat * 1000
+        extract_ms = timeit.timeit(lambda: extract_contract_text(text, {}), number=args.repeat) / args.repeat * 1000
+        print(f"{pages:>5} {len(text):>8} {scan_ms:>9.2f} {extract_ms:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
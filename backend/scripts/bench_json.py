@@ -0,0 +1,95 @@
+"""Microbenchmark for map payload serialization and compression.
+
+Usage (from backend/): ``python -m scripts.bench_json [--features 1000 10000] [--repeat 5]``
+
+Builds a synthetic ``/properties/geojson`` FeatureCollection with
+``build_feature`` and compares encode time and wire bytes of the previous path
+(``jsonable_encoder`` + ``json.dumps``, as Starlette's ``JSONResponse``
+renders) with ``ORJSONResponse``, uncompressed, gzip and brotli (when
+installed).
+"""
+
+import argparse
+import json
+import random
+import timeit
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.compression import brotli, compress_body
+from app.core.config import settings
+from app.core.responses import dumps
+from app.models.property import PropertyState, PropertyType
+from app.services.map_features import build_feature
+
+COMUNAS = ["Copiapo", "Caldera", "Vallenar", "Chanaral", "Tierra Amarilla", "Diego de Almagro"]
+
+
+def synthetic_collection(features: int, seed: int = 0) -> dict:
+    rnd = random.Random(seed)
+    today = date(2024, 6, 1)
+    items = []
+    for index in range(features):
+        prop = SimpleNamespace(
+            id=uuid.UUID(int=rnd.getrandbits(128)),
+            codigo=f"P-{index:06d}",
+            direccion_linea1=f"Calle {rnd.randint(1, 500)} #{rnd.randint(1, 3000)}",
+            estado_actual=rnd.choice(list(PropertyState)),
+            tipo=rnd.choice(list(PropertyType)),
+            comuna=rnd.choice(COMUNAS),
+            region="Atacama",
+            valor_arriendo=Decimal(rnd.randint(200, 900) * 1000),
+            valor_venta=None,
+            lat=Decimal(f"-27.{rnd.randint(0, 999999):06d}"),
+            lon=Decimal(f"-70.{rnd.randint(0, 999999):06d}"),
+        )
+        contract = arrendatario = None
+        if rnd.random() < 0.6:
+            fecha_fin = today + timedelta(days=rnd.randint(30, 900))
+            contract = SimpleNamespace(fecha_fin=fecha_fin, dia_pago=rnd.randint(1, 28))
+            arrendatario = SimpleNamespace(nombres="Maria Jose", apellidos="Rojas Diaz")
+        items.append(build_feature(prop, contract, arrendatario, today))
+    return {"type": "FeatureCollection", "version": 1, "features": items}
+
+
+def before(collection: dict) -> bytes:
+    return json.dumps(
+        jsonable_encoder(collection), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--features", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    header = f"{'features':>8} {'path':>7} {'encode ms':>10} {'raw KB':>8}"
+    header += "".join(f" {enc + ' KB':>8} {enc + ' ms':>8}" for enc in encodings)
+    print(header)
+    for count in args.features:
+        collection = synthetic_collection(count)
+        for name, encode in (("before", before), ("orjson", dumps)):
+            body = encode(collection)
+            encode_ms = timeit.timeit(lambda: encode(collection), number=args.repeat) / args.repeat * 1000
+            line = f"{count:>8} {name:>7} {encode_ms:>10.1f} {len(body) / 1024:>8.1f}"
+            for enc in encodings:
+
+                def compress() -> bytes:
+                    return compress_body(
+                        enc, body, settings.compression_gzip_level, settings.compression_brotli_quality
+                    )
+
+                compressed = compress()
+                compress_ms = timeit.timeit(compress, number=args.repeat) / args.repeat * 1000
+                line += f" {len(compressed) / 1024:>8.1f} {compress_ms:>8.1f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Golden-file check for the rule-based contract extractor.
+
+Usage (from backend/): ``python -m scripts.check_contract_extractor [--update]``
+
+Every ``contract_extractor_golden/<name>.txt`` next to this script is run
+through ``extract_contract_text`` and compared with ``<name>.json``: its
+``expected`` fields, with the optional ``ai_data`` passed as the Gemini result.
+Exits non-zero on any difference. After a deliberate behavior change,
+``--update`` rewrites ``expected`` from the current output (review the diff).
+"""
+
+import argparse
+import json
+import sys
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from app.services.contract_extractor import extract_contract_text
+
+GOLDEN_DIR = Path(__file__).parent / "contract_extractor_golden"
+
+
+def _jsonable(fields: dict) -> dict:
+    out = {}
+    for name, value in fields.items():
+        if isinstance(value, date):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        out[name] = value
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--update", action="store_true", help="rewrite expected outputs")
+    args = parser.parse_args()
+
+    failures = 0
+    cases = sorted(GOLDEN_DIR.glob("*.txt"))
+    for text_path in cases:
+        golden_path = text_path.with_suffix(".json")
+        golden = json.loads(golden_path.read_text(encoding="utf-8")) if golden_path.exists() else {}
+        actual = _jsonable(extract_contract_text(text_path.read_text(encoding="utf-8"), golden.get("ai_data", {})))
+        if args.update:
+            golden["expected"] = actual
+            golden_path.write_text(json.dumps(golden, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+            continue
+        expected = golden.get("expected")
+        if actual == expected:
+            continue
+        failures += 1
+        print(f"FAIL {text_path.name}")
+        for name in sorted(set(actual) | set(expected or {})):
+            want, got = (expected or {}).get(name), actual.get(name)
+            if want != got:
+                print(f"  {name}: expected {want!r}, got {got!r}")
+
+    if args.update:
+        print(f"Updated {len(cases)} golden files")
+        return
+    print(f"{len(cases) - failures}/{len(cases)} golden files match")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
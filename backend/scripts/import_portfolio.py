@@ -0,0 +1,48 @@
+"""Import a legacy CSV/XLSX spreadsheet from the command line.
+
+Usage (from backend/): ``python -m scripts.import_portfolio propiedades cartera.xlsx [--dry-run]``
+
+Runs the same pipeline as ``POST /imports/{entidad}`` directly against
+``DATABASE_URL``, without the job queue or its lease timeout, which suits the
+initial load of a large portfolio. Load in dependency order: propiedades,
+personas, contratos, cobranzas. Prints the report as JSON and exits with 1 when
+some rows were rejected.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import app.db.base  # noqa: F401  (registers every model)
+from app.db.session import AsyncSessionLocal, engine
+from app.services.bulk_import import ENTITIES, ImportFormatError, import_file
+
+
+async def _run(args: argparse.Namespace) -> int:
+    try:
+        async with AsyncSessionLocal() as session:
+            report = await import_file(
+                session, args.entidad, args.path, args.path.name, dry_run=args.dry_run, batch_size=args.batch_size
+            )
+    except ImportFormatError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    finally:
+        await engine.dispose()
+    print(json.dumps(report.model_dump(mode="json"), indent=2, ensure_ascii=False))
+    return 1 if report.con_error else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("entidad", choices=sorted(ENTITIES))
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--dry-run", action="store_true", help="validate and resolve references without writing")
+    parser.add_argument("--batch-size", type=int, default=None)
+    sys.exit(asyncio.run(_run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
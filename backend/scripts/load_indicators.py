@@ -0,0 +1,56 @@
+"""Load a UF or IPC series file and readjust the affected charges.
+
+Usage (from backend/): ``python -m scripts.load_indicators uf uf_2024.csv [--no-readjust]``
+
+The file needs ``fecha`` and ``valor`` columns (UF: CLP per UF per day; IPC:
+monthly change in percent, ``fecha`` may be ``2024-03``). Runs the same loader
+as ``POST /indicators/{tipo}/import`` against ``DATABASE_URL`` and then the
+readjustment pass inline instead of through the job queue. Prints the reports
+as JSON and exits with 1 when some rows were rejected.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import app.db.base  # noqa: F401  (registers every model)
+from app.db.session import AsyncSessionLocal, engine
+from app.models.indicator import IndicatorType
+from app.services.bulk_import import ImportFormatError
+from app.services.indicators import load_indicator_file
+from app.services.readjustment import recompute_adjustments
+
+
+async def _run(args: argparse.Namespace) -> int:
+    tipo = IndicatorType(args.tipo)
+    output: dict = {}
+    try:
+        async with AsyncSessionLocal() as session:
+            report = await load_indicator_file(session, tipo, args.path, args.path.name, batch_size=args.batch_size)
+            output["carga"] = report.model_dump(mode="json")
+            if report.cambios_desde and not args.no_readjust:
+                outcome = await recompute_adjustments(session, since=report.cambios_desde)
+                await session.commit()
+                output["reajuste"] = outcome.model_dump(mode="json")
+    except ImportFormatError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    finally:
+        await engine.dispose()
+    print(json.dumps(output, indent=2, ensure_ascii=False))
+    return 1 if report.con_error else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tipo", choices=[tipo.value for tipo in IndicatorType])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--no-readjust", action="store_true", help="only load the series")
+    parser.add_argument("--batch-size", type=int, default=None)
+    sys.exit(asyncio.run(_run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
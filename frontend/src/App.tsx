@@ -2,6 +2,7 @@ import { useEffect, useMemo, useState } from "react";
 import {
   fetchProperties,
   fetchGeoJson,
+  refreshGeoJson,
   Property,
   getToken,
   setToken,
@@ -9,6 +10,8 @@ import {
   deleteProperty,
   uploadDocument,
   fetchPropertyFull,
+  fetchPropertiesFull,
+  fetchDashboardSummary,
   downloadDocument,
   deleteDocument,
   replaceDocument,
@@ -87,77 +90,17 @@ function App() {
     return { ...geojson, features: nextFeatures };
   }, [filteredProperties, geojson]);
 
-  const computeAlerts = (props: Property[], cache: Record<string, any>) => {
-    const tzNow = new Date(new Date().toLocaleString("en-US", { timeZone: "America/Santiago" }));
-    const addDays = (date: Date, days: number) => new Date(date.getTime() + days * 24 * 60 * 60 * 1000);
-
-    let vencidos = 0;
-    let porVencer = 0;
-    let sinContrato = 0;
-    let cobranzaAtrasada = 0;
-    let docsIncompletos = 0;
-
-    for (const p of props) {
-      const detail = cache[p.id];
-      const contract = detail?.current_contract;
-      const charges = detail?.charges || [];
-      const docs = detail?.documents || [];
-
-      if (!contract && (p.estado_actual || "").toLowerCase() === "disponible") sinContrato += 1;
-
-      if (contract?.fecha_fin) {
-        const fin = new Date(contract.fecha_fin);
-        if (!Number.isNaN(fin.getTime())) {
-          if (fin < tzNow) vencidos += 1;
-          else if (fin <= addDays(tzNow, 30)) porVencer += 1;
-        }
-      }
-
-      const hasDocs = docs.length > 0;
-      if (!hasDocs) docsIncompletos += 1;
-
-      const lateCharge = charges.find((c: any) => {
-        const venc = c.fecha_vencimiento ? new Date(c.fecha_vencimiento) : null;
-        const isLate = venc ? venc < tzNow : false;
-        const estado = (c.estado || "").toLowerCase();
-        return estado === "atraso" || estado === "pendiente" && isLate;
-      });
-      if (lateCharge) cobranzaAtrasada += 1;
-    }
-
-    return { vencidos, porVencer, sinContrato, cobranzaAtrasada, docsIncompletos };
-  };
+  const [summary, setSummary] = useState<any>(null);
 
   const paymentsSummary = useMemo(() => {
-    const now = new Date();
-    const year = now.getFullYear();
-    const month = now.getMonth();
-    let monthTotal = 0;
-    let monthCount = 0;
-    let last: any = null;
-
-    for (const p of properties) {
-      const detail = detailsCache[p.id];
-      const charges = detail?.charges || [];
-      for (const c of charges) {
-        const pays = c.pagos || [];
-        for (const pay of pays) {
-          const dt = pay.fecha_pago ? new Date(pay.fecha_pago) : null;
-          const amount = typeof pay.monto_pagado === "number" ? pay.monto_pagado : Number(pay.monto_pagado || 0);
-          if (dt && dt.getFullYear() === year && dt.getMonth() === month) {
-            monthTotal += amount || 0;
-            monthCount += 1;
-          }
-          const lastDate = last?.fecha_pago ? new Date(last.fecha_pago) : null;
-          if (!lastDate || (dt && dt > lastDate)) {
-            last = { ...pay, propertyCodigo: p.codigo };
-          }
-        }
-      }
-    }
-
-    return { monthTotal, monthCount, last };
-  }, [properties, detailsCache]);
+    const pagos = summary?.pagos_mes;
+    const ultimo = pagos?.ultimo;
+    return {
+      monthTotal: pagos?.monto_total || 0,
+      monthCount: pagos?.cantidad || 0,
+      last: ultimo ? { ...ultimo, propertyCodigo: ultimo.codigo_propiedad } : null,
+    };
+  }, [summary]);
 
   useEffect(() => {
     if (!toast) return;
@@ -199,13 +142,17 @@ function App() {
     if (!props.length) return;
     setPrefetching(true);
     try {
-      await Promise.allSettled(
-        props.map(async (p) => {
-          if (detailsCache[p.id]) return;
-          const full = await fetchPropertyFull(p.id);
-          setDetailsCache((prev) => (prev[p.id] ? prev : { ...prev, [p.id]: full }));
-        })
-      );
+      const missing = props.filter((p) => !detailsCache[p.id]).map((p) => p.id);
+      if (!missing.length) return;
+      const fulls = await fetchPropertiesFull(missing);
+      setDetailsCache((prev) => {
+        const next = { ...prev };
+        for (const full of fulls) {
+          const id = full?.property?.id;
+          if (id && !next[id]) next[id] = full;
+        }
+        return next;
+      });
     } finally {
       setPrefetching(false);
     }
@@ -241,24 +188,26 @@ function App() {
   useEffect(() => {
     const hydrateAlerts = async () => {
       if (!properties.length) {
+        setSummary(null);
         setAlertsData({ vencidos: 0, porVencer: 0, sinContrato: 0, cobranzaAtrasada: 0, docsIncompletos: 0 });
         return;
       }
-      const copyCache: Record<string, any> = { ...detailsCache };
-      for (const p of properties) {
-        if (copyCache[p.id]) continue;
-        try {
-          const full = await fetchPropertyFull(p.id);
-          copyCache[p.id] = full;
-          setDetailsCache((prev) => ({ ...prev, [p.id]: full }));
-        } catch {
-          /* ignore single failures */
-        }
+      try {
+        const data = await fetchDashboardSummary();
+        setSummary(data);
+        const alertas = data?.alertas || {};
+        setAlertsData({
+          vencidos: alertas.vencidos || 0,
+          porVencer: alertas.por_vencer || 0,
+          sinContrato: alertas.sin_contrato || 0,
+          cobranzaAtrasada: alertas.cobranza_atrasada || 0,
+          docsIncompletos: alertas.docs_incompletos || 0,
+        });
+      } catch {
+        /* keep previous alerts on failure */
       }
-      setAlertsData(computeAlerts(properties, copyCache));
     };
     hydrateAlerts();
-    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [properties]);
 
   useEffect(() => {
@@ -334,7 +283,7 @@ function App() {
       } as any;
       const created = await createProperty(payload);
       setProperties((prev) => [created, ...prev]);
-      const refreshedGeo = await fetchGeoJson();
+      const refreshedGeo = await refreshGeoJson(geojson);
       setGeojson(refreshedGeo);
       setSelectedProp(created.id);
       setToast("Propiedad creada y ubicada en el mapa");
@@ -456,7 +405,7 @@ function App() {
     try {
       await deleteProperty(id);
       setProperties((prev) => prev.filter((p) => p.id !== id));
-      const refreshedGeo = await fetchGeoJson();
+      const refreshedGeo = await refreshGeoJson(geojson);
       setGeojson(refreshedGeo);
       if (detailId === id) {
         setShowDetail(false);
@@ -68,8 +68,14 @@ export type Property = {
 };
 
 export async function fetchProperties(): Promise<Property[]> {
-  const { data } = await api.get("/properties");
-  return data;
+  const all: Property[] = [];
+  let cursor: string | undefined;
+  do {
+    const { data, headers } = await api.get("/properties", { params: { limit: 500, cursor } });
+    all.push(...data);
+    cursor = headers["x-next-cursor"] || undefined;
+  } while (cursor);
+  return all;
 }
 
 export async function fetchGeoJson(): Promise<any> {
@@ -77,11 +83,35 @@ export async function fetchGeoJson(): Promise<any> {
   return data;
 }
 
+// Applies only the changes since the collection's version; falls back to a full reload.
+export async function refreshGeoJson(current: any): Promise<any> {
+  if (typeof current?.version !== "number") return fetchGeoJson();
+  const { data } = await api.get("/properties/geojson", { params: { since: current.version } });
+  if (data.type !== "FeatureCollectionDelta") return data;
+  const dropped = new Set<string>([
+    ...data.removed,
+    ...data.changed.map((f: any) => f.properties.id),
+    ...data.added.map((f: any) => f.properties.id),
+  ]);
+  const kept = (current.features || []).filter((f: any) => !dropped.has(f.properties.id));
+  return { ...current, version: data.version, features: [...kept, ...data.changed, ...data.added] };
+}
+
 export async function fetchPropertyFull(propertyId: string): Promise<any> {
   const { data } = await api.get(`/properties/${propertyId}/full`);
   return data;
 }
 
+export async function fetchPropertiesFull(ids?: string[]): Promise<any[]> {
+  const { data } = await api.post("/properties/full", { ids: ids && ids.length ? ids : null });
+  return data;
+}
+
+export async function fetchDashboardSummary(): Promise<any> {
+  const { data } = await api.get("/dashboard/summary");
+  return data;
+}
+
 export async function createProperty(payload: Omit<Property, "id">): Promise<Property> {
   const { data } = await api.post("/properties", payload);
   return data;
@@ -121,5 +151,20 @@ export async function uploadDocument(
   formData.append("file", file);
    if (extras?.arrendatario_id) formData.append("arrendatario_id", extras.arrendatario_id);
    if (extras?.propietario_id) formData.append("propietario_id", extras.propietario_id);
-  await api.post("/documents", formData);
+  const { data } = await api.post("/documents", formData);
+  if (data?.job_id) await waitForJob(data.job_id);
+}
+
+// Contract/receipt processing runs as a background job; poll until it settles.
+export async function waitForJob(jobId: string, timeoutMs = 120000): Promise<any> {
+  const started = Date.now();
+  let delay = 500;
+  while (Date.now() - started < timeoutMs) {
+    const { data } = await api.get(`/jobs/${jobId}`);
+    if (data.estado === "completado") return data.result;
+    if (data.estado === "fallido") throw new Error(data.error || "El procesamiento del documento fallo");
+    await new Promise((resolve) => setTimeout(resolve, delay));
+    delay = Math.min(delay * 2, 4000);
+  }
+  throw new Error("El procesamiento del documento sigue en curso");
 }